@@ -1,231 +1,225 @@
-from flask import Flask, request, jsonify
-from werkzeug.security import generate_password_hash, check_password_hash
+import threading
+
+import click
+from flask import Flask, jsonify
 from flask_cors import CORS
-from datetime import datetime
-from bson import ObjectId
-from models import User, Venue, Event
-from mongoengine import connect
+from config import Config
+from database import init_db, readiness
+from metrics import init_metrics
+from compression import init_compression
+from indexes import missing_unique, sync_indexes
+from migrations import (
+    migrate_event_datetimes, link_participants, backfill_search_keys, normalize_user_emails, backfill_counted_as
+)
+from serializers import install_json
+from auth import load_session, revoked
+from cache import response_cache
+from rush import rush_queue
+from jobs import job_runner, schedule_reconcile
+from event_stats import rebuild_stats
+from checkin import checkin_desk
+from ratelimit import rate_limiter
+from stores import require_shared
+from routes.user_routes import user_bp
 from routes.event_routes import event_bp
 from routes.venue_routes import venue_bp
 from routes.registration_routes import reg_bp
 from routes.student_routes import student_bp  # NEW
+from routes.checkin_routes import checkin_bp
+
+
+# Signs tokens in debug/test runs only; never accepted otherwise
+DEV_SECRET_KEY = "dev-only-secret-change-me"
+
+
+def create_app(config=None):
+    """Build the Flask app.
+
+    `config` is a dict (or object) layered over config.Config. MongoDB is
+    registered lazily, so this is safe to call in a pre-fork master process.
+    """
+    app = Flask(__name__)
+    app.config.from_object(Config)
+    if isinstance(config, dict):
+        app.config.update(config)
+    elif config is not None:
+        app.config.from_object(config)
+    if not app.config["SECRET_KEY"]:
+        # Anyone who knows a default key can forge any session
+        if not (app.debug or app.testing):
+            raise RuntimeError("SECRET_KEY must be set (only DEBUG or TESTING runs may omit it)")
+        app.config["SECRET_KEY"] = DEV_SECRET_KEY
+    app.secret_key = app.config["SECRET_KEY"]
+
+    install_json(app)
+
+    CORS(app, resources={r"/*": {"origins": app.config["CORS_ORIGINS"]}}, supports_credentials=True)
+
+    # Per-route query instrumentation and /metrics (before the client exists)
+    init_metrics(app)
+
+    # gzip/brotli for large JSON responses
+    init_compression(app)
+
+    # Every worker must see the same cache versions, logouts and buckets
+    if app.config["WEB_CONCURRENCY"] > 1:
+        require_shared(CACHE_VERSION_DIR=response_cache.store,
+                       SESSION_REVOCATION_DIR=revoked,
+                       RATE_LIMIT_DIR=rate_limiter.store)
+        # A status poll may land on a worker that did not queue it
+        if app.config["RUSH_MODE"]:
+            require_shared(RUSH_STATUS_DIR=rush_queue.statuses)
+
+    # Connect to MongoDB (lazily, per worker process)
+    init_db(app)
+    rush_queue.configure(app.config)
+    job_runner.configure(app.config)
+    checkin_desk.configure(app.config)
+    rate_limiter.configure(app.config)
+
+    # Register blueprints
+    app.register_blueprint(user_bp)
+    app.register_blueprint(event_bp)
+    app.register_blueprint(venue_bp)
+    app.register_blueprint(reg_bp)
+    app.register_blueprint(student_bp)  # NEW
+    app.register_blueprint(checkin_bp)
+
+    # Verify session tokens in memory before every request (sets g.session)
+    app.before_request(load_session)
+
+    # Background job threads start with this worker's first request
+    app.before_request(job_runner.ensure_started)
+
+    app.add_url_rule("/api/health/live", "health_live", health_live)
+    app.add_url_rule("/api/health/ready", "health_ready", health_ready)
+
+    app.cli.add_command(sync_indexes_command)
+    app.cli.add_command(migrate_event_datetimes_command)
+    app.cli.add_command(link_participants_command)
+    app.cli.add_command(backfill_search_keys_command)
+    app.cli.add_command(normalize_user_emails_command)
+    app.cli.add_command(backfill_counted_as_command)
+    app.cli.add_command(run_jobs_command)
+    app.cli.add_command(rebuild_event_stats_command)
+    return app
 
-app = Flask(__name__)
 
-CORS(app, resources={r"/*": {"origins": "http://localhost:5173"}}, supports_credentials=True)
+# -------------------------
+# Health checks
+# -------------------------
+def health_live():
+    return jsonify({"success": True})
 
-# Connect to MongoDB
-connect(
-    db="college_event",
-    host="mongodb://localhost:27017/college_event"
-)
 
-# Register blueprints
-app.register_blueprint(event_bp)
-app.register_blueprint(venue_bp)
-app.register_blueprint(reg_bp)
-app.register_blueprint(student_bp)  # NEW
-
-
-def convert_year_to_int(year):
-    if year == '1st year':
-        return 1
-    elif year == '2nd year':
-        return 2
-    elif year == '3rd year':
-        return 3
-    elif year == '4th year':
-        return 4
-    return 1
-
-
-def convert_int_to_year(year):
-    if year == 1:
-        return "1st year"
-    elif year == 2:
-        return "2nd year"
-    elif year == 3:
-        return "3rd year"
-    elif year == 4:
-        return "4th year"
-    return "1st year"
+def health_ready():
+    """Ready once the worker's pool can reach MongoDB and the unique indexes exist.
+
+    Duplicate registrations and jobs are only rejected atomically by unique
+    indexes, which `flask --app app sync-indexes` builds.
+    """
+    ok, details = readiness()
+    if ok:
+        missing = missing_unique()
+        if missing:
+            ok = False
+            details["missing_unique_indexes"] = missing
+    return jsonify({"success": ok, "mongodb": details}), 200 if ok else 503
 
 
 # -------------------------
-# Sign Up API
+# CLI: build indexes before serving
 # -------------------------
-@app.route("/api/signup", methods=["POST"])
-def signup():
-    data = request.json
-    reg_no = data.get("reg_no")
-    name = data.get("name")
-    email = data.get("email")
-    password = data.get("password")
-    role = data.get("role")
-    department = data.get("department")
-    year = convert_year_to_int(data.get("year"))
-
-    if not reg_no or not name or not email or not password or not role or not department or not year:
-        return jsonify({"success": False, "message": "All fields are required"})
-
-    if User.objects(email=email).first() or User.objects(reg_no=reg_no).first():
-        return jsonify({"success": False, "message": "User already exists"})
-
-    hashed_password = generate_password_hash(password)
-
-    user = User(
-        reg_no=reg_no,
-        name=name,
-        email=email,
-        password=hashed_password,
-        role=role,
-        department=department,
-        year=year
-    )
-    user.save()
-
-    return jsonify({"success": True, "message": "User registered successfully"})
+@click.command("sync-indexes")
+@click.option("--drop-extra", is_flag=True, help="Drop indexes not declared in models.py")
+def sync_indexes_command(drop_extra):
+    """Build the indexes declared in models.py in the background."""
+    if not sync_indexes(drop_extra=drop_extra, log=click.echo):
+        raise SystemExit(1)
 
 
-# -------------------------
-# Sign In API
-# -------------------------
-@app.route("/api/login", methods=["POST"])
-def login():
-    data = request.json
-    reg_no = data.get("reg_no")
-    email = data.get("email")
-    password = data.get("password")
-
-    user = User.objects(email=email).first()
-    if not user:
-        return jsonify({"success": False, "message": "User not found"})
-
-    if check_password_hash(user.password, password):
-        return jsonify({
-            "success": True,
-            "role": user.role,
-            "user_id": str(user.id),
-            "name": user.name
-        })
-    else:
-        return jsonify({"success": False, "message": "Invalid password"})
+@click.command("migrate-event-datetimes")
+@click.option("--batch-size", default=500, show_default=True)
+@click.option("--restart", is_flag=True, help="Ignore saved progress and start from the beginning")
+def migrate_event_datetimes_command(batch_size, restart):
+    """Backfill Event.starts_at/ends_at from the date and time strings."""
+    converted, skipped = migrate_event_datetimes(batch_size, restart, log=click.echo)
+    click.echo(f"Done: {converted} converted, {skipped} skipped")
 
 
-# -------------------------
-# Show all users to admin
-# -------------------------
-@app.route("/api/users", methods=["GET"])
-def get_users():
-    users = User.objects().exclude('password')
-    users_data = []
-    for user in users:
-        users_data.append({
-            "_id": str(user.id),
-            "reg_no": user.reg_no,
-            "name": user.name,
-            "email": user.email,
-            "role": user.role,
-            "department": user.department,
-            "year": convert_int_to_year(user.year),
-            "phone_number": getattr(user, 'phone_number', ''),
-            "created_at": user.created_at.strftime("%Y-%m-%d %H:%M:%S")
-        })
-    return jsonify(users_data)
-
-
-@app.route("/api/users", methods=["POST"])
-def add_user():
-    data = request.json
-    reg_no = data.get("reg_no")
-    name = data.get("name")
-    email = data.get("email")
-    password = data.get("password")
-    role = data.get("role")
-    department = data.get("department")
-    year = convert_year_to_int(data.get("year"))
-
-    if not reg_no or not name or not email or not password or not role or not department or not year:
-        return jsonify({"success": False, "message": "All fields are required"})
-
-    if User.objects(email=email).first() or User.objects(reg_no=reg_no).first():
-        return jsonify({"success": False, "message": "User already exists"})
-
-    user = User(
-        reg_no=reg_no,
-        name=name,
-        email=email,
-        password=generate_password_hash(password),
-        role=role,
-        department=department,
-        year=year
-    )
-    user.save()
-    return jsonify({"success": True, "message": "User added successfully"})
-
-
-@app.route("/api/users/<user_id>", methods=["PUT"])
-@app.route("/api/users/<user_id>/", methods=["PUT"])
-def edit_user(user_id):
-    data = request.json
-    update_data = {
-        "reg_no": data.get("reg_no"),
-        "name": data.get("name"),
-        "email": data.get("email"),
-        "role": data.get("role"),
-        "department": data.get("department"),
-        "year": convert_year_to_int(data.get("year")),
-        "phone_number": data.get("phone_number")
-    }
-
-    if data.get("password"):
-        update_data["password"] = generate_password_hash(data["password"])
+@click.command("link-participants")
+@click.option("--batch-size", default=500, show_default=True)
+@click.option("--restart", is_flag=True, help="Ignore saved progress and start from the beginning")
+def link_participants_command(batch_size, restart):
+    """Backfill Participant.user_id from matching User emails / reg_nos."""
+    linked, unmatched = link_participants(batch_size, restart, log=click.echo)
+    click.echo(f"Done: {linked} linked, {unmatched} without an account")
 
-    try:
-        user = User.objects.get(id=ObjectId(user_id))
-    except Exception:
-        return jsonify({"success": False, "message": "User not found"})
 
-    for key, value in update_data.items():
-        if value is not None:
-            setattr(user, key, value)
+@click.command("backfill-search-keys")
+@click.option("--batch-size", default=500, show_default=True)
+@click.option("--restart", is_flag=True, help="Ignore saved progress and start from the beginning")
+def backfill_search_keys_command(batch_size, restart):
+    """Fill Participant/User.search_keys for prefix search."""
+    updated, _ = backfill_search_keys(batch_size, restart, log=click.echo)
+    click.echo(f"Done: {updated} updated")
 
-    user.save()
-    return jsonify({"success": True, "message": "User updated successfully"})
 
+@click.command("normalize-user-emails")
+@click.option("--batch-size", default=500, show_default=True)
+@click.option("--restart", is_flag=True, help="Ignore saved progress and start from the beginning")
+def normalize_user_emails_command(batch_size, restart):
+    """Lower-case User.email on older accounts and link their sign-ups."""
+    updated, _ = normalize_user_emails(batch_size, restart, log=click.echo)
+    click.echo(f"Done: {updated} updated")
 
-@app.route("/api/users/<user_id>", methods=["DELETE"])
-@app.route("/api/users/<user_id>/", methods=["DELETE"])
-def delete_user(user_id):
-    try:
-        user = User.objects.get(id=ObjectId(user_id))
-    except Exception:
-        return jsonify({"success": False, "message": "User not found"})
 
-    user.delete()
-    return jsonify({"success": True, "message": "User deleted successfully"})
+@click.command("backfill-counted-as")
+@click.option("--batch-size", default=500, show_default=True)
+@click.option("--restart", is_flag=True, help="Ignore saved progress and start from the beginning")
+def backfill_counted_as_command(batch_size, restart):
+    """Record the stats buckets of older registrations; then rebuild-event-stats."""
+    updated, _ = backfill_counted_as(batch_size, restart, log=click.echo)
+    click.echo(f"Done: {updated} updated")
+
 
+@click.command("rebuild-event-stats")
+def rebuild_event_stats_command():
+    """Recompute event_stats from event_registrations."""
+    rebuild_stats(log=click.echo)
 
-@app.route("/api/users/<user_id>", methods=["GET"])
-@app.route("/api/users/<user_id>/", methods=["GET"])
-def get_user(user_id):
+
+# -------------------------
+# CLI: dedicated background job worker
+# -------------------------
+@click.command("run-jobs")
+@click.option("--workers", default=2, show_default=True)
+def run_jobs_command(workers):
+    """Run cascade deletes and counter reconciliation until interrupted."""
+    # Cache bumps from this process have to reach the web workers
+    require_shared(CACHE_VERSION_DIR=response_cache.store)
+    schedule_reconcile(0)
+    threads = [threading.Thread(target=job_runner.work, daemon=True) for _ in range(workers)]
+    for t in threads:
+        t.start()
+    click.echo(f"Running {workers} job workers; Ctrl+C to stop")
     try:
-        user = User.objects.get(id=ObjectId(user_id))
-    except Exception:
-        return jsonify({"success": False, "message": "User not found"}), 404
-
-    user_data = {
-        "_id": str(user.id),
-        "reg_no": user.reg_no,
-        "name": user.name,
-        "email": user.email,
-        "role": user.role,
-        "department": user.department,
-        "year": convert_int_to_year(user.year),
-        "phone_number": getattr(user, 'phone_number', ''),
-        "created_at": user.created_at.strftime("%Y-%m-%d %H:%M:%S")
-    }
-    return jsonify(user_data)
+        for t in threads:
+            t.join()
+    except KeyboardInterrupt:
+        pass
+
+
+def __getattr__(name):
+    """Default instance for `flask --app app`, `gunicorn app:app` and asgi.py.
+
+    Built on first use, so importing create_app (tests, benchmarks) does not
+    need a SECRET_KEY.
+    """
+    if name == "app":
+        globals()["app"] = create_app()
+        return globals()["app"]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 # -------------------------
@@ -233,6 +227,6 @@ def get_user(user_id):
 # -------------------------
 if __name__ == "__main__":
     try:
-        app.run(host="localhost", port=5000, debug=True)
+        create_app({"DEBUG": True}).run(host="localhost", port=5000, debug=True)
     except KeyboardInterrupt:
-        print("\nServer stopped by user")
\ No newline at end of file
+        print("\nServer stopped by user")
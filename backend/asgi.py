@@ -0,0 +1,214 @@
+"""ASGI entry point for high-concurrency deployments.
+
+    pip install -r requirements-asgi.txt
+    uvicorn asgi:app --workers 4
+
+The hottest /api routes are served by async handlers on pymongo's
+AsyncMongoClient, so hundreds of requests can wait on MongoDB at once
+without a thread each. What they answer comes from the same services.py
+functions the Flask views call, run on the async driver. Around them the
+handlers do what the Flask app does around a view: verify the bearer token
+(auth.py), admit through the rate limiter (ratelimit.py) and serve the
+ETag cache (cache.py), whose entries they share with the Flask app in the
+same process. The async client gets the Flask side's connection settings,
+write concern and read preference included. File-backed shared stores
+(SHARED_STATE_DIR) take locks and touch the disk, so the handlers call them
+in worker threads rather than on the event loop. Every other route, and any request these handlers do not
+cover (filters, paging, ?fields=, ?since=, rush mode), falls through to the
+regular Flask app.
+
+Native responses are gzipped above COMPRESS_MIN_SIZE; forwarded ones arrive
+already compressed by the Flask app (compression.py) and pass through.
+"""
+from functools import wraps
+
+from a2wsgi import WSGIMiddleware
+from pymongo import AsyncMongoClient
+from starlette.applications import Starlette
+from starlette.concurrency import run_in_threadpool
+from starlette.middleware import Middleware
+from starlette.middleware.cors import CORSMiddleware
+from starlette.middleware.gzip import GZipMiddleware
+from starlette.responses import Response
+from starlette.routing import Mount, Route
+from werkzeug.http import parse_etags
+
+import services
+from app import app as flask_app
+from auth import InvalidSession, revoked, verify_header
+from cache import response_cache
+from config import Config
+from database import client_settings, ensure_connection
+from indexes import enforces_unique, unique_indexes
+from models import EventRegistration
+from ratelimit import TOO_MANY, client_key, rate_limiter, retry_after
+from services import run_async
+
+def mongo_database(config):
+    """The app's database on an AsyncMongoClient built like the Flask side's client.
+
+    database.client_settings supplies the pool, timeouts, write concern,
+    journal and read preference, so a registration is acknowledged the same
+    way through either entry point.
+    """
+    settings = client_settings(config)
+    # MONGO_CLIENT_CLASS only stands in for the synchronous client
+    settings.pop("mongo_client_class", None)
+    name = settings.pop("db")
+    return AsyncMongoClient(**settings)[name]
+
+
+db = mongo_database(flask_app.config)
+fallback = WSGIMiddleware(flask_app)
+
+
+async def off_loop(shared, fn, *args):
+    """Call `fn(*args)`, in a worker thread when it goes through a file-backed store."""
+    if shared:
+        return await run_in_threadpool(fn, *args)
+    return fn(*args)
+
+
+def _limits_shared():
+    return rate_limiter.store.shared or rate_limiter.slots.shared
+
+
+def json_response(body, status=200, headers=None):
+    return Response(flask_app.json.dumps(body), status, headers=headers, media_type="application/json")
+
+
+def too_many(wait):
+    return json_response({"success": False, "error": TOO_MANY, "message": TOO_MANY}, 429,
+                         headers={"Retry-After": retry_after(wait)})
+
+
+class Forward(Response):
+    """Returned by a handler to pass the request on to the Flask app."""
+
+    def __init__(self):
+        pass
+
+    async def __call__(self, scope, receive, send):
+        await fallback(scope, receive, send)
+
+
+def native(handler):
+    """Verify the bearer token first, as the Flask app's load_session does."""
+    @wraps(handler)
+    async def wrapper(request):
+        try:
+            session = await off_loop(revoked.shared, verify_header,
+                                     request.headers.get("authorization", ""), flask_app.secret_key)
+        except InvalidSession as e:
+            return json_response({"success": False, "message": str(e)}, 401)
+        return await handler(request, session)
+    return wrapper
+
+
+async def cached(request, namespace, service):
+    """Answer from the response cache, running `service` on a miss (cf. ResponseCache.cached)."""
+    # The key werkzeug's request.full_path gives the Flask views
+    full_path = f"{request.url.path}?{request.url.query}"
+    version = await off_loop(response_cache.store.shared, response_cache.store.get, namespace)
+    etag = response_cache.etag(namespace, version, full_path)
+    # Weak, since GZipMiddleware may compress the body
+    headers = {"ETag": f'W/"{etag}"', "Cache-Control": "no-cache"}
+
+    if parse_etags(request.headers.get("if-none-match")).contains_weak(etag):
+        return Response(status_code=304, headers=headers)
+
+    entry = response_cache.lookup(namespace, full_path, version)
+    if entry is None:
+        body, status = await run_async(service, db)
+        if status != 200:
+            return json_response(body, status)
+        entry = (flask_app.json.dumps(body).encode(), "application/json")
+        response_cache.keep(namespace, full_path, version, *entry)
+    return Response(entry[0], 200, headers=headers, media_type=entry[1])
+
+
+def _registrations_indexed():
+    ensure_connection()
+    return enforces_unique(EventRegistration)
+
+
+# -------------------------
+# GET /api/student/all-events (unfiltered, unpaged)
+# -------------------------
+@native
+async def all_events(request, session):
+    # Filters and keyset pages stay on the shared Flask implementation
+    if request.query_params:
+        return Forward()
+    return await cached(request, "events", services.all_events())
+
+
+# -------------------------
+# GET /api/venues/
+# -------------------------
+@native
+async def venues(request, session):
+    if request.query_params:
+        return Forward()
+    return await cached(request, "venues", services.all_venues())
+
+
+# -------------------------
+# GET /api/registrations/participants?event_id=
+# -------------------------
+@native
+async def participants(request, session):
+    if set(request.query_params) != {"event_id"}:
+        return Forward()
+    body, status = await run_async(services.event_participants(request.query_params["event_id"]), db)
+    return json_response(body, status)
+
+
+# -------------------------
+# POST /api/registrations/register
+# -------------------------
+@native
+async def register(request, session):
+    # Rush mode batches writes in the Flask app's queue (rush.py)
+    if Config.RUSH_MODE:
+        return Forward()
+
+    try:
+        data = await request.json()
+    except ValueError:
+        data = None
+    if not isinstance(data, dict):
+        data = {}
+
+    address = request.client.host if request.client else None
+    slot, wait = await off_loop(_limits_shared(), rate_limiter.admit,
+                                "register", client_key(session, address), data.get("email"))
+    if slot is None:
+        return too_many(wait)
+    try:
+        # Only a collection not yet seen indexed needs the (blocking) index check
+        indexed = unique_indexes.verified(EventRegistration) or await run_in_threadpool(_registrations_indexed)
+        body, status = await run_async(services.register(data, check_duplicates=not indexed), db)
+    finally:
+        await off_loop(_limits_shared(), rate_limiter.release, slot)
+    return json_response(body, status)
+
+
+app = Starlette(
+    routes=[
+        Route("/api/student/all-events", all_events, methods=["GET"]),
+        Route("/api/venues/", venues, methods=["GET"]),
+        Route("/api/registrations/participants", participants, methods=["GET"]),
+        Route("/api/registrations/register", register, methods=["POST"]),
+        Mount("/", app=fallback),
+    ],
+    middleware=[
+        # Same origin policy as the Flask app; overrides the header Flask sets
+        # on forwarded responses rather than duplicating it
+        Middleware(
+            CORSMiddleware, allow_origins=Config.CORS_ORIGINS,
+            allow_credentials=True, allow_methods=["*"], allow_headers=["*"]
+        ),
+        Middleware(GZipMiddleware, minimum_size=Config.COMPRESS_MIN_SIZE),
+    ],
+)
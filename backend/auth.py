@@ -0,0 +1,188 @@
+"""Signed, expiring session tokens.
+
+/api/login issues a token carrying the user's id, role and name. Clients
+send it back as `Authorization: Bearer <token>`; `load_session` verifies the
+signature in memory before each request and exposes the claims as
+`g.session` (asgi.py verifies with `verify_header` too). Routes authorize
+from the claims alone, through `require_session` and `acts_for`, without
+fetching the User. Profile data that can change (email, reg_no) is not in
+the token; routes that need it read the User.
+
+Logged-out tokens go on a small revocation list until they would have
+expired anyway. Deleting a user or changing their role or password revokes
+every token issued to them before that moment (`revoke_user`). The list is
+per process unless SESSION_REVOCATION_DIR (or SHARED_STATE_DIR) points at a
+local directory shared by all workers.
+"""
+import os
+import threading
+import time
+import uuid
+from functools import wraps
+
+from flask import current_app, g, jsonify, request
+from itsdangerous import BadSignature, SignatureExpired, URLSafeTimedSerializer
+
+from stores import pick_store
+
+TOKEN_MAX_AGE = 12 * 60 * 60  # seconds
+
+
+class MemoryRevocations:
+    shared = False
+
+    def __init__(self):
+        self._revoked = {}  # jti -> expiry timestamp
+        self._users = {}  # user id -> tokens issued before this are void
+        self._lock = threading.Lock()
+
+    def add(self, jti, expires):
+        with self._lock:
+            now = time.time()
+            self._revoked = {k: v for k, v in self._revoked.items() if v > now}
+            self._revoked[jti] = expires
+
+    def __contains__(self, jti):
+        return jti in self._revoked
+
+    def revoke_user(self, uid, at):
+        with self._lock:
+            cutoff = time.time() - TOKEN_MAX_AGE
+            self._users = {k: v for k, v in self._users.items() if v > cutoff}
+            self._users[uid] = at
+
+    def user_cutoff(self, uid):
+        return self._users.get(uid, 0)
+
+
+class FileRevocations:
+    """One empty file per revoked token id; checking is a single stat()."""
+
+    shared = True
+
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def add(self, jti, expires):
+        open(os.path.join(self.directory, jti), "w").close()
+        cutoff = time.time() - TOKEN_MAX_AGE
+        for entry in os.scandir(self.directory):
+            if entry.stat().st_mtime < cutoff:
+                os.unlink(entry.path)
+
+    def __contains__(self, jti):
+        return os.path.exists(os.path.join(self.directory, jti))
+
+    def revoke_user(self, uid, at):
+        # The cutoff is the file's mtime, so expired ones are pruned like the rest
+        path = os.path.join(self.directory, f"user-{uid}")
+        open(path, "w").close()
+        os.utime(path, (at, at))
+
+    def user_cutoff(self, uid):
+        try:
+            return os.stat(os.path.join(self.directory, f"user-{uid}")).st_mtime
+        except FileNotFoundError:
+            return 0
+
+
+revoked = pick_store("SESSION_REVOCATION_DIR", "sessions", MemoryRevocations, FileRevocations)
+
+
+class InvalidSession(Exception):
+    """A bearer token that must be refused; the message is for the client."""
+
+
+def _serializer(secret_key=None):
+    return URLSafeTimedSerializer(secret_key or current_app.secret_key, salt="session")
+
+
+def issue_token(user):
+    return _serializer().dumps({
+        "uid": str(user.id),
+        "role": user.role,
+        "name": user.name,
+        "iat": time.time(),  # finer than the signature's whole-second timestamp
+        "jti": uuid.uuid4().hex,
+    })
+
+
+def verify_header(header, secret_key=None):
+    """Claims of an Authorization header value; None when it has no bearer token.
+
+    Raises InvalidSession for an expired, forged, logged-out or revoked token.
+    """
+    if not header.startswith("Bearer "):
+        return None
+    try:
+        claims, issued = _serializer(secret_key).loads(
+            header[len("Bearer "):], max_age=TOKEN_MAX_AGE, return_timestamp=True
+        )
+    except SignatureExpired:
+        raise InvalidSession("Session expired")
+    except BadSignature:
+        raise InvalidSession("Invalid session token")
+
+    if claims["jti"] in revoked:
+        raise InvalidSession("Session has been logged out")
+    if claims.get("iat", issued.timestamp()) <= revoked.user_cutoff(claims["uid"]):
+        raise InvalidSession("Session has been revoked, please log in again")
+
+    claims["exp"] = issued.timestamp() + TOKEN_MAX_AGE
+    return claims
+
+
+def load_session():
+    """before_request hook: verify the bearer token, if any, into g.session."""
+    g.session = None
+    if request.method == "OPTIONS":
+        return None
+    try:
+        g.session = verify_header(request.headers.get("Authorization", ""))
+    except InvalidSession as e:
+        return jsonify({"success": False, "message": str(e)}), 401
+    return None
+
+
+def _refused(message, status):
+    # Clients of the user routes read "message", the others "error"
+    return jsonify({"success": False, "error": message, "message": message}), status
+
+
+def require_session(*roles):
+    """Decorator: 401 without a session, 403 unless its role is in `roles` (any role if none)."""
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            if request.method == "OPTIONS":
+                return view(*args, **kwargs)
+            session = g.get("session")
+            if not session:
+                return _refused("Please sign in", 401)
+            if roles and session["role"] not in roles:
+                return _refused("Not allowed", 403)
+            return view(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def acts_for(user_id):
+    """True when the current session is `user_id`'s own, or an admin's."""
+    session = g.get("session")
+    return bool(session) and (session["uid"] == str(user_id) or session["role"] == "admin")
+
+
+def forbidden():
+    return _refused("Not allowed", 403)
+
+
+def revoke_current():
+    session = g.get("session")
+    if session:
+        revoked.add(session["jti"], session["exp"])
+
+
+def revoke_user(user_id):
+    """Void every token issued to `user_id` so far."""
+    revoked.revoke_user(str(user_id), time.time())
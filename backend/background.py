@@ -0,0 +1,33 @@
+"""Background threads owned by module-level singletons.
+
+Threads do not survive a fork, and a gunicorn master may import the app
+before forking its workers, so the rush queue, check-in desk and job runner
+start their threads lazily, once in each process that uses them.
+"""
+import os
+import threading
+
+
+class PerProcess:
+    """Calls `start` once in each process that calls `ensure`."""
+
+    def __init__(self, start):
+        self._start = start
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def ensure(self):
+        if self._pid != os.getpid():
+            with self._lock:
+                if self._pid != os.getpid():
+                    self._pid = os.getpid()
+                    self._start()
+
+    @property
+    def started(self):
+        """True once `start` ran in this process."""
+        return self._pid == os.getpid()
+
+
+def start_thread(target, name):
+    threading.Thread(target=target, name=name, daemon=True).start()
@@ -0,0 +1,3 @@
+"""Local benchmarks for the API. Run modules with `python -m benchmarks.<name>`
+from the backend directory against a local mongod (`benchmarks.run` can also
+use mongomock)."""
@@ -0,0 +1,93 @@
+"""Concurrency benchmark: threaded WSGI vs the async ASGI entry point.
+
+Start both servers against the same local mongod, then point this at them:
+
+    gunicorn -w 4 --threads 8 -b :5000 app:app
+    uvicorn asgi:app --workers 4 --port 5001
+    python -m benchmarks.asgi_concurrency --url http://localhost:5000 --url http://localhost:5001
+
+For each concurrency level it keeps that many requests in flight for
+--duration seconds (a read-heavy mix of the catalogue plus registrations
+against the event with the most free seats) and prints throughput, latency
+percentiles and error counts. Needs `httpx`.
+"""
+import argparse
+import asyncio
+import random
+import statistics
+import time
+import uuid
+
+import httpx
+
+from benchmarks.report import percentile
+
+
+async def pick_event(client):
+    events = (await client.get("/api/student/all-events")).json()["events"]
+    if not events:
+        raise SystemExit("No events in the database; seed some first")
+    return max(events, key=lambda e: e["max_participants"] - e["registrations_count"])["id"]
+
+
+async def one_request(client, event_id, write_ratio):
+    if random.random() < write_ratio:
+        tag = uuid.uuid4().hex[:12]
+        return await client.post("/api/registrations/register", json={
+            "event_id": event_id, "name": f"Bench {tag}", "email": f"{tag}@bench.local"
+        })
+    return await client.get("/api/student/all-events")
+
+
+async def run_level(base_url, concurrency, duration, write_ratio):
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=30) as client:
+        event_id = await pick_event(client)
+        latencies, errors = [], 0
+        deadline = time.perf_counter() + duration
+
+        async def worker():
+            nonlocal errors
+            while time.perf_counter() < deadline:
+                start = time.perf_counter()
+                try:
+                    resp = await one_request(client, event_id, write_ratio)
+                    # 409 (full / duplicate) is a valid answer under load
+                    if resp.status_code >= 500:
+                        errors += 1
+                except httpx.HTTPError:
+                    errors += 1
+                latencies.append((time.perf_counter() - start) * 1000)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    return {
+        "rps": len(latencies) / elapsed,
+        "p50": statistics.median(latencies) if latencies else 0.0,
+        "p95": percentile(latencies, 95),
+        "p99": percentile(latencies, 99),
+        "errors": errors,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", action="append", required=True, help="server base URL (repeatable)")
+    parser.add_argument("--levels", default="25,50,100,200,400")
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds per level")
+    parser.add_argument("--write-ratio", type=float, default=0.1)
+    args = parser.parse_args()
+
+    levels = [int(x) for x in args.levels.split(",")]
+    print(f"{'server':<28}{'conc':>6}{'req/s':>10}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'errors':>8}")
+    for url in args.url:
+        for level in levels:
+            r = asyncio.run(run_level(url, level, args.duration, args.write_ratio))
+            print(f"{url:<28}{level:>6}{r['rps']:>10.0f}{r['p50']:>9.1f}"
+                  f"{r['p95']:>9.1f}{r['p99']:>9.1f}{r['errors']:>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,439 @@
+"""In-process load driver for every blueprint.
+
+Requests go through Flask's test client, one client per worker thread, so
+the numbers cover routing, serialization and MongoDB access without any
+HTTP server in between. Each request is timed under its route template
+(e.g. "GET /api/events/<id>") so runs can be compared route by route.
+"""
+import random
+import threading
+import time
+import uuid
+from datetime import datetime
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.report import percentile
+from benchmarks.seed import BENCH_PASSWORD, DEPARTMENTS
+from auth import issue_token
+from checkin import checkin_desk
+from models import Event, EventRegistration, Participant, User
+from rush import rush_queue
+
+
+class Recorder:
+    """Thread-safe latency (ms) and error samples per route."""
+
+    def __init__(self):
+        self.samples = defaultdict(list)
+        self.errors = defaultdict(int)
+        self._lock = threading.Lock()
+
+    def add(self, route, ms, status):
+        with self._lock:
+            self.samples[route].append(ms)
+            # 4xx answers (full event, duplicate, clash) are valid under load;
+            # a refused session means the driver sent the wrong user
+            if status >= 500 or status in (401, 403):
+                self.errors[route] += 1
+
+
+def _unique():
+    return uuid.uuid4().hex[:12]
+
+
+def _take(ctx, rng, key):
+    """A seeded id for a delete; each is handed out once, so deletes hit live rows."""
+    try:
+        return ctx["deletable"][key].pop()
+    except IndexError:
+        return rng.choice(ctx[key])
+
+
+# -------------------------
+# Request mix: (route label, weight, request builder)
+# Builders return (method, url, json body or None, id of the user to act
+# as or None); routes that check the session get that user's token
+# -------------------------
+def _all_events(ctx, rng):
+    return "GET", "/api/student/all-events", None, None
+
+
+def _filtered_events(ctx, rng):
+    category = rng.choice(("Technical", "Cultural", "Sports", "Workshop", "Seminar"))
+    return "GET", f"/api/student/all-events?category={category}&upcoming=1&limit=20", None, None
+
+
+def _event(ctx, rng):
+    return "GET", f"/api/events/{rng.choice(ctx['event_ids'])}", None, None
+
+
+def _organizer_events(ctx, rng):
+    organizer = rng.choice(ctx["organizer_ids"])
+    return "GET", f"/api/events/organizer/{organizer}", None, organizer
+
+
+def _create_event(ctx, rng):
+    hour = rng.randint(8, 20)
+    organizer = rng.choice(ctx["organizer_ids"])
+    return "POST", "/api/events/", {
+        "organizer_id": str(organizer),
+        "title": f"Load {_unique()}",
+        "venue_id": str(rng.choice(ctx["venue_ids"])),
+        "date": rng.choice(ctx["event_dates"]),
+        "start_time": f"{hour:02d}:00",
+        "end_time": f"{hour:02d}:45",
+        "max_participants": 100,
+        "category": "Workshop",
+        "image_url": "https://bench.local/event.png",
+    }, organizer
+
+
+def _update_event(ctx, rng):
+    event = rng.choice(ctx["event_ids"])
+    return "PUT", f"/api/events/{event}", {
+        "description": f"Updated {_unique()}", "status": rng.choice(("Green", "Yellow")),
+    }, ctx["event_organizers"][event]
+
+
+def _venues(ctx, rng):
+    return "GET", "/api/venues/", None, None
+
+
+def _availability(ctx, rng):
+    venue = rng.choice(ctx["venue_ids"])
+    return "GET", f"/api/venues/{venue}/availability?date={rng.choice(ctx['event_dates'])}", None, None
+
+
+def _add_venue(ctx, rng):
+    return "POST", "/api/venues/", {"venue_name": f"Hall {_unique()}", "venue_description": "Load"}, ctx["admin_id"]
+
+
+def _register(ctx, rng):
+    tag = _unique()
+    return "POST", "/api/registrations/register", {
+        "event_id": str(rng.choice(ctx["event_ids"])),
+        "name": f"Load {tag}", "email": f"{tag}@bench.local", "department": "CSE",
+    }, None
+
+
+def _participants(ctx, rng):
+    return "GET", f"/api/registrations/participants?event_id={rng.choice(ctx['event_ids'])}", None, None
+
+
+def _registrations(ctx, rng):
+    return "GET", f"/api/registrations/?event_id={rng.choice(ctx['event_ids'])}&limit=50", None, None
+
+
+def _search_participants(ctx, rng):
+    return "GET", f"/api/registrations/participants/search?q=participant%20{rng.randrange(100)}", None, None
+
+
+def _export(ctx, rng):
+    return ("GET", f"/api/registrations/export?event_id={rng.choice(ctx['event_ids'])}", None,
+            rng.choice(ctx["organizer_ids"]))
+
+
+def _update_registration(ctx, rng):
+    return "PUT", f"/api/registrations/{rng.choice(ctx['registration_ids'])}", {
+        "status": rng.choice(("Registered", "Registered", "Cancelled")), "team_name": f"Team {rng.randrange(50)}",
+    }, None
+
+
+def _delete_registration(ctx, rng):
+    return "DELETE", f"/api/registrations/{_take(ctx, rng, 'registration_ids')}", None, None
+
+
+def _update_participant(ctx, rng):
+    return "PUT", f"/api/registrations/participants/{rng.choice(ctx['participant_ids'])}", {
+        "phone": f"9{rng.randrange(10 ** 9):09d}", "department": rng.choice(DEPARTMENTS),
+    }, None
+
+
+def _delete_participant(ctx, rng):
+    return "DELETE", f"/api/registrations/participants/{_take(ctx, rng, 'participant_ids')}", None, None
+
+
+def _door(ctx, rng):
+    """An event with registrations, and its organizer."""
+    event = rng.choice(list(ctx["rosters"]))
+    return event, ctx["event_organizers"][event]
+
+
+def _load_roster(ctx, rng):
+    event, organizer = _door(ctx, rng)
+    return "POST", f"/api/checkin/{event}/roster", None, organizer
+
+
+def _checkin_summary(ctx, rng):
+    event, organizer = _door(ctx, rng)
+    return "GET", f"/api/checkin/{event}", None, organizer
+
+
+def _check_in(ctx, rng):
+    event, organizer = _door(ctx, rng)
+    return "POST", f"/api/checkin/{event}", {"code": str(rng.choice(ctx["rosters"][event]))}, organizer
+
+
+def _check_in_batch(ctx, rng):
+    event, organizer = _door(ctx, rng)
+    codes = ctx["rosters"][event]
+    return "POST", f"/api/checkin/{event}/batch", {
+        "checkins": [str(c) for c in rng.sample(codes, min(len(codes), 20))],
+    }, organizer
+
+
+def _registered_events(ctx, rng):
+    student = rng.choice(ctx["student_ids"])
+    return "GET", f"/api/student/registered-events/{student}", None, student
+
+
+def _profile(ctx, rng):
+    student = rng.choice(ctx["student_ids"])
+    return "PUT", f"/api/student/profile/{student}", {
+        "phone_number": f"9{rng.randrange(10 ** 9):09d}"
+    }, student
+
+
+def _users(ctx, rng):
+    return "GET", "/api/users?limit=50", None, ctx["admin_id"]
+
+
+def _search_users(ctx, rng):
+    return "GET", f"/api/users/search?q=user%20{rng.randrange(100)}", None, ctx["admin_id"]
+
+
+def _user(ctx, rng):
+    user = rng.choice(ctx["user_ids"])
+    return "GET", f"/api/users/{user}", None, user
+
+
+def _edit_user(ctx, rng):
+    user = rng.choice(ctx["student_ids"])
+    return "PUT", f"/api/users/{user}", {"phone_number": f"9{rng.randrange(10 ** 9):09d}"}, user
+
+
+def _login(ctx, rng):
+    return "POST", "/api/login", {"email": rng.choice(ctx["user_emails"]), "password": BENCH_PASSWORD}, None
+
+
+def _signup(ctx, rng):
+    tag = _unique()
+    return "POST", "/api/signup", {
+        "reg_no": f"NEW{tag}", "name": f"New {tag}", "email": f"{tag}@new.bench.local",
+        "password": BENCH_PASSWORD, "role": "student", "department": "CSE", "year": "1st year",
+    }, None
+
+
+# Read-heavy, roughly what the student and organizer pages issue
+MIX = [
+    ("GET /api/student/all-events", 20, _all_events),
+    ("GET /api/student/all-events?filters", 6, _filtered_events),
+    ("GET /api/events/<id>", 10, _event),
+    ("GET /api/events/organizer/<id>", 4, _organizer_events),
+    ("POST /api/events/", 1, _create_event),
+    ("PUT /api/events/<id>", 1, _update_event),
+    ("GET /api/venues/", 5, _venues),
+    ("GET /api/venues/<id>/availability", 3, _availability),
+    ("POST /api/venues/", 0.5, _add_venue),
+    ("POST /api/registrations/register", 10, _register),
+    ("GET /api/registrations/participants", 6, _participants),
+    ("GET /api/registrations/?limit", 4, _registrations),
+    ("GET /api/registrations/participants/search", 3, _search_participants),
+    ("GET /api/registrations/export", 1, _export),
+    ("PUT /api/registrations/<id>", 2, _update_registration),
+    ("DELETE /api/registrations/<id>", 1, _delete_registration),
+    ("PUT /api/registrations/participants/<id>", 1, _update_participant),
+    ("DELETE /api/registrations/participants/<id>", 0.5, _delete_participant),
+    ("POST /api/checkin/<id>/roster", 0.5, _load_roster),
+    ("GET /api/checkin/<id>", 1, _checkin_summary),
+    ("POST /api/checkin/<id>", 4, _check_in),
+    ("POST /api/checkin/<id>/batch", 1, _check_in_batch),
+    ("GET /api/student/registered-events/<id>", 8, _registered_events),
+    ("PUT /api/student/profile/<id>", 2, _profile),
+    ("GET /api/users?limit", 2, _users),
+    ("GET /api/users/<id>", 3, _user),
+    ("PUT /api/users/<id>", 1, _edit_user),
+    ("GET /api/users/search", 1, _search_users),
+    ("POST /api/login", 2, _login),
+    ("POST /api/signup", 0.5, _signup),
+]
+
+
+def session_tokens(app, ctx):
+    """A session token for every seeded user, issued once before the run."""
+    with app.app_context():
+        return {u.id: issue_token(u) for u in User.objects(id__in=ctx["user_ids"]).only("role", "name")}
+
+
+def _send(client, method, url, body, token=None):
+    headers = {"Authorization": f"Bearer {token}"} if token else None
+    resp = client.open(url, method=method, json=body, headers=headers)
+    # Drain streamed bodies (export) so their cost is part of the sample
+    resp.get_data()
+    return resp.status_code
+
+
+def run_mix(app, ctx, requests=2000, concurrency=8, seed=42, recorder=None):
+    """Issue `requests` weighted requests from `concurrency` threads."""
+    recorder = recorder or Recorder()
+    labels = [m[0] for m in MIX]
+    weights = [m[1] for m in MIX]
+    builders = {m[0]: m[2] for m in MIX}
+    tokens = session_tokens(app, ctx)
+    share, extra = divmod(requests, concurrency)
+    deletable = {key: list(ctx[key]) for key in ("registration_ids", "participant_ids")}
+    for ids in deletable.values():
+        random.Random(seed).shuffle(ids)
+    ctx = {**ctx, "deletable": deletable}
+
+    def worker(n, worker_seed):
+        rng = random.Random(worker_seed)
+        client = app.test_client()
+        for label in rng.choices(labels, weights, k=n):
+            method, url, body, user = builders[label](ctx, rng)
+            start = time.perf_counter()
+            status = _send(client, method, url, body, tokens.get(user))
+            recorder.add(label, (time.perf_counter() - start) * 1000, status)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as pool:
+        jobs = [pool.submit(worker, share + (i < extra), seed * 1000 + i) for i in range(concurrency)]
+        for job in jobs:
+            job.result()
+    return recorder, time.perf_counter() - started
+
+
+# -------------------------
+# "Registration opens": everyone hits one event at the same moment
+# -------------------------
+def run_burst(app, ctx, clients=200, capacity=100, seed=42):
+    """Release `clients` simultaneous registrations against a fresh event.
+
+    Returns the outcome counts and whether the seat invariant held: the
+    event's registrations_count must equal the stored registrations and
+    never exceed its capacity.
+    """
+    rng = random.Random(seed)
+    event = Event(
+        organizer_id=rng.choice(ctx["organizer_ids"]),
+        title=f"Burst {_unique()}",
+        venue_id=rng.choice(ctx["venue_ids"]),
+        venue="Burst hall",
+        date="2099-01-01", start_time="09:00", end_time="10:00",
+        max_participants=capacity,
+    )
+    event.save()
+
+    barrier = threading.Barrier(clients)
+    statuses = defaultdict(int)
+    latencies = []
+    lock = threading.Lock()
+
+    def worker(i):
+        client = app.test_client()
+        body = {"event_id": str(event.id), "name": f"Burst {i}", "email": f"burst{i}-{event.id}@bench.local"}
+        barrier.wait()
+        start = time.perf_counter()
+        status = _send(client, "POST", "/api/registrations/register", body)
+        ms = (time.perf_counter() - start) * 1000
+        with lock:
+            statuses[status] += 1
+            latencies.append(ms)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(clients) as pool:
+        for job in [pool.submit(worker, i) for i in range(clients)]:
+            job.result()
+    elapsed = time.perf_counter() - started
+
+    if app.config["RUSH_MODE"]:
+        # Let the write-behind queue land everything before checking seats
+        rush_queue.flush()
+        rush_queue.return_seats()
+
+    count = Event.objects(id=event.id).scalar("registrations_count").first()
+    stored = EventRegistration.objects(event_id=event.id).count()
+    return {
+        "clients": clients,
+        "capacity": capacity,
+        "seconds": round(elapsed, 3),
+        "p50": round(percentile(latencies, 50), 3),
+        "p95": round(percentile(latencies, 95), 3),
+        "p99": round(percentile(latencies, 99), 3),
+        "statuses": {str(k): v for k, v in sorted(statuses.items())},
+        "registrations_count": count,
+        "stored_registrations": stored,
+        "consistent": count == stored == min(clients, capacity),
+    }
+
+
+# -------------------------
+# "Doors open": every attendee of one event is scanned at the same moment
+# -------------------------
+def run_checkin_burst(app, ctx, clients=200, seed=42):
+    """Check `clients` attendees of a fresh event in simultaneously.
+
+    Each scanner sends one attendee's registration id. The run is
+    consistent when every scan is answered "checked_in" and, once the
+    desk has flushed, MongoDB holds exactly that many Attended rows.
+    """
+    rng = random.Random(seed)
+    organizer = rng.choice(ctx["organizer_ids"])
+    event = Event(
+        organizer_id=organizer,
+        title=f"Doors {_unique()}",
+        venue_id=rng.choice(ctx["venue_ids"]),
+        venue="Door hall",
+        date="2099-01-02", start_time="09:00", end_time="10:00",
+        max_participants=clients, registrations_count=clients,
+    )
+    event.save()
+    people = Participant._get_collection().insert_many([{
+        "name": f"Door {i}", "email": f"door{i}-{event.id}@bench.local", "reg_no": f"DOOR{i}",
+    } for i in range(clients)]).inserted_ids
+    regs = EventRegistration._get_collection().insert_many([{
+        "event_id": event.id, "participant_id": pid, "status": "Registered",
+        "registration_time": datetime.utcnow(),
+    } for pid in people]).inserted_ids
+
+    # Organizers preload the roster before doors open, as the check-in page does
+    token = session_tokens(app, {"user_ids": [organizer]})[organizer]
+    _send(app.test_client(), "POST", f"/api/checkin/{event.id}/roster", None, token)
+
+    barrier = threading.Barrier(clients)
+    statuses = defaultdict(int)
+    results = defaultdict(int)
+    latencies = []
+    lock = threading.Lock()
+
+    def worker(i):
+        client = app.test_client()
+        barrier.wait()
+        start = time.perf_counter()
+        resp = client.post(f"/api/checkin/{event.id}", json={"code": str(regs[i])},
+                           headers={"Authorization": f"Bearer {token}"})
+        ms = (time.perf_counter() - start) * 1000
+        with lock:
+            statuses[resp.status_code] += 1
+            results[(resp.get_json() or {}).get("result")] += 1
+            latencies.append(ms)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(clients) as pool:
+        for job in [pool.submit(worker, i) for i in range(clients)]:
+            job.result()
+    elapsed = time.perf_counter() - started
+
+    checkin_desk.flush()
+    attended = EventRegistration.objects(event_id=event.id, status="Attended").count()
+    return {
+        "clients": clients,
+        "seconds": round(elapsed, 3),
+        "p50": round(percentile(latencies, 50), 3),
+        "p95": round(percentile(latencies, 95), 3),
+        "p99": round(percentile(latencies, 99), 3),
+        "statuses": {str(k): v for k, v in sorted(statuses.items())},
+        "attended": attended,
+        "consistent": results["checked_in"] == attended == clients,
+    }
@@ -0,0 +1,110 @@
+"""Latency/throughput summaries, JSON baselines and run-to-run diffs."""
+import json
+import statistics
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+
+def summarize(recorder, elapsed, meta=None, burst=None, checkin_burst=None):
+    """Build the report dict: per-route count/errors/mean/p50/p95/p99/rps."""
+    routes = {}
+    for route, samples in sorted(recorder.samples.items()):
+        routes[route] = {
+            "count": len(samples),
+            "errors": recorder.errors.get(route, 0),
+            "mean": round(statistics.fmean(samples), 3),
+            "p50": round(percentile(samples, 50), 3),
+            "p95": round(percentile(samples, 95), 3),
+            "p99": round(percentile(samples, 99), 3),
+            "rps": round(len(samples) / elapsed, 1) if elapsed else 0.0,
+        }
+    total = sum(r["count"] for r in routes.values())
+    return {
+        "meta": meta or {},
+        "elapsed": round(elapsed, 3),
+        "throughput": round(total / elapsed, 1) if elapsed else 0.0,
+        "routes": routes,
+        "burst": burst,
+        "checkin_burst": checkin_burst,
+    }
+
+
+def save(report, path):
+    with open(path, "w") as f:
+        json.dump(report, f, indent=2, sort_keys=True)
+
+
+def load(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def format_report(report):
+    lines = [f"{'route':<44}{'count':>7}{'err':>5}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'req/s':>8}"]
+    for route, r in report["routes"].items():
+        lines.append(f"{route:<44}{r['count']:>7}{r['errors']:>5}{r['p50']:>9.2f}"
+                     f"{r['p95']:>9.2f}{r['p99']:>9.2f}{r['rps']:>8.1f}")
+    lines.append(f"mix throughput: {report['throughput']:.1f} req/s over {report['elapsed']:.1f}s")
+    burst = report.get("burst")
+    if burst:
+        lines.append(
+            f"burst: {burst['clients']} clients / {burst['capacity']} seats in {burst['seconds']}s, "
+            f"p50 {burst['p50']:.2f} / p95 {burst['p95']:.2f} / p99 {burst['p99']:.2f} ms, "
+            f"statuses {burst['statuses']}, count {burst['registrations_count']}, "
+            f"stored {burst['stored_registrations']}, "
+            f"{'consistent' if burst['consistent'] else 'INCONSISTENT'}"
+        )
+    doors = report.get("checkin_burst")
+    if doors:
+        lines.append(
+            f"check-in burst: {doors['clients']} scanners in {doors['seconds']}s, "
+            f"p50 {doors['p50']:.2f} / p95 {doors['p95']:.2f} / p99 {doors['p99']:.2f} ms, "
+            f"statuses {doors['statuses']}, attended {doors['attended']}, "
+            f"{'consistent' if doors['consistent'] else 'INCONSISTENT'}"
+        )
+    return "\n".join(lines)
+
+
+def compare(baseline, current, threshold=10.0, metric="p95", min_count=20):
+    """Diff two reports route by route.
+
+    Returns (lines, regressions); a regression is a route whose `metric`
+    grew by more than `threshold` percent, or which started failing.
+    Routes with fewer than `min_count` samples in either run are shown but
+    never flagged; their tail percentiles are noise.
+    """
+    lines = [f"{'route':<44}{'base':>9}{'now':>9}{'change':>9}"]
+    regressions = []
+    for route, now in current["routes"].items():
+        base = baseline["routes"].get(route)
+        if not base:
+            lines.append(f"{route:<44}{'-':>9}{now[metric]:>9.2f}{'new':>9}")
+            continue
+        change = (now[metric] - base[metric]) / base[metric] * 100 if base[metric] else 0.0
+        flag = ""
+        noisy = min(now["count"], base["count"]) < min_count
+        if (change > threshold and not noisy) or now["errors"] > base["errors"]:
+            regressions.append(route)
+            flag = "  <-- regression"
+        lines.append(f"{route:<44}{base[metric]:>9.2f}{now[metric]:>9.2f}{change:>+8.1f}%{flag}")
+    for route in baseline["routes"].keys() - current["routes"].keys():
+        lines.append(f"{route:<44}{baseline['routes'][route][metric]:>9.2f}{'-':>9}{'gone':>9}")
+    for key, label in (("burst", "burst register"), ("checkin_burst", "burst check-in")):
+        if not (baseline.get(key) and current.get(key)):
+            continue
+        base, now = baseline[key][metric], current[key][metric]
+        change = (now - base) / base * 100 if base else 0.0
+        flag = ""
+        if change > threshold or not current[key]["consistent"]:
+            regressions.append(key)
+            flag = "  <-- regression"
+        lines.append(f"{label:<44}{base:>9.2f}{now:>9.2f}{change:>+8.1f}%{flag}")
+    if baseline.get("throughput"):
+        change = (current["throughput"] - baseline["throughput"]) / baseline["throughput"] * 100
+        lines.append(f"mix throughput: {baseline['throughput']:.1f} -> {current['throughput']:.1f} req/s ({change:+.1f}%)")
+    return lines, regressions
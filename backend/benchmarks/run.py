@@ -0,0 +1,99 @@
+"""Endpoint load benchmark: seed, drive every blueprint, report.
+
+Runs entirely in-process, against mongomock or a local mongod:
+
+    python -m benchmarks.run --mongomock --registrations 20000
+    MONGODB_URI=mongodb://localhost:27017/bench MONGODB_DB=bench \\
+        python -m benchmarks.run --registrations 100000 --save baseline.json
+    python -m benchmarks.run --registrations 100000 --compare baseline.json
+
+The target database is wiped and reseeded, so never point it at real data.
+--compare exits non-zero if any route's p95 regressed past --threshold.
+mongomock numbers are only comparable with other mongomock runs.
+"""
+import argparse
+import os
+import platform
+import secrets
+import sys
+from datetime import datetime
+
+from app import create_app
+from database import mongomock_client
+from benchmarks import load, report
+from benchmarks.seed import DEFAULT_SIZES, seed
+from indexes import sync_indexes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--mongomock", action="store_true", help="use an in-memory mongomock client")
+    parser.add_argument("--rush", action="store_true", help="run with RUSH_MODE (write-behind registrations)")
+    for name, default in DEFAULT_SIZES.items():
+        parser.add_argument(f"--{name}", type=int, default=default)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--requests", type=int, default=2000, help="requests in the mixed phase")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--burst-clients", type=int, default=200)
+    parser.add_argument("--burst-capacity", type=int, default=100)
+    parser.add_argument("--checkin-clients", type=int, default=200, help="scanners in the check-in burst")
+    parser.add_argument("--save", metavar="PATH", help="write the report as a JSON baseline")
+    parser.add_argument("--compare", metavar="PATH", help="diff against a saved baseline")
+    parser.add_argument("--threshold", type=float, default=10.0, help="p95 regression threshold, %%")
+    args = parser.parse_args()
+
+    config = {"RUSH_MODE": True} if args.rush else {}
+    # The load generator is one client hammering login/register on purpose
+    config["RATE_LIMIT_ENABLED"] = False
+    config["SECRET_KEY"] = os.environ.get("SECRET_KEY") or secrets.token_hex(32)
+    if args.mongomock:
+        config["MONGO_CLIENT_CLASS"] = mongomock_client()
+    app = create_app(config)
+
+    sizes = {name: getattr(args, name) for name in DEFAULT_SIZES}
+    print(f"Seeding {sizes} ...")
+    started = datetime.now()
+    ctx = seed(sizes, seed=args.seed)
+    if not args.mongomock:
+        sync_indexes(log=lambda msg: None)
+    print(f"Seeded in {(datetime.now() - started).total_seconds():.1f}s")
+
+    print(f"Mixed load: {args.requests} requests, {args.concurrency} threads ...")
+    recorder, elapsed = load.run_mix(app, ctx, args.requests, args.concurrency, args.seed)
+    print(f"Burst: {args.burst_clients} clients for {args.burst_capacity} seats ...")
+    burst = load.run_burst(app, ctx, args.burst_clients, args.burst_capacity, args.seed)
+    print(f"Check-in burst: {args.checkin_clients} scanners at one door ...")
+    doors = load.run_checkin_burst(app, ctx, args.checkin_clients, args.seed)
+
+    meta = {
+        "when": datetime.now().isoformat(timespec="seconds"),
+        "backend": "mongomock" if args.mongomock else app.config["MONGODB_URI"],
+        "python": platform.python_version(),
+        "sizes": sizes,
+        "seed": args.seed,
+        "rush_mode": app.config["RUSH_MODE"],
+        "requests": args.requests,
+        "concurrency": args.concurrency,
+    }
+    result = report.summarize(recorder, elapsed, meta, burst, doors)
+    print()
+    print(report.format_report(result))
+
+    if args.save:
+        report.save(result, args.save)
+        print(f"\nSaved to {args.save}")
+
+    failed = not (burst["consistent"] and doors["consistent"])
+    if args.compare:
+        baseline = report.load(args.compare)
+        if baseline["meta"].get("backend") != meta["backend"]:
+            print(f"\nWarning: baseline ran against {baseline['meta'].get('backend')}")
+        lines, regressions = report.compare(baseline, result, args.threshold)
+        print()
+        print("\n".join(lines))
+        failed = failed or bool(regressions)
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
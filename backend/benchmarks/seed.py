@@ -0,0 +1,169 @@
+"""Seeded synthetic dataset for benchmarks.
+
+Writes Users, Venues, Events, Participants and EventRegistrations straight
+through the pymongo collections in bulk, so 100k registrations take seconds
+rather than minutes. The same seed always produces the same data shape.
+"""
+import random
+from datetime import datetime, timedelta
+
+from werkzeug.security import generate_password_hash
+
+from models import User, Venue, Event, Participant, EventRegistration, search_keys
+
+DEFAULT_SIZES = {
+    "users": 500,
+    "venues": 20,
+    "events": 200,
+    "participants": 5000,
+    "registrations": 20000,
+}
+BENCH_PASSWORD = "bench-password"
+
+DEPARTMENTS = ("CSE", "ECE", "EEE", "MECH", "CIVIL", "IT")
+CATEGORIES = ("Technical", "Cultural", "Sports", "Workshop", "Seminar")
+YEARS = ("1st year", "2nd year", "3rd year", "4th year")
+
+
+def _insert(document, docs, chunk=5000):
+    collection = document._get_collection()
+    ids = []
+    for i in range(0, len(docs), chunk):
+        ids.extend(collection.insert_many(docs[i:i + chunk], ordered=False).inserted_ids)
+    return ids
+
+
+def seed(sizes=None, seed=42, drop=True):
+    """Create the dataset and return the ids the load driver samples from."""
+    sizes = {**DEFAULT_SIZES, **(sizes or {})}
+    rng = random.Random(seed)
+    now = datetime.utcnow().replace(microsecond=0)
+
+    if drop:
+        for document in (User, Venue, Event, Participant, EventRegistration):
+            document._get_collection().delete_many({})
+
+    # One hash for everyone: PBKDF2 per user would dominate seeding time
+    password = generate_password_hash(BENCH_PASSWORD)
+    users = [{
+        "reg_no": f"REG{i:06d}",
+        "name": f"User {i}",
+        "email": f"user{i}@bench.local",
+        "password": password,
+        # user 0 administers; the admin-only routes act as them
+        "role": "admin" if i == 0 else "organizer" if i % 10 == 0 else "student",
+        "department": rng.choice(DEPARTMENTS),
+        "year": rng.randint(1, 4),
+        "created_at": now,
+    } for i in range(sizes["users"])]
+    for u in users:
+        u["search_keys"] = search_keys(u["name"], u["email"], u["reg_no"])
+    user_ids = _insert(User, users)
+    organizer_ids = [uid for uid, u in zip(user_ids, users) if u["role"] == "organizer"]
+
+    venues = [{
+        "venue_name": f"Hall {i}",
+        "venue_description": f"Benchmark hall {i}",
+        "created_at": now,
+        "updated_at": now,
+    } for i in range(sizes["venues"])]
+    venue_ids = _insert(Venue, venues)
+
+    events = []
+    for i in range(sizes["events"]):
+        day = now.date() + timedelta(days=rng.randint(-60, 120))
+        hour = rng.randint(8, 18)
+        starts_at = datetime(day.year, day.month, day.day, hour)
+        venue = rng.randrange(len(venue_ids))
+        events.append({
+            "organizer_id": rng.choice(organizer_ids),
+            "title": f"Event {i}",
+            "description": "Synthetic benchmark event. " * 10,
+            "category": rng.choice(CATEGORIES),
+            "venue_id": venue_ids[venue],
+            "venue": venues[venue]["venue_name"],
+            "date": day.isoformat(),
+            "start_time": f"{hour:02d}:00",
+            "end_time": f"{hour + 1:02d}:00",
+            "starts_at": starts_at,
+            "ends_at": starts_at + timedelta(hours=1),
+            "max_participants": rng.choice((50, 100, 200, 500, 1000)),
+            "registrations_count": 0,
+            "status": "Green",
+            "created_at": now,
+            "updated_at": now,
+        })
+    event_ids = _insert(Event, events)
+
+    # The first participants mirror users, so registered-events has data
+    participants = [{
+        **({"user_id": user_ids[i]} if i < len(users) else {}),
+        "name": f"User {i}" if i < len(users) else f"Participant {i}",
+        "email": users[i]["email"] if i < len(users) else f"p{i}@bench.local",
+        "phone": f"9{i:09d}",
+        "reg_no": f"REG{i:06d}",
+        "department": rng.choice(DEPARTMENTS),
+        "year": rng.choice(YEARS),
+        "created_at": now,
+    } for i in range(sizes["participants"])]
+    for p in participants:
+        p["search_keys"] = search_keys(p["name"], p["email"], p["reg_no"])
+    participant_ids = _insert(Participant, participants)
+
+    # Unique (event, participant) pairs, never beyond an event's capacity
+    counts = [0] * len(event_ids)
+    pairs = set()
+    attempts = 0
+    target = min(sizes["registrations"], sum(e["max_participants"] for e in events))
+    while len(pairs) < target and attempts < target * 5:
+        attempts += 1
+        e = rng.randrange(len(event_ids))
+        if counts[e] >= events[e]["max_participants"]:
+            continue
+        pair = (e, rng.randrange(len(participant_ids)))
+        if pair not in pairs:
+            pairs.add(pair)
+            counts[e] += 1
+
+    registrations = [{
+        "event_id": event_ids[e],
+        "participant_id": participant_ids[p],
+        "registration_time": now - timedelta(seconds=rng.randint(0, 86400 * 30)),
+        "status": rng.choice(("Registered",) * 8 + ("Attended", "Cancelled")),
+    } for e, p in pairs]
+    registration_ids = _insert(EventRegistration, registrations)
+
+    # registrations_count counts seat-holding rows only, as the routes do
+    seated = [0] * len(event_ids)
+    index = {eid: i for i, eid in enumerate(event_ids)}
+    for r in registrations:
+        if r["status"] != "Cancelled":
+            seated[index[r["event_id"]]] += 1
+    events_collection = Event._get_collection()
+    for eid, count in zip(event_ids, seated):
+        if count:
+            events_collection.update_one({"_id": eid}, {"$set": {"registrations_count": count}})
+
+    return {
+        "sizes": sizes,
+        "user_ids": user_ids,
+        "admin_id": user_ids[0],
+        "student_ids": [uid for uid, u in zip(user_ids, users) if u["role"] == "student"],
+        "organizer_ids": organizer_ids,
+        "user_emails": [u["email"] for u in users],
+        "venue_ids": venue_ids,
+        "event_ids": event_ids,
+        "event_dates": [e["date"] for e in events],
+        "event_organizers": {eid: e["organizer_id"] for eid, e in zip(event_ids, events)},
+        "participant_ids": participant_ids,
+        "registration_ids": registration_ids,
+        # Each event's registrations, for the check-in routes
+        "rosters": _rosters(registration_ids, registrations),
+    }
+
+
+def _rosters(registration_ids, registrations):
+    by_event = {}
+    for rid, r in zip(registration_ids, registrations):
+        by_event.setdefault(r["event_id"], []).append(rid)
+    return by_event
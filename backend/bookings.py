@@ -0,0 +1,126 @@
+"""Atomic venue bookings.
+
+Each venue has one VenueDay document per date listing the slots booked on
+it. Taking a slot is a single conditional update: push the new entry only
+if no other event's entry on that day overlaps it. MongoDB applies an update
+to one document atomically, so of two overlapping bookings racing each
+other exactly one succeeds, which a look-then-insert cannot promise.
+
+Slots are stored as minutes since midnight, so comparisons are numeric and
+"9:00" sorts before "10:00"; event strings are normalized to zero-padded
+HH:MM (`normalize_time`).
+
+A day's document is created on its first booking, seeded from the events
+already at the venue that day, so events booked before VenueDay existed
+still count.
+"""
+from datetime import datetime, timedelta, timezone
+
+from bson import ObjectId
+from pymongo.errors import DuplicateKeyError
+
+from models import Event, VenueDay
+
+# An event is saved right after its slot is booked; an entry this old whose
+# event does not exist was left behind by a failed create or delete
+STALE_AFTER = timedelta(minutes=5)
+
+
+def normalize_time(value):
+    """Zero-padded "HH:MM" for a time like "9:00"; raises ValueError."""
+    return datetime.strptime(str(value), "%H:%M").strftime("%H:%M")
+
+
+def minutes(value):
+    """Minutes since midnight of an "H:MM"/"HH:MM" time; raises ValueError."""
+    t = datetime.strptime(str(value), "%H:%M")
+    return t.hour * 60 + t.minute
+
+
+def hhmm(value):
+    return f"{value // 60:02d}:{value % 60:02d}"
+
+
+def _from_events(venue_id, date):
+    """Entries for the events already holding the venue on `date`."""
+    entries = []
+    for e in Event.objects(venue_id=venue_id, date=date).only("start_time", "end_time").as_pymongo():
+        try:
+            entries.append({"event_id": e["_id"], "start": minutes(e["start_time"]),
+                            "end": minutes(e["end_time"]), "token": None})
+        except (KeyError, ValueError):
+            continue  # unparseable legacy times cannot clash with anything
+    return entries
+
+
+def _overlapping(start, end, event_id):
+    return {"event_id": {"$ne": event_id}, "start": {"$lt": end}, "end": {"$gt": start}}
+
+
+def day(venue_id, date):
+    """The entries booked at a venue on `date`, earliest first."""
+    doc = VenueDay.objects(venue_id=venue_id, date=date).only("bookings").as_pymongo().first()
+    entries = doc.get("bookings", []) if doc else _from_events(venue_id, date)
+    return sorted(entries, key=lambda b: (b["start"], b["end"]))
+
+
+def book(venue_id, date, start_time, end_time, event_id):
+    """Book a slot for `event_id`; its other entries do not count as clashes.
+
+    Returns (token, None) on success, the token naming the new entry, or
+    (None, clash) where clash is {"event_id", "title", "start_time",
+    "end_time"} of an event already holding an overlapping slot.
+    """
+    start, end = minutes(start_time), minutes(end_time)
+    collection = VenueDay._get_collection()
+    key = {"venue_id": venue_id, "date": date}
+    token = ObjectId()
+
+    while True:
+        booked = collection.update_one(
+            {**key, "bookings": {"$not": {"$elemMatch": _overlapping(start, end, event_id)}}},
+            {"$push": {"bookings": {"event_id": event_id, "start": start, "end": end, "token": token}}}
+        )
+        if booked.modified_count:
+            return token, None
+
+        doc = collection.find_one(key, {"bookings": 1})
+        if doc is None:
+            try:
+                collection.insert_one({**key, "bookings": _from_events(venue_id, date)})
+            except DuplicateKeyError:
+                pass  # another booking created the day first
+            continue
+
+        for entry in doc["bookings"]:
+            if entry["event_id"] != event_id and entry["start"] < end and entry["end"] > start:
+                event = Event.objects(id=entry["event_id"]).only("title").as_pymongo().first()
+                if not event and _stale(entry):
+                    collection.update_one(key, {"$pull": {"bookings": {"token": entry["token"]}}})
+                    break
+                return None, {"event_id": entry["event_id"], "title": (event or {}).get("title"),
+                              "start_time": hhmm(entry["start"]), "end_time": hhmm(entry["end"])}
+        # The clash went away in the meantime; try again
+
+
+def _stale(entry):
+    # Entries seeded from events carry no token, but their event existed
+    booked_at = entry["token"].generation_time if entry.get("token") else None
+    return bool(booked_at) and datetime.now(timezone.utc) - booked_at > STALE_AFTER
+
+
+def release(venue_id, date, event_id, keep=None):
+    """Drop `event_id`'s entries on that day, except the one named `keep`."""
+    entry = {"event_id": event_id}
+    if keep:
+        entry["token"] = {"$ne": keep}
+    VenueDay._get_collection().update_one(
+        {"venue_id": venue_id, "date": date}, {"$pull": {"bookings": entry}}
+    )
+
+
+def cancel(venue_id, date, token):
+    """Drop the one entry a `book` call returned `token` for."""
+    VenueDay._get_collection().update_one(
+        {"venue_id": venue_id, "date": date}, {"$pull": {"bookings": {"token": token}}}
+    )
@@ -0,0 +1,192 @@
+"""Bulk registration import for organizer-side sign-ups.
+
+Rows are read lazily from a CSV or NDJSON request body and processed in
+batches: participants are upserted by email with one unordered bulk write,
+existing registrations are filtered with one query, seats for the whole
+batch are reserved with one conditional update, and the registrations go in
+with one unordered insert_many. Every input row gets a result entry.
+"""
+import csv
+import io
+import json
+from datetime import datetime
+
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+
+from event_stats import counted_as, record
+from models import Participant, EventRegistration, Event, User, normalize_email, search_keys
+
+BATCH_SIZE = 500
+PARTICIPANT_KEYS = ("name", "email", "phone", "reg_no", "department", "year")
+
+
+def normalize_participant(data):
+    """Clean participant fields the same way for single and bulk sign-ups."""
+    row = {key: str(data.get(key) or "").strip() for key in PARTICIPANT_KEYS}
+    row["email"] = normalize_email(row["email"])
+    row["reg_no"] = row["reg_no"].upper()
+    return row
+
+
+def accounts_for(emails):
+    """Map the emails that belong to a User account to its _id.
+
+    User.email is stored lower-cased (older rows by `normalize-user-emails`),
+    so the lookup is an exact match on the normalized form. Keys are the
+    normalized emails.
+    """
+    emails = {normalize_email(e) for e in emails}
+    users = User.objects(email__in=list(emails)).only("email").as_pymongo()
+    return {u["email"]: u["_id"] for u in users}
+
+
+def new_participant(row, user_id, now):
+    """Fields a participant is inserted with, linked to `user_id` when known."""
+    return {
+        **row, "created_at": now,
+        "search_keys": search_keys(row.get("name"), row["email"], row.get("reg_no")),
+        **({"user_id": user_id} if user_id else {})
+    }
+
+
+def read_rows(stream, ndjson=False):
+    """Yield one dict per input row without loading the whole body."""
+    text = io.TextIOWrapper(stream, encoding="utf-8-sig", newline="")
+    if not ndjson:
+        yield from csv.DictReader(text)
+        return
+
+    for line in text:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield json.loads(line)
+        except ValueError:
+            yield None  # reported as an invalid row
+
+
+def import_registrations(event_id, rows):
+    """Register every row for `event_id`; yields one result dict per row."""
+    batch = []
+    for number, data in enumerate(rows, start=1):
+        batch.append((number, data))
+        if len(batch) >= BATCH_SIZE:
+            yield from _import_batch(event_id, batch)
+            batch = []
+    if batch:
+        yield from _import_batch(event_id, batch)
+
+
+def _import_batch(event_id, batch):
+    now = datetime.utcnow()
+    results = {}
+    valid = {}  # email -> (row number, cleaned fields); first row per email wins
+
+    for number, data in batch:
+        if not isinstance(data, dict):
+            results[number] = {"row": number, "status": "invalid", "error": "Malformed row"}
+            continue
+        row = normalize_participant(data)
+        if not row["name"] or not row["email"]:
+            results[number] = {"row": number, "status": "invalid", "error": "Name and Email are required"}
+        elif row["email"] in valid:
+            results[number] = {"row": number, "email": row["email"], "status": "duplicate"}
+        else:
+            valid[row["email"]] = (number, row)
+
+    if valid:
+        participants = upsert_participants(valid, now)
+        _register(event_id, valid, participants, now, results)
+
+    for number, _ in batch:
+        yield results[number]
+
+
+def upsert_participants(valid, now):
+    """Create missing participants by email.
+
+    Returns email -> {"_id", "department", "year"} as stored, which for
+    existing participants may differ from the submitted row.
+
+    New participants are linked to the account with the same email, if any.
+    """
+    accounts = accounts_for(valid)
+    try:
+        Participant._get_collection().bulk_write([
+            UpdateOne(
+                {"email": email},
+                {"$setOnInsert": new_participant(row, accounts.get(email), now)},
+                upsert=True
+            )
+            for email, (_, row) in valid.items()
+        ], ordered=False)
+    except BulkWriteError as e:
+        # A concurrent sign-up inserted the same email first; that row is fine
+        if any(err["code"] != 11000 for err in e.details["writeErrors"]):
+            raise
+
+    existing = Participant.objects(email__in=list(valid)).only("email", "department", "year").as_pymongo()
+    return {p["email"]: p for p in existing}
+
+
+def _register(event_id, valid, participants, now, results):
+    collection = EventRegistration._get_collection()
+    participant_ids = {email: p["_id"] for email, p in participants.items()}
+
+    already = {
+        r["participant_id"] for r in collection.find(
+            {"event_id": event_id, "participant_id": {"$in": list(participant_ids.values())}},
+            {"participant_id": 1}
+        )
+    }
+
+    pending = []
+    for email, (number, _) in valid.items():
+        if email not in participant_ids:
+            results[number] = {"row": number, "email": email, "status": "error"}
+        elif participant_ids[email] in already:
+            results[number] = {"row": number, "email": email, "status": "duplicate"}
+        else:
+            pending.append((number, email))
+
+    # Capacity rules are applied once for the whole batch
+    granted = Event.take_available_seats(event_id, len(pending))
+    for number, email in pending[granted:]:
+        results[number] = {"row": number, "email": email, "status": "full", "error": "Event is full"}
+    pending = pending[:granted]
+    if not pending:
+        return
+
+    docs = [{
+        "event_id": event_id,
+        "participant_id": participant_ids[email],
+        "registration_time": now,
+        "status": "Registered",
+        "counted_as": counted_as(participants[email].get("department"), participants[email].get("year")),
+        "updated_at": now,
+    } for _, email in pending]
+
+    failed = {}
+    try:
+        collection.insert_many(docs, ordered=False)
+    except BulkWriteError as e:
+        # Registrations that raced in since the duplicate check hit the unique index
+        failed = {err["index"]: err for err in e.details["writeErrors"]}
+        Event.release_seats(event_id, len(failed))
+
+    record(
+        (event_id, "Registered", participants[email].get("department"), participants[email].get("year"), 1)
+        for index, (_, email) in enumerate(pending) if index not in failed
+    )
+
+    for index, (number, email) in enumerate(pending):
+        if index in failed:
+            status = "duplicate" if failed[index]["code"] == 11000 else "error"
+            results[number] = {"row": number, "email": email, "status": status}
+        else:
+            results[number] = {
+                "row": number, "email": email, "status": "registered",
+                "registration_id": str(docs[index]["_id"])
+            }
@@ -0,0 +1,162 @@
+"""ETag-validated response cache for read-mostly endpoints.
+
+Each cached namespace ("events", "venues") has a version. Cached views
+serve the stored body while the version is unchanged and answer 304 when
+the client's If-None-Match already names it; write handlers call
+`response_cache.bump(namespace)` to invalidate.
+
+A version is "<epoch>.<counter>". The epoch is random and picked whenever
+the counter starts from scratch (a new process for the memory store, an
+emptied directory for the file store, e.g. /dev/shm after a reboot), so a
+tag handed out before a restart can never name data written after it.
+
+The version lives in a pluggable store (stores.py). The default keeps it in
+process memory, which is only correct with a single process; app.py refuses
+to start several workers (WEB_CONCURRENCY) or `run-jobs` without
+CACHE_VERSION_DIR (or SHARED_STATE_DIR) pointing at a local directory, e.g.
+one on /dev/shm, where the versions are kept in small lock-protected files.
+"""
+import fcntl
+import os
+import secrets
+import threading
+import zlib
+from collections import OrderedDict
+from functools import wraps
+
+from flask import request, make_response
+
+from stores import pick_store
+
+
+def _new_epoch():
+    return secrets.token_hex(4)
+
+
+class MemoryVersionStore:
+    shared = False
+
+    def __init__(self):
+        self.epoch = _new_epoch()
+        self._versions = {}
+        self._lock = threading.Lock()
+
+    def get(self, namespace):
+        return f"{self.epoch}.{self._versions.get(namespace, 0)}"
+
+    def bump(self, namespace):
+        with self._lock:
+            self._versions[namespace] = self._versions.get(namespace, 0) + 1
+            return f"{self.epoch}.{self._versions[namespace]}"
+
+
+def _parse(text):
+    """(epoch, counter) of a version file's contents, or None if unusable."""
+    epoch, _, counter = text.partition(".")
+    return (epoch, int(counter)) if epoch and counter.isdigit() else None
+
+
+class FileVersionStore:
+    """One version file per namespace, shared by every process on the host."""
+
+    shared = True
+
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, namespace):
+        return os.path.join(self.directory, f"{namespace}.version")
+
+    def get(self, namespace):
+        try:
+            with open(self._path(namespace)) as f:
+                text = f.read()
+            if _parse(text):
+                return text
+        except FileNotFoundError:
+            pass
+        # Missing (first use since the directory was emptied) or torn: start an epoch
+        return self._update(namespace, 0)
+
+    def bump(self, namespace):
+        return self._update(namespace, 1)
+
+    def _update(self, namespace, step):
+        fd = os.open(self._path(namespace), os.O_RDWR | os.O_CREAT, 0o644)
+        with os.fdopen(fd, "r+") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            epoch, counter = _parse(f.read()) or (_new_epoch(), 0)
+            version = f"{epoch}.{counter + step}"
+            f.seek(0)
+            f.write(version)
+            f.truncate()
+            return version
+
+
+class ResponseCache:
+    def __init__(self, store=None, max_entries=256):
+        self.store = store or MemoryVersionStore()
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def bump(self, namespace):
+        self.store.bump(namespace)
+
+    # etag/lookup/keep take the request's full path ("/path?query") so the
+    # ASGI handlers (asgi.py) share the entries and tags of the Flask views
+    def etag(self, namespace, version, full_path):
+        # Query string is part of the key so each page/filter has its own tag
+        path = zlib.crc32(full_path.encode())
+        return f"{namespace}-{version}-{path:x}"
+
+    def lookup(self, namespace, full_path, version):
+        """(body, mimetype) stored for this version, or None."""
+        key = (namespace, full_path)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[0] == version:
+                self._entries.move_to_end(key)
+                return entry[1:]
+        return None
+
+    def keep(self, namespace, full_path, version, body, mimetype):
+        key = (namespace, full_path)
+        with self._lock:
+            self._entries[key] = (version, body, mimetype)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def cached(self, namespace):
+        """Decorator caching a GET view's successful responses under `namespace`."""
+        def decorator(view):
+            @wraps(view)
+            def wrapper(*args, **kwargs):
+                version = self.store.get(namespace)
+                etag = self.etag(namespace, version, request.full_path)
+
+                # Weak match: compression.py weakens the tag of compressed bodies
+                if request.if_none_match.contains_weak(etag):
+                    resp = make_response("", 304)
+                else:
+                    entry = self.lookup(namespace, request.full_path, version)
+                    if entry:
+                        resp = make_response(entry[0], 200)
+                        resp.mimetype = entry[1]
+                    else:
+                        resp = make_response(view(*args, **kwargs))
+                        if resp.status_code != 200:
+                            return resp
+                        self.keep(namespace, request.full_path, version, resp.get_data(), resp.mimetype)
+
+                resp.set_etag(etag)
+                # Make browsers revalidate every time instead of trusting a stale copy
+                resp.headers["Cache-Control"] = "no-cache"
+                return resp
+            return wrapper
+        return decorator
+
+
+response_cache = ResponseCache(pick_store("CACHE_VERSION_DIR", "cache", MemoryVersionStore, FileVersionStore))
@@ -0,0 +1,260 @@
+"""Door check-in against an in-memory roster.
+
+An event's roster (registrations joined with their participants) is loaded
+once into dicts keyed by registration id, reg_no and email, so a scan is a
+dict lookup instead of a MongoDB round trip. Check-ins mark the entry
+"Attended" in memory and are written back by a flush thread every
+CHECKIN_FLUSH_INTERVAL_MS as one bulk write, conditional on the
+registration still being "Registered" so a concurrent cancellation wins.
+
+Rosters are reloaded after CHECKIN_ROSTER_TTL seconds, and a scan that
+misses the roster falls back to one MongoDB lookup, so late registrations
+still get in. Expired rosters are dropped whenever one is loaded, and at
+most CHECKIN_MAX_ROSTERS are kept, least recently scanned first out. Rosters live per process: with several workers, point a
+door's scanners at one of them, or a repeat scan on another worker may be
+answered "checked_in" instead of "already_checked_in" (MongoDB still only
+records it once).
+"""
+import atexit
+import logging
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+
+from bson import ObjectId
+from pymongo import UpdateOne
+
+from background import PerProcess, start_thread
+from event_stats import counted_profile, record
+from models import EventRegistration, Participant
+from serializers import PARTICIPANT_FIELDS
+
+log = logging.getLogger(__name__)
+
+CHECKIN_STATUSES = ("Registered", "Attended")
+
+
+class Roster:
+    def __init__(self, event_id, entries):
+        self.event_id = event_id
+        self.loaded_at = time.monotonic()
+        self.by_id, self.by_reg_no, self.by_email = {}, {}, {}
+        for entry in entries:
+            self.add(entry)
+
+    def add(self, entry):
+        self.by_id[entry["registration_id"]] = entry
+        if entry.get("reg_no"):
+            self.by_reg_no[entry["reg_no"].strip().upper()] = entry
+        if entry.get("email"):
+            self.by_email[entry["email"].strip().lower()] = entry
+
+    def find(self, code):
+        code = code.strip()
+        if "@" in code:
+            return self.by_email.get(code.lower())
+        return self.by_id.get(code.lower()) or self.by_reg_no.get(code.upper())
+
+    def summary(self):
+        attended = sum(1 for e in self.by_id.values() if e["status"] == "Attended")
+        return {"event_id": str(self.event_id), "roster": len(self.by_id), "attended": attended}
+
+
+def _entries(regs):
+    """Roster entries for raw registrations, with one participant query."""
+    regs = list(regs)
+    people = {
+        p["_id"]: p for p in Participant.objects(
+            id__in={r["participant_id"] for r in regs}
+        ).only(*PARTICIPANT_FIELDS).as_pymongo()
+    }
+    return [{
+        "registration_id": str(r["_id"]),
+        "event_id": r["event_id"],
+        "participant_id": r["participant_id"],
+        **{key: people[r["participant_id"]].get(key) for key in PARTICIPANT_FIELDS},
+        "status": r.get("status"),
+        "checked_in_at": r.get("checked_in_at"),
+        "counted_as": r.get("counted_as"),
+    } for r in regs if r["participant_id"] in people]
+
+
+def _registration_query(event_id, code):
+    code = code.strip()
+    if ObjectId.is_valid(code):
+        return EventRegistration.objects(event_id=event_id, id=ObjectId(code))
+    if "@" in code:
+        p = Participant.objects(email=code.lower()).only("id").first()
+    else:
+        p = Participant.objects(reg_no=code.upper()).only("id").first()
+    return EventRegistration.objects(event_id=event_id, participant_id=p.id) if p else None
+
+
+class CheckInDesk:
+    def __init__(self):
+        self.flush_interval = 0.5
+        self.roster_ttl = 600
+        self.max_rosters = 64
+        self._rosters = OrderedDict()
+        self._pending = {}  # registration id -> entry, awaiting the flush
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._worker = PerProcess(self._start)
+
+    def configure(self, config):
+        self.flush_interval = config["CHECKIN_FLUSH_INTERVAL_MS"] / 1000
+        self.roster_ttl = config["CHECKIN_ROSTER_TTL"]
+        self.max_rosters = config["CHECKIN_MAX_ROSTERS"]
+
+    def _start(self):
+        self._rosters.clear()
+        self._pending.clear()
+        start_thread(self._run, "checkin-flush")
+
+    # -------------------------
+    # Roster
+    # -------------------------
+    def load(self, event_id):
+        """(Re)load an event's roster; returns it."""
+        self._worker.ensure()
+        regs = EventRegistration.objects(event_id=event_id).only(
+            "event_id", "participant_id", "status", "checked_in_at", "counted_as"
+        ).as_pymongo()
+        roster = Roster(event_id, _entries(regs))
+        with self._lock:
+            # Check-ins not yet flushed must survive a reload
+            for entry in self._pending.values():
+                if entry["registration_id"] in roster.by_id:
+                    roster.add(entry)
+            self._rosters[event_id] = roster
+            self._rosters.move_to_end(event_id)
+            self._evict()
+        return roster
+
+    def _evict(self):
+        # Pending check-ins keep their own entries, so dropping a roster loses nothing
+        now = time.monotonic()
+        for event_id in [k for k, r in self._rosters.items() if now - r.loaded_at > self.roster_ttl]:
+            del self._rosters[event_id]
+        while len(self._rosters) > self.max_rosters:
+            self._rosters.popitem(last=False)
+
+    def has_roster(self, event_id):
+        return event_id in self._rosters
+
+    def roster(self, event_id):
+        with self._lock:
+            roster = self._rosters.get(event_id)
+            if roster is not None:
+                self._rosters.move_to_end(event_id)
+        if roster is None or time.monotonic() - roster.loaded_at > self.roster_ttl:
+            roster = self.load(event_id)
+        return roster
+
+    # -------------------------
+    # Check-in
+    # -------------------------
+    def check_in(self, event_id, code, at=None):
+        """Check one attendee in by registration id, reg_no or email.
+
+        Returns (result, entry); result is "checked_in",
+        "already_checked_in", "not_allowed" (cancelled/waitlisted) or
+        "not_found".
+        """
+        roster = self.roster(event_id)
+        entry = roster.find(code)
+        if entry is None:
+            entry = self._late_registration(roster, code)
+            if entry is None:
+                return "not_found", None
+
+        with self._lock:
+            if entry["status"] == "Attended":
+                return "already_checked_in", entry
+            if entry["status"] not in CHECKIN_STATUSES:
+                return "not_allowed", entry
+            at = at or datetime.utcnow()
+            entry["status"] = "Attended"
+            # MongoDB keeps milliseconds; truncate so flush can recognise its own writes
+            entry["checked_in_at"] = at.replace(microsecond=at.microsecond // 1000 * 1000)
+            self._pending[entry["registration_id"]] = entry
+        return "checked_in", entry
+
+    def _late_registration(self, roster, code):
+        qs = _registration_query(roster.event_id, code)
+        reg = qs.only("event_id", "participant_id", "status", "checked_in_at",
+                      "counted_as").as_pymongo().first() if qs else None
+        if not reg:
+            return None
+        entries = _entries([reg])
+        if not entries:
+            return None
+        with self._lock:
+            roster.add(entries[0])
+        return entries[0]
+
+    # -------------------------
+    # Flush
+    # -------------------------
+    def _run(self):
+        while True:
+            time.sleep(self.flush_interval)
+            try:
+                self.flush()
+            except Exception:
+                log.exception("Check-in flush failed; will retry")
+
+    def flush(self):
+        """Write pending check-ins in one bulk write; returns how many landed."""
+        with self._flush_lock:
+            with self._lock:
+                batch, self._pending = self._pending, {}
+            if not batch:
+                return 0
+
+            now = datetime.utcnow()
+            ops = [UpdateOne(
+                {"_id": ObjectId(reg_id), "status": "Registered"},
+                {"$set": {"status": "Attended", "checked_in_at": entry["checked_in_at"], "updated_at": now}}
+            ) for reg_id, entry in batch.items()]
+            try:
+                result = EventRegistration._get_collection().bulk_write(ops, ordered=False)
+            except Exception:
+                with self._lock:
+                    self._pending = {**batch, **self._pending}
+                raise
+
+            landed = list(batch.values())
+            if result.modified_count != len(ops):
+                # Some were cancelled (or checked in elsewhere) meanwhile; find ours
+                ours = {
+                    str(r["_id"]) for r in EventRegistration.objects(
+                        id__in=[ObjectId(k) for k in batch], status="Attended"
+                    ).only("checked_in_at").as_pymongo()
+                    if r.get("checked_in_at") == batch[str(r["_id"])]["checked_in_at"]
+                }
+                landed = [e for k, e in batch.items() if k in ours]
+
+            profiles = [(e, counted_profile(e, (e.get("department"), e.get("year")))) for e in landed]
+            record(
+                change for e, profile in profiles for change in (
+                    (e["event_id"], "Registered", *profile, -1),
+                    (e["event_id"], "Attended", *profile, 1),
+                )
+            )
+            return len(landed)
+
+    def summary(self, event_id):
+        roster = self.roster(event_id)
+        with self._lock:
+            pending = sum(1 for k in self._pending if k in roster.by_id)
+        return {**roster.summary(), "pending_flush": pending}
+
+    def shutdown(self):
+        if self._worker.started:
+            self.flush()
+
+
+checkin_desk = CheckInDesk()
+atexit.register(checkin_desk.shutdown)
@@ -0,0 +1,63 @@
+"""Negotiated response compression.
+
+JSON and text responses of at least COMPRESS_MIN_SIZE bytes are compressed
+with brotli when the client accepts it and the `brotli` package is
+installed, otherwise with gzip. Streamed responses (the CSV/NDJSON export)
+and anything already encoded are sent as they are.
+
+A compressed body is a different representation of the same resource, so
+its ETag is weakened; cache.py compares If-None-Match weakly, so revalidation
+still answers 304.
+"""
+import gzip
+
+from flask import request
+
+try:
+    import brotli
+except ImportError:  # optional: gzip only
+    brotli = None
+
+COMPRESSIBLE = ("application/json", "application/x-ndjson", "text/")
+
+# Fast settings: most of the size win at a fraction of the CPU of the maximums
+GZIP_LEVEL = 5
+BROTLI_QUALITY = 4
+
+
+def _encoding():
+    accepted = request.accept_encodings
+    if brotli and accepted["br"]:
+        return "br"
+    if accepted["gzip"]:
+        return "gzip"
+    return None
+
+
+def _compress(data, encoding):
+    if encoding == "br":
+        return brotli.compress(data, quality=BROTLI_QUALITY)
+    return gzip.compress(data, compresslevel=GZIP_LEVEL)
+
+
+def init_compression(app):
+    min_size = app.config["COMPRESS_MIN_SIZE"]
+
+    @app.after_request
+    def compress(resp):
+        if (resp.status_code != 200 or resp.direct_passthrough or resp.is_streamed
+                or "Content-Encoding" in resp.headers
+                or not (resp.mimetype or "").startswith(COMPRESSIBLE)):
+            return resp
+
+        resp.vary.add("Accept-Encoding")
+        encoding = _encoding()
+        if not encoding or resp.content_length is None or resp.content_length < min_size:
+            return resp
+
+        resp.set_data(_compress(resp.get_data(), encoding))
+        resp.headers["Content-Encoding"] = encoding
+        etag, weak = resp.get_etag()
+        if etag and not weak:
+            resp.set_etag(etag, weak=True)
+        return resp
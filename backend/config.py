@@ -0,0 +1,65 @@
+"""Application settings, overridable through environment variables."""
+import os
+
+
+class Config:
+    # Signs session tokens; required unless DEBUG or TESTING (see create_app)
+    SECRET_KEY = os.environ.get("SECRET_KEY")
+    CORS_ORIGINS = os.environ.get("CORS_ORIGINS", "http://localhost:5173").split(",")
+
+    MONGODB_URI = os.environ.get("MONGODB_URI", "mongodb://localhost:27017/college_event")
+    MONGODB_DB = os.environ.get("MONGODB_DB", "college_event")
+
+    # Worker processes gunicorn/uvicorn start (both read WEB_CONCURRENCY); with
+    # more than one, shared state needs SHARED_STATE_DIR (see stores.py)
+    WEB_CONCURRENCY = int(os.environ.get("WEB_CONCURRENCY", 1))
+
+    # Connection pool, sized per worker process
+    MONGO_MAX_POOL_SIZE = int(os.environ.get("MONGO_MAX_POOL_SIZE", 50))
+    MONGO_MIN_POOL_SIZE = int(os.environ.get("MONGO_MIN_POOL_SIZE", 0))
+    MONGO_MAX_IDLE_TIME_MS = int(os.environ.get("MONGO_MAX_IDLE_TIME_MS", 60000))
+    MONGO_WAIT_QUEUE_TIMEOUT_MS = int(os.environ.get("MONGO_WAIT_QUEUE_TIMEOUT_MS", 2000))
+
+    # Timeouts
+    MONGO_CONNECT_TIMEOUT_MS = int(os.environ.get("MONGO_CONNECT_TIMEOUT_MS", 5000))
+    MONGO_SERVER_SELECTION_TIMEOUT_MS = int(os.environ.get("MONGO_SERVER_SELECTION_TIMEOUT_MS", 5000))
+    MONGO_SOCKET_TIMEOUT_MS = int(os.environ.get("MONGO_SOCKET_TIMEOUT_MS", 10000))
+
+    # Write concern / read preference
+    MONGO_WRITE_CONCERN = os.environ.get("MONGO_WRITE_CONCERN", "1")  # "1", "majority", ...
+    MONGO_JOURNAL = os.environ.get("MONGO_JOURNAL", "").lower() in ("1", "true")
+    MONGO_READ_PREFERENCE = os.environ.get("MONGO_READ_PREFERENCE", "primary")
+
+    # Requests issuing more MongoDB commands than this are logged as likely N+1
+    QUERY_BUDGET = int(os.environ.get("QUERY_BUDGET", 20))
+
+    # Write-behind registration queue for event openings (see rush.py)
+    RUSH_MODE = os.environ.get("RUSH_MODE", "").lower() in ("1", "true")
+    RUSH_FLUSH_INTERVAL_MS = int(os.environ.get("RUSH_FLUSH_INTERVAL_MS", 5))
+    RUSH_BATCH_SIZE = int(os.environ.get("RUSH_BATCH_SIZE", 500))
+    RUSH_SEAT_BLOCK = int(os.environ.get("RUSH_SEAT_BLOCK", 25))
+
+    # Background jobs (see jobs.py); set JOB_WORKERS=0 when running `flask run-jobs`
+    JOB_WORKERS = int(os.environ.get("JOB_WORKERS", 2))
+    RECONCILE_INTERVAL_SECONDS = int(os.environ.get("RECONCILE_INTERVAL_SECONDS", 600))
+
+    # Compress JSON/text responses at least this large (see compression.py)
+    COMPRESS_MIN_SIZE = int(os.environ.get("COMPRESS_MIN_SIZE", 1024))
+
+    # Admission control for login/signup and registration (see ratelimit.py)
+    RATE_LIMIT_ENABLED = os.environ.get("RATE_LIMIT_ENABLED", "1").lower() in ("1", "true")
+    AUTH_CLIENT_RATE_PER_MINUTE = int(os.environ.get("AUTH_CLIENT_RATE_PER_MINUTE", 60))  # per user/address
+    AUTH_CLIENT_BURST = int(os.environ.get("AUTH_CLIENT_BURST", 20))
+    AUTH_RATE_PER_MINUTE = int(os.environ.get("AUTH_RATE_PER_MINUTE", 10))  # per user/address and email
+    AUTH_BURST = int(os.environ.get("AUTH_BURST", 5))
+    REGISTER_CLIENT_RATE_PER_MINUTE = int(os.environ.get("REGISTER_CLIENT_RATE_PER_MINUTE", 300))
+    REGISTER_CLIENT_BURST = int(os.environ.get("REGISTER_CLIENT_BURST", 60))
+    REGISTER_RATE_PER_MINUTE = int(os.environ.get("REGISTER_RATE_PER_MINUTE", 30))
+    REGISTER_BURST = int(os.environ.get("REGISTER_BURST", 10))
+    # Per host with a shared RATE_LIMIT_DIR, otherwise per worker
+    EXPENSIVE_CONCURRENCY = int(os.environ.get("EXPENSIVE_CONCURRENCY", 8))
+
+    # Door check-in (see checkin.py)
+    CHECKIN_FLUSH_INTERVAL_MS = int(os.environ.get("CHECKIN_FLUSH_INTERVAL_MS", 500))
+    CHECKIN_ROSTER_TTL = int(os.environ.get("CHECKIN_ROSTER_TTL", 600))
+    CHECKIN_MAX_ROSTERS = int(os.environ.get("CHECKIN_MAX_ROSTERS", 64))  # per worker
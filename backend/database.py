@@ -0,0 +1,90 @@
+"""MongoDB connection handling for the app factory.
+
+The client is registered with connect=False, so creating the app opens no
+sockets. The first request in each process (re)builds the client if the
+process id changed, so a gunicorn master that imports the app before forking
+never shares a pool with its workers; each worker gets its own pool sized by
+MONGO_MAX_POOL_SIZE.
+"""
+import inspect
+import os
+
+from mongoengine import connect, disconnect
+from mongoengine.connection import get_db
+
+_settings = {}
+_pid = None
+
+
+def client_settings(config):
+    """MongoClient keyword arguments derived from the app config."""
+    write_concern = config["MONGO_WRITE_CONCERN"]
+    settings = {
+        "db": config["MONGODB_DB"],
+        "host": config["MONGODB_URI"],
+        "maxPoolSize": config["MONGO_MAX_POOL_SIZE"],
+        "minPoolSize": config["MONGO_MIN_POOL_SIZE"],
+        "maxIdleTimeMS": config["MONGO_MAX_IDLE_TIME_MS"],
+        "waitQueueTimeoutMS": config["MONGO_WAIT_QUEUE_TIMEOUT_MS"],
+        "connectTimeoutMS": config["MONGO_CONNECT_TIMEOUT_MS"],
+        "serverSelectionTimeoutMS": config["MONGO_SERVER_SELECTION_TIMEOUT_MS"],
+        "socketTimeoutMS": config["MONGO_SOCKET_TIMEOUT_MS"],
+        "w": int(write_concern) if write_concern.isdigit() else write_concern,
+        "readPreference": config["MONGO_READ_PREFERENCE"],
+    }
+    if config["MONGO_JOURNAL"]:
+        settings["journal"] = True
+    # Lets tests and benchmarks swap in e.g. mongomock.MongoClient
+    if config.get("MONGO_CLIENT_CLASS"):
+        settings["mongo_client_class"] = config["MONGO_CLIENT_CLASS"]
+    return settings
+
+
+def mongomock_client():
+    """mongomock.MongoClient, for MONGO_CLIENT_CLASS in tests and benchmarks."""
+    import mongomock
+    from mongomock.collection import BulkOperationBuilder
+
+    # pymongo 4.11+ passes `sort` to bulk UpdateOne/ReplaceOne; older mongomock rejects it
+    for name in ("add_update", "add_replace"):
+        method = getattr(BulkOperationBuilder, name)
+        if "sort" not in inspect.signature(method).parameters:
+            def compat(self, *args, sort=None, _method=method, **kwargs):
+                return _method(self, *args, **kwargs)
+            setattr(BulkOperationBuilder, name, compat)
+    return mongomock.MongoClient
+
+
+def init_db(app):
+    global _settings
+    _settings = client_settings(app.config)
+    _connect()
+    app.before_request(ensure_connection)
+
+
+def _connect():
+    global _pid
+    disconnect()
+    connect(connect=False, **_settings)
+    _pid = os.getpid()
+
+
+def ensure_connection():
+    """before_request hook: give a freshly forked worker its own client."""
+    if _pid != os.getpid():
+        _connect()
+
+
+def readiness():
+    """Ping the server through the pool; returns (ok, details)."""
+    ensure_connection()
+    details = {
+        "max_pool_size": _settings.get("maxPoolSize"),
+        "read_preference": _settings.get("readPreference"),
+        "write_concern": _settings.get("w"),
+    }
+    try:
+        get_db().command("ping")
+    except Exception as e:
+        return False, {**details, "error": str(e)}
+    return True, details
@@ -0,0 +1,170 @@
+"""Materialized per-event registration statistics.
+
+One `event_stats` document per event holds the registration total, counts
+by status, and counts of seat-holding registrations (Registered/Attended)
+by participant department and year. Every write path that creates,
+re-statuses or deletes registrations passes the change through `record`,
+which turns it into a single $inc per event, so GET
+/api/events/<id>/stats is one _id lookup.
+
+A registration remembers the department and year it was counted under
+(EventRegistration.counted_as), so taking it out again decrements the same
+buckets even if the participant was edited or deleted since. Counters are
+clamped at zero after every decrement.
+
+`rebuild_stats` recomputes everything from event_registrations with one
+aggregation (`flask --app app rebuild-event-stats`); run it once after
+deploying, and whenever the counters are suspect.
+"""
+from collections import Counter, defaultdict
+from datetime import datetime
+
+from pymongo import ReplaceOne, UpdateOne
+
+from models import EventRegistration, EventStats, Participant, SEAT_STATUSES
+
+UNKNOWN = "Unknown"
+
+
+def _key(value):
+    """Field-name-safe bucket for a status/department/year value."""
+    value = str(value).strip() if value not in (None, "") else UNKNOWN
+    return value.replace(".", "_").lstrip("$") or UNKNOWN
+
+
+def increments(status, department, year, sign=1):
+    """The $inc fields for one registration entering (+1) or leaving (-1)."""
+    inc = {"total": sign, f"status.{_key(status)}": sign}
+    if status in SEAT_STATUSES:
+        inc[f"department.{_key(department)}"] = sign
+        inc[f"year.{_key(year)}"] = sign
+    return inc
+
+
+def record(changes):
+    """Apply (event_id, status, department, year, sign) tuples in one bulk write."""
+    ops = stat_ops(changes)
+    if ops:
+        # Ordered, so each clamp runs after its $inc
+        EventStats._get_collection().bulk_write(ops)
+
+
+def stat_ops(changes):
+    """The event_stats bulk write `record` makes for `changes`."""
+    per_event = defaultdict(Counter)
+    for event_id, status, department, year, sign in changes:
+        per_event[event_id].update(increments(status, department, year, sign))
+
+    now = datetime.utcnow()
+    ops = []
+    for event_id, inc in per_event.items():
+        inc = {k: v for k, v in inc.items() if v}
+        if not inc:
+            continue
+        ops.append(UpdateOne({"_id": event_id}, {"$inc": inc, "$set": {"updated_at": now}}, upsert=True))
+        negative = [k for k, v in inc.items() if v < 0]
+        if negative:
+            ops.append(UpdateOne({"_id": event_id}, {"$max": {k: 0 for k in negative}}))
+    return ops
+
+
+def counted_as(department, year):
+    """The EventRegistration.counted_as value for a participant's profile."""
+    return {"department": department, "year": year}
+
+
+def participant_profile(participant_id):
+    """(department, year) of a participant, for callers that only hold the id."""
+    p = Participant.objects(id=participant_id).only("department", "year").as_pymongo().first() or {}
+    return p.get("department"), p.get("year")
+
+
+def counted_profile(reg, fallback=None):
+    """(department, year) a raw registration is counted under.
+
+    Registrations saved before counted_as existed use `fallback`, else
+    their participant's current profile.
+    """
+    counted = reg.get("counted_as")
+    if counted:
+        return counted.get("department"), counted.get("year")
+    return fallback if fallback is not None else participant_profile(reg["participant_id"])
+
+
+def move_participant(participant_id, old, new):
+    """A participant's (department, year) changed from `old` to `new`."""
+    if old == new:
+        return
+    regs = EventRegistration.objects(participant_id=participant_id).only(
+        "event_id", "status", "counted_as"
+    ).as_pymongo()
+    changes = []
+    for r in regs:
+        if r.get("status") in SEAT_STATUSES:
+            changes.append((r["event_id"], r["status"], *counted_profile(r, old), -1))
+            changes.append((r["event_id"], r["status"], *new, 1))
+    EventRegistration.objects(participant_id=participant_id).update(set__counted_as=counted_as(*new))
+    record(changes)
+
+
+def drop_stats(event_ids):
+    EventStats.objects(id__in=list(event_ids)).delete()
+
+
+def stats_dict(doc, event_id):
+    return {
+        "event_id": str(event_id),
+        "total": max(0, doc.get("total", 0)),
+        "by_status": {k: v for k, v in doc.get("status", {}).items() if v > 0},
+        "by_department": {k: v for k, v in doc.get("department", {}).items() if v > 0},
+        "by_year": {k: v for k, v in doc.get("year", {}).items() if v > 0},
+        "updated_at": doc["updated_at"].isoformat() if doc.get("updated_at") else None,
+    }
+
+
+def rebuild_stats(log=print):
+    """Recompute every event's stats from event_registrations.
+
+    Registrations count under their counted_as profile, or their
+    participant's for rows saved before it existed. Returns the number of
+    events written. Stats of events with no registrations left are removed.
+    """
+    stored = {"$ifNull": ["$counted_as", False]}
+    rows = EventRegistration.objects.aggregate([
+        {"$lookup": {
+            "from": Participant._get_collection_name(),
+            "localField": "participant_id", "foreignField": "_id", "as": "p"
+        }},
+        {"$unwind": {"path": "$p", "preserveNullAndEmptyArrays": True}},
+        {"$group": {
+            "_id": {"event": "$event_id", "status": "$status",
+                    "department": {"$cond": [stored, "$counted_as.department", "$p.department"]},
+                    "year": {"$cond": [stored, "$counted_as.year", "$p.year"]}},
+            "n": {"$sum": 1},
+        }},
+    ])
+
+    per_event = defaultdict(Counter)
+    for row in rows:
+        g = row["_id"]
+        for field, value in increments(g.get("status"), g.get("department"), g.get("year")).items():
+            per_event[g["event"]][field] += value * row["n"]
+
+    now = datetime.utcnow()
+    ops = []
+    for event_id, inc in per_event.items():
+        doc = {"_id": event_id, "total": 0, "status": {}, "department": {}, "year": {}, "updated_at": now}
+        for field, value in inc.items():
+            if field == "total":
+                doc["total"] = value
+            else:
+                group, key = field.split(".", 1)
+                doc[group][key] = value
+        ops.append(ReplaceOne({"_id": event_id}, doc, upsert=True))
+
+    collection = EventStats._get_collection()
+    if ops:
+        collection.bulk_write(ops, ordered=False)
+    collection.delete_many({"_id": {"$nin": list(per_event)}})
+    log(f"event_stats rebuilt for {len(ops)} events")
+    return len(ops)
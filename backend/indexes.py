@@ -0,0 +1,127 @@
+"""Build and sync the indexes declared in models.py.
+
+Models turn off mongoengine's auto_create_index so no web worker ever blocks
+on an index build. Run this once per deploy, before starting the server:
+
+    flask --app app sync-indexes            # build missing indexes
+    flask --app app sync-indexes --drop-extra   # also drop undeclared ones
+
+Builds use background=True so a live database keeps serving reads/writes.
+
+A unique index cannot be built over rows that already break it, so before
+building one the collection's duplicates are merged (see DEDUPE). Until the
+unique indexes exist, /api/health/ready answers 503 and the write paths
+that rely on them check for duplicates themselves (`enforces_unique`).
+"""
+import threading
+import time
+
+from pymongo.errors import OperationFailure
+
+from migrations import dedupe_jobs, dedupe_registrations
+from models import User, Venue, VenueDay, Event, Participant, EventRegistration, Job, Tombstone
+
+DOCUMENTS = (User, Venue, VenueDay, Event, Participant, EventRegistration, Job, Tombstone)
+
+# Merges duplicates that would fail a collection's unique index build
+DEDUPE = {EventRegistration: dedupe_registrations, Job: dedupe_jobs}
+
+# How long a "still missing" answer is trusted before listIndexes runs again
+RECHECK_SECONDS = 30
+
+
+def _missing_unique(doc):
+    """Declared unique indexes of `doc` that the database does not have."""
+    existing = {
+        tuple(info["key"]) for info in doc._get_collection().index_information().values()
+        if info.get("unique")
+    }
+    return [spec["fields"] for spec in doc._meta["index_specs"]
+            if spec.get("unique") and tuple(spec["fields"]) not in existing]
+
+
+class UniqueIndexCheck:
+    """Per-process memo of which collections have their unique indexes.
+
+    Once a collection's are found they are assumed to stay; a miss is
+    re-checked at most every RECHECK_SECONDS.
+    """
+
+    def __init__(self):
+        self._verified = set()
+        self._missing = {}  # collection name -> (checked at, missing specs)
+        self._lock = threading.Lock()
+
+    def missing(self, doc):
+        name = doc._get_collection_name()
+        if name in self._verified:
+            return []
+        with self._lock:
+            checked_at, missing = self._missing.get(name, (None, None))
+        if checked_at is None or time.monotonic() - checked_at > RECHECK_SECONDS:
+            missing = _missing_unique(doc)
+            with self._lock:
+                if missing:
+                    self._missing[name] = (time.monotonic(), missing)
+                else:
+                    self._missing.pop(name, None)
+                    self._verified.add(name)
+        return missing
+
+    def verified(self, doc):
+        """True once `doc`'s unique indexes were found; never touches the database."""
+        return doc._get_collection_name() in self._verified
+
+    def forget(self):
+        with self._lock:
+            self._verified.clear()
+            self._missing.clear()
+
+
+unique_indexes = UniqueIndexCheck()
+
+
+def enforces_unique(doc):
+    """True when `doc`'s unique indexes exist, so inserts can rely on them."""
+    return not unique_indexes.missing(doc)
+
+
+def missing_unique(documents=DOCUMENTS):
+    """"collection: fields" for every declared unique index not yet built."""
+    return [f"{doc._get_collection_name()}: {fields}"
+            for doc in documents for fields in unique_indexes.missing(doc)]
+
+
+def sync_indexes(drop_extra=False, log=print):
+    """Create missing indexes (and optionally drop extra ones).
+
+    Returns True when every collection ended up matching its declaration.
+    """
+    ok = True
+    for doc in DOCUMENTS:
+        collection = doc._get_collection()
+        diff = doc.compare_indexes()
+
+        if doc in DEDUPE and _missing_unique(doc):
+            DEDUPE[doc](log=log)
+
+        for spec in diff["missing"]:
+            if spec == [("_id", 1)]:
+                continue  # created with the collection
+            log(f"{collection.name}: building {spec}")
+        try:
+            doc.ensure_indexes()
+        except OperationFailure as e:
+            # Typically a unique index over data that already has duplicates
+            log(f"{collection.name}: index build failed: {e}")
+            ok = False
+
+        for spec in diff["extra"]:
+            if drop_extra:
+                log(f"{collection.name}: dropping {spec}")
+                collection.drop_index(spec)
+            else:
+                log(f"{collection.name}: undeclared index {spec} (use --drop-extra to remove)")
+
+    unique_indexes.forget()
+    return ok
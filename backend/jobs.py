@@ -0,0 +1,243 @@
+"""Small MongoDB-backed job runner for work that should not block a request.
+
+Jobs are documents in the `jobs` collection. Worker threads claim the next
+due job with one atomic find-and-modify that also sets a lease
+(`locked_until`); a job whose worker died is picked up again once its lease
+runs out, so handlers are written to be safely re-run. Failed jobs are
+retried with backoff up to MAX_ATTEMPTS.
+
+Handlers work in batches of BATCH_SIZE so a large cascade never holds a
+long-running operation open:
+
+- delete_event:        an event's registrations and stats
+- delete_user:         an organizer's events (their registrations and venue
+                       bookings), and the user's links from participants
+- delete_participant:  a participant's registrations, giving their seats back
+- reconcile_counts:    fixes Event.registrations_count drift; periodic
+
+Web workers start JOB_WORKERS threads each on their first request (0 turns
+them off); `flask --app app run-jobs` runs a dedicated worker process.
+"""
+import logging
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+
+from mongoengine import NotUniqueError
+from mongoengine.queryset.visitor import Q
+from pymongo import UpdateOne
+
+from background import PerProcess, start_thread
+from bookings import release
+from cache import response_cache
+from event_stats import counted_profile, drop_stats, record
+from indexes import enforces_unique
+from models import Event, EventRegistration, Job, Participant, SEAT_STATUSES
+from sync import bury
+
+log = logging.getLogger(__name__)
+
+BATCH_SIZE = 500
+LEASE = timedelta(minutes=5)
+MAX_ATTEMPTS = 5
+IDLE_SLEEP = 1.0
+
+HANDLERS = {}
+
+
+def handler(kind):
+    def register(fn):
+        HANDLERS[kind] = fn
+        return fn
+    return register
+
+
+def enqueue(kind, dedupe_key=None, run_after=None, **params):
+    """Queue a job; returns it, or None if a job with `dedupe_key` is pending."""
+    # The unique dedupe_key index makes this atomic; without it, look first
+    if dedupe_key and not enforces_unique(Job) and Job.objects(dedupe_key=dedupe_key).only("id").first():
+        return None
+    job = Job(kind=kind, params=params, dedupe_key=dedupe_key,
+              run_after=run_after or datetime.utcnow())
+    try:
+        return job.save()
+    except NotUniqueError:
+        return None
+
+
+def claim():
+    """Atomically take the next due job (or an abandoned one).
+
+    Claiming frees the dedupe key, so a singleton job can queue its own
+    successor while it runs.
+    """
+    now = datetime.utcnow()
+    return Job.objects(
+        Q(status="queued", run_after__lte=now) | Q(status="running", locked_until__lt=now)
+    ).order_by("run_after").modify(
+        set__status="running", set__locked_until=now + LEASE, inc__attempts=1,
+        unset__dedupe_key=True, new=True
+    )
+
+
+def run_one():
+    """Claim and run one job; returns False when nothing was due."""
+    job = claim()
+    if not job:
+        return False
+
+    try:
+        HANDLERS[job.kind](**job.params)
+    except Exception as e:
+        log.exception("Job %s (%s) failed, attempt %d", job.id, job.kind, job.attempts)
+        if job.attempts >= MAX_ATTEMPTS:
+            job.update(set__status="failed", set__error=str(e), set__finished_at=datetime.utcnow())
+        else:
+            backoff = timedelta(seconds=2 ** job.attempts)
+            job.update(set__status="queued", set__error=str(e),
+                       set__run_after=datetime.utcnow() + backoff)
+        return True
+
+    job.update(set__status="done", set__finished_at=datetime.utcnow())
+    return True
+
+
+class JobRunner:
+    def __init__(self):
+        self.workers = 2
+        self.reconcile_interval = 600
+        self._threads = PerProcess(self._start)
+
+    def configure(self, config):
+        self.workers = config["JOB_WORKERS"]
+        self.reconcile_interval = config["RECONCILE_INTERVAL_SECONDS"]
+
+    def ensure_started(self):
+        """before_request hook: start this process's worker threads once."""
+        if self.workers:
+            self._threads.ensure()
+
+    def _start(self):
+        schedule_reconcile(0)
+        for n in range(self.workers):
+            start_thread(self.work, f"jobs-{n}")
+
+    def work(self, stop=None):
+        while not (stop and stop.is_set()):
+            try:
+                if not run_one():
+                    time.sleep(IDLE_SLEEP)
+            except Exception:
+                # e.g. MongoDB unreachable; keep the thread alive
+                log.exception("Job worker error")
+                time.sleep(IDLE_SLEEP)
+
+
+job_runner = JobRunner()
+
+
+def schedule_reconcile(delay, suspects=None):
+    enqueue("reconcile_counts", dedupe_key="reconcile_counts",
+            run_after=datetime.utcnow() + timedelta(seconds=delay),
+            suspects=suspects or {})
+
+
+# -------------------------
+# Cascades
+# -------------------------
+def _delete_registrations(query, department=None, year=None):
+    """Delete matching registrations in batches, giving their seats back.
+
+    All matches belong to one participant, whose department/year are given;
+    they are used for registrations saved before counted_as existed.
+    """
+    while True:
+        batch = list(EventRegistration.objects(**query).only("event_id", "status", "counted_as")
+                     .limit(BATCH_SIZE).as_pymongo())
+        if not batch:
+            return
+        EventRegistration.objects(id__in=[r["_id"] for r in batch]).delete()
+        bury(EventRegistration, [(r["_id"], r["event_id"]) for r in batch])
+        record((r["event_id"], r.get("status"), *counted_profile(r, (department, year)), -1) for r in batch)
+        seats = Counter(r["event_id"] for r in batch if r.get("status") in SEAT_STATUSES)
+        for event_id, count in seats.items():
+            Event.release_seats(event_id, count)
+        if seats:
+            response_cache.bump("events")
+
+
+@handler("delete_event")
+def delete_event_cascade(event_id):
+    # The event itself is gone, so there are no seats to give back
+    while True:
+        ids = list(EventRegistration.objects(event_id=event_id).limit(BATCH_SIZE).scalar("id"))
+        if not ids:
+            drop_stats([event_id])
+            return
+        EventRegistration.objects(id__in=ids).delete()
+        bury(EventRegistration, [(reg_id, event_id) for reg_id in ids])
+
+
+@handler("delete_user")
+def delete_user_cascade(user_id):
+    while True:
+        events = list(Event.objects(organizer_id=user_id).only("venue_id", "date")
+                      .limit(BATCH_SIZE).as_pymongo())
+        if not events:
+            break
+        event_ids = [e["_id"] for e in events]
+        for event_id in event_ids:
+            delete_event_cascade(event_id)
+        Event.objects(id__in=event_ids).delete()
+        for e in events:
+            release(e["venue_id"], e["date"], e["_id"])
+        bury(Event, [(event_id, user_id) for event_id in event_ids])
+        response_cache.bump("events")
+    Participant.objects(user_id=user_id).update(unset__user_id=True)
+
+
+@handler("delete_participant")
+def delete_participant_cascade(participant_id, department=None, year=None):
+    _delete_registrations({"participant_id": participant_id}, department, year)
+
+
+# -------------------------
+# registrations_count reconciliation
+# -------------------------
+@handler("reconcile_counts")
+def reconcile_counts(suspects=None):
+    """Compare every event's counter with its seat-holding registrations.
+
+    A registration takes its seat just before its row is inserted, so a
+    single pass can catch a counter that is briefly (and correctly) ahead.
+    Mismatches are only fixed when the next run sees the same counter and
+    the same real count again; the fix is conditional on the counter not
+    having moved in between. Reschedules itself.
+    """
+    suspects = suspects or {}
+    real = {
+        row["_id"]: row["count"] for row in EventRegistration.objects(
+            status__in=SEAT_STATUSES
+        ).aggregate([{"$group": {"_id": "$event_id", "count": {"$sum": 1}}}])
+    }
+
+    mismatched, fixes = {}, []
+    for e in Event.objects.only("registrations_count").as_pymongo():
+        stored, actual = e.get("registrations_count", 0), real.get(e["_id"], 0)
+        if stored == actual:
+            continue
+        key = str(e["_id"])
+        if suspects.get(key) == [stored, actual]:
+            fixes.append(UpdateOne(
+                {"_id": e["_id"], "registrations_count": stored},
+                {"$set": {"registrations_count": actual, "updated_at": datetime.utcnow()}}
+            ))
+        else:
+            mismatched[key] = [stored, actual]
+
+    if fixes:
+        fixed = Event._get_collection().bulk_write(fixes, ordered=False).modified_count
+        log.warning("Reconciled registrations_count on %d events", fixed)
+        response_cache.bump("events")
+
+    schedule_reconcile(job_runner.reconcile_interval, mismatched)
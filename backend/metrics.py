@@ -0,0 +1,184 @@
+"""Per-route request and MongoDB metrics, exposed at /metrics.
+
+A pymongo CommandListener counts and times every command and charges it to
+the Flask endpoint whose request issued it (pymongo calls listeners on the
+issuing thread, inside the request context). After each request the route's
+latency, command count and command time are folded into histograms, and a
+request that issues more than QUERY_BUDGET commands is logged as a likely
+N+1 query loop.
+
+/metrics serves everything in the Prometheus text format. Counters live in
+process memory, so with several gunicorn workers each scrape reflects the
+worker that answered it.
+"""
+import threading
+import time
+from collections import defaultdict
+
+from flask import Response, current_app, g, has_request_context, request
+from pymongo import monitoring
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (1, 2, 3, 5, 10, 20, 50, 100, 250)
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.total = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+        self.total += 1
+        self.sum += value
+
+
+class Registry:
+    def __init__(self):
+        self.requests = defaultdict(int)                                     # (endpoint, method, status)
+        self.latency = defaultdict(lambda: Histogram(LATENCY_BUCKETS))       # endpoint
+        self.queries = defaultdict(lambda: Histogram(QUERY_COUNT_BUCKETS))   # endpoint
+        self.commands = defaultdict(int)                                     # (endpoint, command)
+        self.command_seconds = defaultdict(float)                            # endpoint
+        self.command_failures = defaultdict(int)                             # (endpoint, command)
+        self.budget_exceeded = defaultdict(int)                              # endpoint
+        self._lock = threading.Lock()
+
+    def command(self, endpoint, name, seconds, failed):
+        with self._lock:
+            self.commands[endpoint, name] += 1
+            self.command_seconds[endpoint] += seconds
+            if failed:
+                self.command_failures[endpoint, name] += 1
+
+    def request(self, endpoint, method, status, seconds, queries, over_budget):
+        with self._lock:
+            self.requests[endpoint, method, status] += 1
+            self.latency[endpoint].observe(seconds)
+            self.queries[endpoint].observe(queries)
+            if over_budget:
+                self.budget_exceeded[endpoint] += 1
+
+    def render(self):
+        lines = []
+
+        def family(name, kind, help_text):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+
+        def histogram(name, series):
+            for endpoint, h in sorted(series.items()):
+                for bound, count in zip(h.buckets, h.counts):
+                    lines.append(f'{name}_bucket{{endpoint="{endpoint}",le="{bound}"}} {count}')
+                lines.append(f'{name}_bucket{{endpoint="{endpoint}",le="+Inf"}} {h.total}')
+                lines.append(f'{name}_sum{{endpoint="{endpoint}"}} {h.sum}')
+                lines.append(f'{name}_count{{endpoint="{endpoint}"}} {h.total}')
+
+        with self._lock:
+            family("http_requests_total", "counter", "Requests handled, by endpoint, method and status.")
+            for (endpoint, method, status), n in sorted(self.requests.items()):
+                lines.append(f'http_requests_total{{endpoint="{endpoint}",method="{method}",status="{status}"}} {n}')
+
+            family("http_request_duration_seconds", "histogram", "Request latency by endpoint.")
+            histogram("http_request_duration_seconds", self.latency)
+
+            family("mongo_commands_per_request", "histogram", "MongoDB commands issued per request.")
+            histogram("mongo_commands_per_request", self.queries)
+
+            family("mongo_commands_total", "counter", "MongoDB commands by endpoint and command name.")
+            for (endpoint, name), n in sorted(self.commands.items()):
+                lines.append(f'mongo_commands_total{{endpoint="{endpoint}",command="{name}"}} {n}')
+
+            family("mongo_command_failures_total", "counter", "Failed MongoDB commands.")
+            for (endpoint, name), n in sorted(self.command_failures.items()):
+                lines.append(f'mongo_command_failures_total{{endpoint="{endpoint}",command="{name}"}} {n}')
+
+            family("mongo_command_seconds_total", "counter", "Time spent in MongoDB commands by endpoint.")
+            for endpoint, seconds in sorted(self.command_seconds.items()):
+                lines.append(f'mongo_command_seconds_total{{endpoint="{endpoint}"}} {seconds}')
+
+            family("mongo_query_budget_exceeded_total", "counter", "Requests over QUERY_BUDGET (likely N+1).")
+            for endpoint, n in sorted(self.budget_exceeded.items()):
+                lines.append(f'mongo_query_budget_exceeded_total{{endpoint="{endpoint}"}} {n}')
+
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+
+def _endpoint():
+    return request.endpoint or "unmatched"
+
+
+class QueryListener(monitoring.CommandListener):
+    """Charges each MongoDB command to the current request, if any."""
+
+    def started(self, event):
+        pass
+
+    def _finish(self, event, failed):
+        seconds = event.duration_micros / 1e6
+        if has_request_context():
+            g.mongo_commands = g.get("mongo_commands", 0) + 1
+            g.mongo_seconds = g.get("mongo_seconds", 0.0) + seconds
+            endpoint = _endpoint()
+        else:
+            endpoint = "background"
+        registry.command(endpoint, event.command_name, seconds, failed)
+
+    def succeeded(self, event):
+        self._finish(event, False)
+
+    def failed(self, event):
+        self._finish(event, True)
+
+
+_listener = None
+
+
+def init_metrics(app):
+    """Register the listener, request hooks and /metrics on `app`.
+
+    Must run before init_db: pymongo only attaches globally registered
+    listeners to clients created afterwards.
+    """
+    global _listener
+    if _listener is None:
+        _listener = QueryListener()
+        monitoring.register(_listener)
+    app.before_request(_start_request)
+    app.after_request(_finish_request)
+    app.add_url_rule("/metrics", "metrics", metrics_view)
+
+
+def _start_request():
+    g.request_started = time.perf_counter()
+    g.mongo_commands = 0
+    g.mongo_seconds = 0.0
+
+
+def _finish_request(response):
+    started = g.get("request_started")
+    if started is None:
+        return response
+    endpoint = _endpoint()
+    queries = g.get("mongo_commands", 0)
+    budget = current_app.config["QUERY_BUDGET"]
+    over_budget = queries > budget
+    if over_budget:
+        current_app.logger.warning(
+            "Possible N+1: %s %s issued %d MongoDB commands (budget %d, %.1f ms in MongoDB)",
+            request.method, request.path, queries, budget, g.get("mongo_seconds", 0.0) * 1000
+        )
+    registry.request(endpoint, request.method, response.status_code,
+                     time.perf_counter() - started, queries, over_budget)
+    return response
+
+
+def metrics_view():
+    return Response(registry.render(), mimetype="text/plain; version=0.0.4")
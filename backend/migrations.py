@@ -0,0 +1,265 @@
+"""Online data migrations.
+
+Each migration walks its collection in `_id` order, one batch at a time, and
+records the last `_id` it finished in the `migrations` collection. It can run
+against a live database, be interrupted at any point, and pick up where it
+stopped on the next run:
+
+    flask --app app migrate-event-datetimes [--batch-size 500] [--restart]
+    flask --app app link-participants [--batch-size 500] [--restart]
+    flask --app app backfill-search-keys [--batch-size 500] [--restart]
+    flask --app app normalize-user-emails [--batch-size 500] [--restart]
+    flask --app app backfill-counted-as [--batch-size 500] [--restart]
+
+`dedupe_registrations` and `dedupe_jobs` clear duplicates that would stop a
+unique index from building; `flask --app app sync-indexes` runs them first.
+"""
+from datetime import datetime
+
+from pymongo import UpdateOne
+from mongoengine.connection import get_db
+
+from cache import response_cache
+from event_stats import counted_as, counted_profile, participant_profile, record
+from models import (
+    Event, EventRegistration, Job, Participant, User, SEAT_STATUSES,
+    normalize_email, parse_schedule, search_keys
+)
+from sync import bury
+
+
+def _state():
+    return get_db()["migrations"]
+
+
+def _run(name, collection, projection, update_for, batch_size, restart, log, query=None):
+    """Walk `collection` in _id order, saving progress under `name`.
+
+    `update_for(doc)` returns an UpdateOne for the document or None to skip
+    it. Returns (updated, skipped) counts for this run.
+    """
+    state = _state()
+    if restart:
+        state.delete_one({"_id": name})
+    last_id = (state.find_one({"_id": name}) or {}).get("last_id")
+
+    updated = skipped = 0
+    while True:
+        batch_query = dict(query or {})
+        if last_id:
+            batch_query["_id"] = {"$gt": last_id}
+        batch = list(collection.find(batch_query, projection).sort("_id", 1).limit(batch_size))
+        if not batch:
+            break
+
+        ops = []
+        for doc in batch:
+            op = update_for(doc)
+            if op is None:
+                skipped += 1
+            else:
+                ops.append(op)
+
+        if ops:
+            collection.bulk_write(ops, ordered=False)
+            updated += len(ops)
+
+        last_id = batch[-1]["_id"]
+        state.update_one({"_id": name}, {"$set": {"last_id": last_id}}, upsert=True)
+        log(f"{name}: {updated} updated, up to {last_id}")
+
+    return updated, skipped
+
+
+def migrate_event_datetimes(batch_size=500, restart=False, log=print):
+    """Backfill Event.starts_at/ends_at from the date/start_time/end_time strings.
+
+    Returns (converted, skipped) counts for this run. Events whose strings do
+    not parse are left alone and reported.
+    """
+    def update_for(doc):
+        try:
+            starts_at, ends_at = parse_schedule(
+                doc.get("date"), doc.get("start_time"), doc.get("end_time")
+            )
+        except (TypeError, ValueError):
+            log(f"event {doc['_id']}: cannot parse {doc.get('date')!r} "
+                f"{doc.get('start_time')!r}-{doc.get('end_time')!r}, skipped")
+            return None
+        return UpdateOne(
+            {"_id": doc["_id"]},
+            {"$set": {"starts_at": starts_at, "ends_at": ends_at}}
+        )
+
+    return _run("event_datetimes", Event._get_collection(),
+                {"date": 1, "start_time": 1, "end_time": 1},
+                update_for, batch_size, restart, log)
+
+
+def link_participants(batch_size=500, restart=False, log=print):
+    """Backfill Participant.user_id by matching email, then reg_no.
+
+    Both sides are compared case-insensitively, so a student who signed up
+    as "Ana@X.com" and registered as "ana@x.com" is linked. Participants
+    already linked are not touched; without --restart a rerun only looks at
+    participants created since the last run. Returns (linked, unmatched).
+    """
+    by_email, by_reg_no = {}, {}
+    for u in User._get_collection().find({}, {"email": 1, "reg_no": 1}):
+        if u.get("email"):
+            by_email[u["email"].strip().lower()] = u["_id"]
+        if u.get("reg_no"):
+            by_reg_no[u["reg_no"].strip().upper()] = u["_id"]
+
+    def update_for(doc):
+        user_id = (by_email.get((doc.get("email") or "").strip().lower())
+                   or by_reg_no.get((doc.get("reg_no") or "").strip().upper()))
+        if not user_id:
+            return None
+        return UpdateOne({"_id": doc["_id"]}, {"$set": {"user_id": user_id}})
+
+    return _run("participant_users", Participant._get_collection(),
+                {"email": 1, "reg_no": 1}, update_for, batch_size, restart, log,
+                query={"user_id": None})
+
+
+def normalize_user_emails(batch_size=500, restart=False, log=print):
+    """Lower-case User.email on rows saved before User.clean() did it.
+
+    Sign-ups are linked to accounts by exact email, so a mixed-case account
+    would never be found. Each fixed account also claims the unlinked
+    participants with its email. An account whose lower-cased email already
+    belongs to another one is reported and left alone. Returns
+    (updated, skipped) counts for this run.
+    """
+    users = User._get_collection()
+
+    def update_for(doc):
+        email = normalize_email(doc.get("email"))
+        if not email or email == doc.get("email"):
+            return None
+        if users.find_one({"email": email, "_id": {"$ne": doc["_id"]}}, {"_id": 1}):
+            log(f"user {doc['_id']}: {email} belongs to another account, skipped")
+            return None
+        Participant._get_collection().update_many(
+            {"email": email, "user_id": None}, {"$set": {"user_id": doc["_id"]}}
+        )
+        keys = search_keys(doc.get("name"), email, doc.get("reg_no"))
+        return UpdateOne({"_id": doc["_id"]}, {"$set": {
+            "email": email, "search_keys": keys, "updated_at": datetime.utcnow()
+        }})
+
+    return _run("user_emails", users, {"name": 1, "email": 1, "reg_no": 1},
+                update_for, batch_size, restart, log)
+
+
+def backfill_search_keys(batch_size=500, restart=False, log=print):
+    """Fill Participant.search_keys and User.search_keys for older rows.
+
+    Only rows without the field are touched; every write path keeps it up to
+    date afterwards. Returns (updated, skipped) over both collections.
+    """
+    def update_for(doc):
+        keys = search_keys(doc.get("name"), doc.get("email"), doc.get("reg_no"))
+        return UpdateOne({"_id": doc["_id"]}, {"$set": {"search_keys": keys}})
+
+    updated = skipped = 0
+    for name, document in (("participant_search_keys", Participant), ("user_search_keys", User)):
+        u, s = _run(name, document._get_collection(), {"name": 1, "email": 1, "reg_no": 1},
+                    update_for, batch_size, restart, log,
+                    query={"search_keys": {"$exists": False}})
+        updated += u
+        skipped += s
+    return updated, skipped
+
+
+def backfill_counted_as(batch_size=500, restart=False, log=print):
+    """Fill EventRegistration.counted_as on registrations saved before it existed.
+
+    Each gets its participant's current department and year; run
+    `rebuild-event-stats` afterwards so the counters agree with it. Returns
+    (updated, skipped) counts for this run.
+    """
+    profiles = {}  # participant id -> (department, year), for this run
+
+    def update_for(doc):
+        participant_id = doc["participant_id"]
+        if participant_id not in profiles:
+            if len(profiles) >= 10_000:
+                profiles.clear()
+            profiles[participant_id] = participant_profile(participant_id)
+        # Registrations counted since the batch was read keep their own value
+        return UpdateOne({"_id": doc["_id"], "counted_as": None},
+                         {"$set": {"counted_as": counted_as(*profiles[participant_id])}})
+
+    return _run("registration_counted_as", EventRegistration._get_collection(),
+                {"participant_id": 1}, update_for, batch_size, restart, log,
+                query={"counted_as": None})
+
+
+# When a participant has several registrations for one event, the one that
+# got furthest is kept, then the earliest
+_KEEP_ORDER = {"Attended": 0, "Registered": 1, "Waitlisted": 2, "Cancelled": 3}
+
+
+def dedupe_registrations(log=print):
+    """Delete all but one registration per (event_id, participant_id).
+
+    The unique index cannot be built while such duplicates exist. Deleted
+    rows give their seats back, leave their stats and get a tombstone.
+    Returns how many were deleted.
+    """
+    collection = EventRegistration._get_collection()
+    groups = collection.aggregate([
+        {"$group": {
+            "_id": {"event": "$event_id", "participant": "$participant_id"},
+            "regs": {"$push": {"_id": "$_id", "status": "$status", "at": "$registration_time",
+                               "counted_as": {"$ifNull": ["$counted_as", None]}}},
+            "n": {"$sum": 1},
+        }},
+        {"$match": {"n": {"$gt": 1}}},
+    ], allowDiskUse=True)
+
+    removed = 0
+    for group in groups:
+        event_id, participant_id = group["_id"]["event"], group["_id"]["participant"]
+        regs = sorted(group["regs"], key=lambda r: (
+            _KEEP_ORDER.get(r.get("status"), len(_KEEP_ORDER)), r.get("at") or datetime.min, r["_id"]
+        ))
+        extra = regs[1:]
+        collection.delete_many({"_id": {"$in": [r["_id"] for r in extra]}})
+        bury(EventRegistration, [(r["_id"], event_id) for r in extra])
+        profile = None if all(r.get("counted_as") for r in extra) else participant_profile(participant_id)
+        record((event_id, r.get("status"), *counted_profile(r, profile), -1) for r in extra)
+        seats = sum(1 for r in extra if r.get("status") in SEAT_STATUSES)
+        if seats:
+            Event.release_seats(event_id, seats)
+        removed += len(extra)
+        log(f"event_registrations: kept {regs[0]['_id']}, removed {len(extra)} duplicates")
+
+    if removed:
+        response_cache.bump("events")
+    log(f"event_registrations: {removed} duplicate registrations removed")
+    return removed
+
+
+def dedupe_jobs(log=print):
+    """Keep only the first pending job per dedupe_key.
+
+    Without the unique index every worker start queued another
+    reconcile_counts. Returns how many were deleted.
+    """
+    collection = Job._get_collection()
+    groups = collection.aggregate([
+        {"$match": {"dedupe_key": {"$ne": None}}},
+        {"$sort": {"run_after": 1, "_id": 1}},
+        {"$group": {"_id": "$dedupe_key", "ids": {"$push": "$_id"}, "n": {"$sum": 1}}},
+        {"$match": {"n": {"$gt": 1}}},
+    ])
+
+    removed = 0
+    for group in groups:
+        # Claiming a job clears its key, so every copy here is still queued
+        removed += collection.delete_many({"_id": {"$in": group["ids"][1:]}}).deleted_count
+    log(f"jobs: {removed} duplicate pending jobs removed")
+    return removed
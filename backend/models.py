@@ -7,10 +7,40 @@ from mongoengine import (
     ReferenceField,
     URLField,
     ObjectIdField,
-    DictField
+    DictField,
+    ListField
 )
+import unicodedata
 from datetime import datetime
 
+# Indexes are declared per model but never built from a web worker: run
+# `flask --app app sync-indexes` (see indexes.py) before the app takes traffic.
+INDEX_META = {
+    'auto_create_index': False,
+    'index_background': True,
+}
+
+
+def normalize_search(value):
+    """Lower-case, accent-free form of a search key or query term."""
+    value = unicodedata.normalize("NFKD", str(value or ""))
+    return "".join(ch for ch in value if not unicodedata.combining(ch)).casefold().strip()
+
+
+def normalize_email(value):
+    """Emails are stored and looked up lower-cased, so sign-ups link to accounts."""
+    return str(value or "").strip().lower()
+
+
+def search_keys(name=None, email=None, reg_no=None):
+    """Keys prefix search matches against: each word of the name, the email and the reg_no.
+
+    Kept in step by clean() on save and by every raw write (search.py).
+    """
+    keys = set(normalize_search(name).split())
+    keys.update(k for k in (normalize_search(email), normalize_search(reg_no)) if k)
+    return sorted(keys)
+
 
 # ✅ USERS COLLECTION
 class User(Document):
@@ -23,11 +53,22 @@ class User(Document):
     year = IntField(required=True)
     phone_number = StringField()
     created_at = DateTimeField(default=datetime.utcnow)
+    updated_at = DateTimeField(default=datetime.utcnow)
+    search_keys = ListField(StringField())  # see search_keys()
 
     meta = {
-        'collection': 'users'
+        'collection': 'users',
+        'indexes': [
+            'updated_at',  # ?since= delta sync (sync.py)
+            'search_keys',  # prefix search (search.py)
+        ],
+        **INDEX_META
     }
 
+    def clean(self):
+        self.email = normalize_email(self.email)
+        self.search_keys = search_keys(self.name, self.email, self.reg_no)
+
 
 # ✅ VENUE COLLECTION
 class Venue(Document):
@@ -41,10 +82,23 @@ class Venue(Document):
     updated_at = DateTimeField(default=datetime.utcnow)
 
     meta = {
-        'collection': 'venues'
+        'collection': 'venues',
+        'indexes': ['updated_at'],
+        **INDEX_META
     }
 
 
+def parse_schedule(date, start_time, end_time):
+    """Turn the YYYY-MM-DD / HH:MM display strings into (starts_at, ends_at).
+
+    The strings are local wall-clock times, so the datetimes are naive local
+    times too. Raises ValueError when the strings do not parse.
+    """
+    starts_at = datetime.strptime(f"{date} {start_time}", "%Y-%m-%d %H:%M")
+    ends_at = datetime.strptime(f"{date} {end_time}", "%Y-%m-%d %H:%M")
+    return starts_at, ends_at
+
+
 # ✅ EVENTS COLLECTION
 class Event(Document):
     organizer_id = ReferenceField(User, required=True)  # FK to User
@@ -59,6 +113,11 @@ class Event(Document):
     start_time = StringField(required=True)
     end_time = StringField(required=True)
 
+    # Native copies of date/start_time/end_time for range queries and sorting;
+    # kept in step by clean(), backfilled by migrations.migrate_event_datetimes
+    starts_at = DateTimeField()
+    ends_at = DateTimeField()
+
     max_participants = IntField(required=True)
     registrations_count = IntField(default=0)
 
@@ -73,7 +132,93 @@ class Event(Document):
     updated_at = DateTimeField(default=datetime.utcnow)
 
     meta = {
-        'collection': 'events'
+        'collection': 'events',
+        'indexes': [
+            ('organizer_id', 'date'),  # organizer dashboard / organizer filter
+            ('category', 'date'),      # catalogue filters, each narrowed by date range
+            ('venue_id', 'date'),  # seeding a VenueDay (bookings.py)
+            ('status', 'date'),
+            'date',
+            'starts_at',  # upcoming / this week
+            'updated_at',  # ?since= delta sync
+            {
+                'fields': ['$title', '$description'],  # free-text ?q= search
+                'default_language': 'english',
+                'weights': {'title': 10, 'description': 2}
+            },
+        ],
+        **INDEX_META
+    }
+
+    def clean(self):
+        try:
+            self.starts_at, self.ends_at = parse_schedule(self.date, self.start_time, self.end_time)
+        except (TypeError, ValueError):
+            self.starts_at = self.ends_at = None
+
+    # Seat accounting is done with conditional atomic updates so concurrent
+    # registrations can never push registrations_count past max_participants.
+    # registrations_count is part of every event response, so moving it also
+    # moves updated_at for ?since= clients.
+    # The raw forms are shared with services.py, which runs them on either driver.
+    @staticmethod
+    def has_seats(count=1):
+        """Raw condition: `count` more registrations still fit."""
+        return {"$expr": {"$lte": [{"$add": ["$registrations_count", count]}, "$max_participants"]}}
+
+    @staticmethod
+    def keeps_seats(count=1):
+        """Raw condition: at least `count` seats are taken, so they can be given back."""
+        return {"registrations_count": {"$gte": count}}
+
+    @staticmethod
+    def move_seats(count):
+        """Raw update taking (count > 0) or giving back (count < 0) seats."""
+        return {"$inc": {"registrations_count": count}, "$set": {"updated_at": datetime.utcnow()}}
+
+    @classmethod
+    def take_seats(cls, event_id, count=1):
+        """Reserve `count` seats; returns False when the event is full."""
+        return bool(cls.objects(id=event_id, __raw__=cls.has_seats(count))
+                    .update_one(__raw__=cls.move_seats(count)))
+
+    @classmethod
+    def take_available_seats(cls, event_id, wanted):
+        """Reserve up to `wanted` seats; returns how many were granted."""
+        while wanted > 0:
+            event = cls.objects(id=event_id).only(
+                "max_participants", "registrations_count"
+            ).first()
+            if not event:
+                return 0
+            grant = min(wanted, event.max_participants - event.registrations_count)
+            if grant <= 0:
+                return 0
+            if cls.take_seats(event_id, grant):
+                return grant
+            # lost a race with another registration; re-read and try again
+        return 0
+
+    @classmethod
+    def release_seats(cls, event_id, count=1):
+        """Give back `count` seats without letting the counter go negative."""
+        return bool(cls.objects(id=event_id, __raw__=cls.keeps_seats(count))
+                    .update_one(__raw__=cls.move_seats(-count)))
+
+
+# ✅ VENUE BOOKINGS, ONE DOCUMENT PER VENUE AND DAY (maintained by bookings.py)
+class VenueDay(Document):
+    venue_id = ObjectIdField(required=True)
+    date = StringField(required=True)  # YYYY-MM-DD, as on Event
+    bookings = ListField(DictField())  # {"event_id", "start", "end" (minutes), "token"}
+
+    meta = {
+        "collection": "venue_days",
+        "indexes": [
+            # one document per venue and day, so one conditional update covers it
+            {"fields": ["venue_id", "date"], "unique": True},
+        ],
+        **INDEX_META
     }
 
 
@@ -84,9 +229,26 @@ class Participant(Document):
     reg_no = StringField()
     department = StringField()
     year = StringField()  # string or int; keep string for safety
+    user_id = ReferenceField(User)  # the account this sign-up belongs to, once known
     created_at = DateTimeField(default=datetime.utcnow)
+    search_keys = ListField(StringField())  # see search_keys()
+
+    meta = {
+        "collection": "participants",
+        "indexes": [
+            {"fields": ["user_id"], "sparse": True},  # student's registered events
+            "reg_no",  # check-in by reg_no (checkin.py)
+            "search_keys",  # prefix search (search.py)
+        ],
+        **INDEX_META
+    }
+
+    def clean(self):
+        self.search_keys = search_keys(self.name, self.email, self.reg_no)
+
+# Registration statuses that occupy a seat in Event.registrations_count
+SEAT_STATUSES = ("Registered", "Attended")
 
-    meta = {"collection": "participants"}
 
 class EventRegistration(Document):
     event_id = ReferenceField('Event', required=True)
@@ -95,5 +257,74 @@ class EventRegistration(Document):
     status = StringField(default="Registered", choices=("Registered","Attended","Cancelled","Waitlisted"))
     team_name = StringField()
     additional_info = DictField()  # shirt size, comments etc.
+    checked_in_at = DateTimeField()  # set with status "Attended" by check-in (checkin.py)
+    counted_as = DictField(default=None)  # {"department", "year"} it is counted under in event_stats
+    updated_at = DateTimeField(default=datetime.utcnow)
+
+    meta = {
+        "collection": "event_registrations",
+        "indexes": [
+            # one registration per participant per event; also serves event_id lookups
+            {"fields": ["event_id", "participant_id"], "unique": True},
+            "participant_id",  # student's registered events
+            ("event_id", "-registration_time", "-id"),  # registrations of one event, newest first
+            ("-registration_time", "-id"),  # all registrations, newest first
+            ("event_id", "updated_at"),  # ?since= delta sync of one event
+            "updated_at",
+        ],
+        **INDEX_META
+    }
+
 
-    meta = {"collection": "event_registrations"}
\ No newline at end of file
+# ✅ PER-EVENT STATISTICS (maintained by event_stats.py)
+class EventStats(Document):
+    id = ObjectIdField(primary_key=True)  # the event's _id
+    total = IntField(default=0)
+    status = DictField()      # status -> registrations
+    department = DictField()  # department -> seat-holding registrations
+    year = DictField()        # year -> seat-holding registrations
+    updated_at = DateTimeField()
+
+    meta = {"collection": "event_stats", **INDEX_META}
+
+
+# ✅ BACKGROUND JOBS (run by jobs.py)
+class Job(Document):
+    kind = StringField(required=True)
+    params = DictField()
+    status = StringField(default="queued", choices=("queued", "running", "done", "failed"))
+    dedupe_key = StringField()  # set while a singleton job is pending
+    attempts = IntField(default=0)
+    run_after = DateTimeField(default=datetime.utcnow)
+    locked_until = DateTimeField()  # a running job whose lease expired is picked up again
+    error = StringField()
+    created_at = DateTimeField(default=datetime.utcnow)
+    finished_at = DateTimeField()
+
+    meta = {
+        "collection": "jobs",
+        "indexes": [
+            ("status", "run_after"),  # next job to claim
+            {"fields": ["dedupe_key"], "unique": True, "sparse": True},
+            {"fields": ["finished_at"], "expireAfterSeconds": 7 * 24 * 3600},  # prune old jobs
+        ],
+        **INDEX_META
+    }
+
+
+# ✅ DELETION MARKERS FOR ?since= CLIENTS (written by sync.bury)
+class Tombstone(Document):
+    collection = StringField(required=True)  # e.g. "events"
+    doc_id = ObjectIdField(required=True)
+    scope = ObjectIdField()  # owning event/organizer, so filtered syncs get only theirs
+    deleted_at = DateTimeField(default=datetime.utcnow)
+
+    meta = {
+        "collection": "tombstones",
+        "indexes": [
+            ("collection", "scope", "deleted_at"),
+            ("collection", "deleted_at"),
+            {"fields": ["deleted_at"], "expireAfterSeconds": 30 * 24 * 3600},  # sync.TOMBSTONE_DAYS
+        ],
+        **INDEX_META
+    }
@@ -0,0 +1,96 @@
+"""Keyset (cursor) pagination shared by the list endpoints.
+
+Clients opt in by sending `?limit=` and/or `?cursor=`; the response then
+carries a `next_cursor` to pass back for the following page (null on the last
+page). Requests without either parameter still get the whole collection so
+the current frontend keeps working until it switches over.
+"""
+import base64
+import json
+from datetime import datetime
+
+from bson import ObjectId
+from flask import request
+from mongoengine.queryset.visitor import Q
+
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 500
+
+
+def encode_cursor(values):
+    raw = json.dumps(values, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        return json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except Exception:
+        raise ValueError("Invalid cursor")
+
+
+def paged():
+    """True when the client asked for a page rather than the full list."""
+    return "limit" in request.args or "cursor" in request.args
+
+
+def _limit():
+    try:
+        limit = int(request.args.get("limit", DEFAULT_LIMIT))
+    except ValueError:
+        raise ValueError("limit must be a number")
+    if limit < 1:
+        raise ValueError("limit must be positive")
+    return min(limit, MAX_LIMIT)
+
+
+def page(qs, time_field=None):
+    """Return (docs, next_cursor) for the page requested in the query string.
+
+    Pages are ordered by `_id` ascending, or newest first by `time_field`
+    with `_id` as the tie-breaker. Either way the next page is a range scan
+    from the last key seen, never a skip(). When the client did not ask for
+    paging, the whole ordered queryset is returned with no cursor. Raises
+    ValueError on a malformed limit or cursor.
+    """
+    order = (f"-{time_field}", "-id") if time_field else ("id",)
+    if not paged():
+        return qs.order_by(*order), None
+
+    limit = _limit()
+    cursor = request.args.get("cursor")
+    cursor = decode_cursor(cursor) if cursor else None
+
+    try:
+        last_id = ObjectId(cursor["id"]) if cursor else None
+        when = datetime.fromisoformat(cursor["t"]) if cursor and time_field else None
+    except Exception:
+        raise ValueError("Invalid cursor")
+
+    if time_field:
+        if cursor:
+            qs = qs.filter(
+                Q(**{f"{time_field}__lt": when}) |
+                Q(**{time_field: when, "id__lt": last_id})
+            )
+    elif cursor:
+        qs = qs.filter(id__gt=last_id)
+
+    docs = list(qs.order_by(*order).limit(limit + 1))
+    if len(docs) <= limit:
+        return docs, None
+
+    docs = docs[:limit]
+    last = docs[-1]
+    key = {"id": str(_value(last, "id"))}
+    if time_field:
+        key["t"] = _value(last, time_field).isoformat()
+    return docs, encode_cursor(key)
+
+
+def _value(doc, field):
+    # Pages may hold Documents or raw as_pymongo() dicts
+    if isinstance(doc, dict):
+        return doc["_id" if field == "id" else field]
+    return getattr(doc, field)
@@ -0,0 +1,250 @@
+"""Admission control for the expensive write routes.
+
+Three checks run before a limited view does any work, per rule ("auth" for
+login/signup, "register" for event registration):
+
+- A token bucket per client: the session's user when there is one,
+  otherwise the remote address. It is sized for a campus NAT
+  (*_CLIENT_RATE_PER_MINUTE) and ignores the request body, so changing
+  the email on every request does not get around it.
+- A tighter token bucket per client and email the request is for
+  (*_RATE_PER_MINUTE), so one client cannot hammer a single account. It
+  is keyed on the client too: a bucket shared by every client would let
+  anyone who knows a user's email keep that user from signing in.
+- A cap on how many limited requests run at once (EXPENSIVE_CONCURRENCY).
+  Requests over it are turned away instead of queueing, so threads stay
+  free for every other route during a burst.
+
+Any check failing answers 429 with Retry-After.
+
+Buckets and the concurrency cap are per worker process unless
+RATE_LIMIT_DIR (or SHARED_STATE_DIR) points at a local directory (e.g. one
+on /dev/shm). Then every worker on the host shares one fixed-size bucket
+file and one set of slot lock files, and the cap holds for the host. Behind
+a reverse proxy, wrap app.wsgi_app in werkzeug's ProxyFix so remote_addr is
+the real client.
+"""
+import fcntl
+import hashlib
+import math
+import os
+import struct
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+
+from flask import g, jsonify, request
+
+from stores import pick_store
+
+
+def _refill(state, rate, burst, now):
+    """Spend one token from a bucket; returns (new state, seconds to wait or 0)."""
+    tokens, last = state or (burst, now)
+    tokens = min(burst, tokens + max(0.0, now - last) * rate)
+    if tokens >= 1:
+        return (tokens - 1, now), 0
+    return (tokens, now), (1 - tokens) / rate
+
+
+class MemoryBucketStore:
+    shared = False
+
+    def __init__(self, max_keys=100_000):
+        self.max_keys = max_keys
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def take(self, key, rate, burst):
+        with self._lock:
+            state, wait = _refill(self._buckets.get(key), rate, burst, time.time())
+            self._buckets[key] = state
+            self._buckets.move_to_end(key)
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+            return wait
+
+
+class FileBucketStore:
+    """Buckets in one file of fixed-size slots, shared by every process on the host.
+
+    A key hashes to a slot holding (key hash, tokens, last refill), which is
+    locked with a byte-range lock while it is updated. Two keys sharing a
+    slot reset each other's bucket, which errs on the side of admitting.
+    """
+
+    shared = True
+    RECORD = struct.Struct("=Qdd")
+
+    def __init__(self, directory, slots=65536):
+        os.makedirs(directory, exist_ok=True)
+        self.slots = slots
+        self.fd = os.open(os.path.join(directory, "ratelimit.buckets"), os.O_RDWR | os.O_CREAT, 0o644)
+        size = slots * self.RECORD.size
+        if os.fstat(self.fd).st_size < size:
+            os.ftruncate(self.fd, size)
+        # fcntl locks are per process; threads of one worker take turns here
+        self._lock = threading.Lock()
+
+    def take(self, key, rate, burst):
+        tag = int.from_bytes(hashlib.blake2b(key.encode(), digest_size=8).digest(), "big")
+        offset = (tag % self.slots) * self.RECORD.size
+        with self._lock:
+            fcntl.lockf(self.fd, fcntl.LOCK_EX, self.RECORD.size, offset)
+            try:
+                stored, tokens, last = self.RECORD.unpack(os.pread(self.fd, self.RECORD.size, offset))
+                state = (tokens, last) if stored == tag else None
+                (tokens, last), wait = _refill(state, rate, burst, time.time())
+                os.pwrite(self.fd, self.RECORD.pack(tag, tokens, last), offset)
+            finally:
+                fcntl.lockf(self.fd, fcntl.LOCK_UN, self.RECORD.size, offset)
+        return wait
+
+
+class MemorySlots:
+    """Concurrency slots of this process."""
+
+    shared = False
+
+    def __init__(self):
+        self._used = 0
+        self._lock = threading.Lock()
+
+    def acquire(self, limit):
+        with self._lock:
+            if self._used >= limit:
+                return None
+            self._used += 1
+            return True
+
+    def release(self, slot):
+        with self._lock:
+            self._used -= 1
+
+
+class FileSlots:
+    """Concurrency slots shared by every process on the host.
+
+    Slot i is an flock on file slot-<i>; holding the open descriptor holds
+    the slot, and the kernel frees it if the process dies.
+    """
+
+    shared = True
+
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def acquire(self, limit):
+        for i in range(limit):
+            fd = os.open(os.path.join(self.directory, f"slot-{i}"), os.O_RDWR | os.O_CREAT, 0o644)
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                return fd
+            except BlockingIOError:
+                os.close(fd)
+        return None
+
+    def release(self, slot):
+        os.close(slot)
+
+
+TOO_MANY = "Too many requests, please retry shortly"
+UNLIMITED = object()  # the slot handed out while limiting is off
+
+
+def retry_after(wait):
+    """Retry-After header value for a wait in seconds."""
+    return str(max(1, math.ceil(wait)))
+
+
+def client_key(session, address):
+    """Who a bucket is for: the signed-in user, else the remote address."""
+    return session["uid"] if session else address
+
+
+def too_many(wait):
+    # Login clients read "message", registration clients read "error"
+    resp = jsonify({"success": False, "error": TOO_MANY, "message": TOO_MANY})
+    resp.status_code = 429
+    resp.headers["Retry-After"] = retry_after(wait)
+    return resp
+
+
+class RateLimiter:
+    def __init__(self, store=None, slots=None):
+        self.store = store or MemoryBucketStore()
+        self.slots = slots or MemorySlots()
+        self.enabled = True
+        # rule -> ((per minute, burst) per client, (per minute, burst) per client and email)
+        self.rules = {"auth": ((60, 20), (10, 5)), "register": ((300, 60), (30, 10))}
+        self.concurrency = 8
+
+    def configure(self, config):
+        self.enabled = config["RATE_LIMIT_ENABLED"]
+        self.rules = {
+            "auth": ((config["AUTH_CLIENT_RATE_PER_MINUTE"], config["AUTH_CLIENT_BURST"]),
+                     (config["AUTH_RATE_PER_MINUTE"], config["AUTH_BURST"])),
+            "register": ((config["REGISTER_CLIENT_RATE_PER_MINUTE"], config["REGISTER_CLIENT_BURST"]),
+                         (config["REGISTER_RATE_PER_MINUTE"], config["REGISTER_BURST"])),
+        }
+        self.concurrency = config["EXPENSIVE_CONCURRENCY"]
+
+    def check(self, rule, client, email=None):
+        """Seconds the client must wait before `rule` admits it, or 0."""
+        if not self.enabled:
+            return 0
+        (client_rate, client_burst), (email_rate, email_burst) = self.rules[rule]
+        wait = self.store.take(f"{rule}:client:{client}", client_rate / 60, client_burst)
+        email = str(email or "").strip().lower()
+        if wait or not email:
+            return wait
+        return self.store.take(f"{rule}:email:{client}:{email}", email_rate / 60, email_burst)
+
+    def acquire(self):
+        """Take a concurrency slot without waiting; None when all are busy."""
+        if not self.enabled:
+            return UNLIMITED
+        return self.slots.acquire(self.concurrency)
+
+    def release(self, slot):
+        if slot is not UNLIMITED:
+            self.slots.release(slot)
+
+    def admit(self, rule, client, email=None):
+        """(slot, 0) when a request may run, else (None, seconds to wait).
+
+        The caller releases the slot once the request is done.
+        """
+        wait = self.check(rule, client, email)
+        if wait:
+            return None, wait
+        slot = self.acquire()
+        return (slot, 0) if slot is not None else (None, 1)
+
+    def limit(self, rule):
+        """Decorator admitting a view through `rule` and the concurrency cap."""
+        def decorator(view):
+            @wraps(view)
+            def wrapper(*args, **kwargs):
+                if request.method == "OPTIONS":
+                    return view(*args, **kwargs)
+                data = request.get_json(silent=True)
+                email = data.get("email") if isinstance(data, dict) else None
+
+                slot, wait = self.admit(rule, client_key(g.get("session"), request.remote_addr), email)
+                if slot is None:
+                    return too_many(wait)
+                try:
+                    return view(*args, **kwargs)
+                finally:
+                    self.release(slot)
+            return wrapper
+        return decorator
+
+
+rate_limiter = RateLimiter(
+    pick_store("RATE_LIMIT_DIR", "ratelimit", MemoryBucketStore, FileBucketStore),
+    pick_store("RATE_LIMIT_DIR", "ratelimit", MemorySlots, FileSlots),
+)
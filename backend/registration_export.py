@@ -0,0 +1,60 @@
+"""Streaming attendee export for one event.
+
+Registrations are read from a server-side cursor and written out one row at
+a time, so memory stays flat however large the event is. Participants are
+resolved per chunk of rows with one query each, not per row.
+"""
+import csv
+import json
+
+from models import Participant, EventRegistration
+from serializers import participant_rows, registration_rows
+
+# Same columns the organizer ParticipantsTable shows
+EXPORT_COLUMNS = (
+    "name", "email", "phone", "reg_no", "department", "year", "registration_time",
+)
+CHUNK_SIZE = 500
+
+
+class _Line:
+    """File-like sink that hands back whatever csv.writer writes."""
+
+    def write(self, value):
+        return value
+
+
+def _export_rows(event_id):
+    regs = registration_rows(EventRegistration.objects(event_id=event_id)).no_cache()
+    chunk = []
+    for r in regs.order_by("registration_time").batch_size(CHUNK_SIZE):
+        chunk.append(r)
+        if len(chunk) >= CHUNK_SIZE:
+            yield from _join(chunk)
+            chunk = []
+    if chunk:
+        yield from _join(chunk)
+
+
+def _join(regs):
+    ids = {r["participant_id"] for r in regs}
+    participants = {p["_id"]: p for p in participant_rows(Participant.objects(id__in=ids))}
+    for r in regs:
+        p = participants.get(r["participant_id"])
+        if not p:
+            continue
+        row = {key: p.get(key) or "" for key in EXPORT_COLUMNS[:-1]}
+        row["registration_time"] = r["registration_time"].isoformat()
+        yield row
+
+
+def stream_csv(event_id):
+    writer = csv.writer(_Line())
+    yield writer.writerow(EXPORT_COLUMNS)
+    for row in _export_rows(event_id):
+        yield writer.writerow([row[key] for key in EXPORT_COLUMNS])
+
+
+def stream_ndjson(event_id):
+    for row in _export_rows(event_id):
+        yield json.dumps(row) + "\n"
@@ -0,0 +1,133 @@
+from collections import Counter
+from datetime import datetime, timezone
+
+from bson import ObjectId
+from flask import Blueprint, request, jsonify
+from flask_cors import cross_origin
+
+from auth import require_session
+from checkin import checkin_desk
+from models import Event
+
+checkin_bp = Blueprint("checkin_bp", __name__, url_prefix="/api/checkin")
+
+MAX_BATCH = 1000
+
+
+def _event_id(event_id):
+    """ObjectId of an existing event, or None."""
+    if not ObjectId.is_valid(event_id):
+        return None
+    event_id = ObjectId(event_id)
+    # A loaded roster already proves the event exists
+    if checkin_desk.has_roster(event_id) or Event.objects(id=event_id).only("id").first():
+        return event_id
+    return None
+
+
+def _scanned_at(value):
+    """Parse a scanner's ISO timestamp into naive UTC; None if absent or bad."""
+    if not value:
+        return None
+    try:
+        at = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    if at.tzinfo:
+        at = at.astimezone(timezone.utc).replace(tzinfo=None)
+    return at
+
+
+def _result(code, result, entry):
+    row = {"code": code, "result": result}
+    if entry:
+        row.update({
+            "registration_id": entry["registration_id"],
+            "name": entry.get("name"),
+            "reg_no": entry.get("reg_no"),
+            "status": entry["status"],
+            "checked_in_at": entry["checked_in_at"].isoformat() if entry.get("checked_in_at") else None,
+        })
+    return row
+
+
+# -------------------------
+# Preload an event's roster (call before doors open)
+# -------------------------
+@checkin_bp.route("/<event_id>/roster", methods=["POST"])
+@cross_origin()
+@require_session("organizer", "admin")
+def load_roster(event_id):
+    event_id = _event_id(event_id)
+    if not event_id:
+        return jsonify({"success": False, "error": "Event not found"}), 404
+    checkin_desk.load(event_id)
+    return jsonify({"success": True, **checkin_desk.summary(event_id)}), 200
+
+
+# -------------------------
+# Check-in progress
+# -------------------------
+@checkin_bp.route("/<event_id>", methods=["GET"])
+@cross_origin()
+@require_session("organizer", "admin")
+def checkin_summary(event_id):
+    event_id = _event_id(event_id)
+    if not event_id:
+        return jsonify({"success": False, "error": "Event not found"}), 404
+    return jsonify({"success": True, **checkin_desk.summary(event_id)}), 200
+
+
+# -------------------------
+# Check one attendee in by registration id, reg_no or email
+# -------------------------
+@checkin_bp.route("/<event_id>", methods=["POST"])
+@cross_origin()
+@require_session("organizer", "admin")
+def check_in(event_id):
+    data = request.get_json() or {}
+    code = str(data.get("code") or "").strip()
+    if not code:
+        return jsonify({"success": False, "error": "code is required"}), 400
+
+    event_id = _event_id(event_id)
+    if not event_id:
+        return jsonify({"success": False, "error": "Event not found"}), 404
+
+    result, entry = checkin_desk.check_in(event_id, code)
+    status = 404 if result == "not_found" else 409 if result == "not_allowed" else 200
+    return jsonify({"success": result in ("checked_in", "already_checked_in"),
+                    **_result(code, result, entry)}), status
+
+
+# -------------------------
+# Batch check-in, e.g. scans queued by a scanner while offline
+# -------------------------
+@checkin_bp.route("/<event_id>/batch", methods=["POST"])
+@cross_origin()
+@require_session("organizer", "admin")
+def check_in_batch(event_id):
+    data = request.get_json() or {}
+    scans = data.get("checkins")
+    if not isinstance(scans, list) or not scans:
+        return jsonify({"success": False, "error": "checkins must be a non-empty list"}), 400
+    if len(scans) > MAX_BATCH:
+        return jsonify({"success": False, "error": f"At most {MAX_BATCH} check-ins per batch"}), 400
+
+    event_id = _event_id(event_id)
+    if not event_id:
+        return jsonify({"success": False, "error": "Event not found"}), 404
+
+    results = []
+    for scan in scans:
+        if isinstance(scan, str):
+            scan = {"code": scan}
+        code = str((scan or {}).get("code") or "").strip() if isinstance(scan, dict) else ""
+        if not code:
+            results.append({"code": None, "result": "invalid"})
+            continue
+        result, entry = checkin_desk.check_in(event_id, code, _scanned_at(scan.get("scanned_at")))
+        results.append(_result(code, result, entry))
+
+    summary = Counter(r["result"] for r in results)
+    return jsonify({"success": True, "summary": summary, "results": results}), 200
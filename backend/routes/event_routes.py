@@ -1,8 +1,16 @@
-from flask import Blueprint, request, jsonify
-from models import Event, User, Venue
+from flask import Blueprint, request, jsonify, g
+from models import Event, EventStats, User, Venue
 from mongoengine import DoesNotExist
 from datetime import datetime
 from flask_cors import cross_origin
+from serializers import EVENT_FIELDS, event_rows, event_dict, requested_fields, sparse
+from cache import response_cache
+from auth import acts_for, forbidden, require_session
+from jobs import enqueue
+from event_stats import stats_dict
+from bookings import book, cancel, normalize_time, release
+from sync import requested_since, changed, bury, sync_fields
+from bson import ObjectId
 event_bp = Blueprint('event_bp', __name__, url_prefix='/api/events')
 
 
@@ -11,32 +19,45 @@ event_bp = Blueprint('event_bp', __name__, url_prefix='/api/events')
 # ------------------------
 @event_bp.route('/organizer/<organizer_id>', methods=['GET'])
 @cross_origin()
+@require_session("organizer", "admin")
 def get_my_events(organizer_id):
+    # The session says who is asking; no User lookup
+    if not acts_for(organizer_id):
+        return forbidden()
+    if not ObjectId.is_valid(organizer_id):
+        return jsonify({"error": "Organizer not found"}), 404
     try:
-        organizer = User.objects.get(id=organizer_id)
-        events = Event.objects(organizer_id=organizer)
-        events_list = []
-        for event in events:
-            events_list.append({
-                "id": str(event.id),
-                "title": event.title,
-                "description": event.description,
-                "category": event.category,
-                "venue": event.venue,
-                "venue_id": str(event.venue_id.id),
-                "date": event.date,
-                "start_time": event.start_time,
-                "end_time": event.end_time,
-                "max_participants": event.max_participants,
-                "registrations_count": event.registrations_count,
-                "status": event.status,
-                "image_url": event.image_url,
-                "phone_number": event.phone_number,
-                "mail_id": event.mail_id,
-            })
+        fields = requested_fields(EVENT_FIELDS)
+        since = requested_since()
+        events = changed(Event.objects(organizer_id=ObjectId(organizer_id)), since)
+        events_list = [sparse(event_dict(e), fields) for e in event_rows(events, fields=fields)]
+        # Delta responses need somewhere to put the tombstones, so they are wrapped
+        if since:
+            return jsonify({"success": True, "events": events_list,
+                            **sync_fields(Event, since, ObjectId(organizer_id))}), 200
         return jsonify(events_list), 200
-    except DoesNotExist:
-        return jsonify({"error": "Organizer not found"}), 404
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+
+def _check_slot(date, start_time, end_time):
+    """Validate a YYYY-MM-DD date and H:MM/HH:MM times; returns the times zero-padded."""
+    try:
+        datetime.strptime(date, "%Y-%m-%d")
+        start_time, end_time = normalize_time(start_time), normalize_time(end_time)
+    except (TypeError, ValueError):
+        raise ValueError("date must be YYYY-MM-DD and times HH:MM")
+    if end_time <= start_time:
+        raise ValueError("end_time must be after start_time")
+    return start_time, end_time
+
+
+def _conflict_response(clash):
+    return jsonify({
+        "success": False,
+        "error": f"Venue is already booked by '{clash['title'] or 'another event'}' "
+                 f"from {clash['start_time']} to {clash['end_time']}"
+    }), 409
 
 
 # ------------------------
@@ -47,11 +68,19 @@ def get_my_events(organizer_id):
 # ------------------------
 @event_bp.route('/', methods=['POST'])
 @cross_origin()
+@require_session("organizer", "admin")
 def create_event():
-    data = request.get_json()
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return jsonify({"success": False, "error": "Request body must be a JSON object"}), 400
+
+    # Organizers create their own events; admins may name the organizer
+    organizer_id = data.get("organizer_id") or g.session["uid"]
+    if not acts_for(organizer_id):
+        return forbidden()
 
     # Required fields
-    required_fields = ["organizer_id", "title", "venue_id", "date", "start_time", "end_time", "max_participants"]
+    required_fields = ["title", "venue_id", "date", "start_time", "end_time", "max_participants"]
 
     # Check if any required field is missing or empty
     missing_fields = [field for field in required_fields if field not in data or not data[field]]
@@ -62,18 +91,33 @@ def create_event():
         }), 400
 
     try:
-        # Fetch organizer and venue
-        organizer = User.objects.get(id=data['organizer_id'])
+        # The session vouches for its own user; the account is only read for
+        # contact defaults the request leaves out, or for another organizer
+        organizer = ObjectId(organizer_id)
+        if organizer_id != g.session["uid"] or 'phone_number' not in data or 'mail_id' not in data:
+            organizer = User.objects.only("reg_no", "email").get(id=organizer_id)
         venue = Venue.objects.get(id=data['venue_id'])
 
+        try:
+            start_time, end_time = _check_slot(data['date'], data['start_time'], data['end_time'])
+        except ValueError as e:
+            return jsonify({"success": False, "error": str(e)}), 400
+
         # Convert max_participants to int safely
         try:
             max_participants = int(data['max_participants'])
         except ValueError:
             return jsonify({"success": False, "error": "max_participants must be a number"}), 400
 
+        # Take the venue slot first; double bookings are rejected atomically (bookings.py)
+        event_id = ObjectId()
+        token, clash = book(venue.id, data['date'], start_time, end_time, event_id)
+        if clash:
+            return _conflict_response(clash)
+
         # Create event
         event = Event(
+            id=event_id,
             organizer_id=organizer,
             title=data['title'],
             description=data.get('description', ''),
@@ -81,16 +125,21 @@ def create_event():
             venue_id=venue,
             venue=venue.venue_name,  # string display
             date=data['date'],
-            start_time=data['start_time'],
-            end_time=data['end_time'],
+            start_time=start_time,
+            end_time=end_time,
             max_participants=max_participants,
             status=data.get('status', 'Green'),
             image_url=data.get('image_url', ''),
-            phone_number=data.get('phone_number', organizer.reg_no),
-            mail_id=data.get('mail_id', organizer.email)
+            phone_number=data['phone_number'] if 'phone_number' in data else organizer.reg_no,
+            mail_id=data['mail_id'] if 'mail_id' in data else organizer.email
         )
 
-        event.save()
+        try:
+            event.save(force_insert=True)
+        except Exception:
+            cancel(venue.id, data['date'], token)
+            raise
+        response_cache.bump("events")
         return jsonify({
             "success": True,
             "message": "Event created successfully",
@@ -105,10 +154,14 @@ def create_event():
 # PUT /api/events/<event_id>
 @event_bp.route('/<event_id>', methods=['PUT'])
 @cross_origin()
+@require_session("organizer", "admin")
 def update_event(event_id):
     data = request.get_json()
     try:
-        event = Event.objects.get(id=event_id)
+        event = Event.objects.no_dereference().get(id=event_id)
+        if not acts_for(event.organizer_id.id):
+            return forbidden()
+        booked = (event.venue_id.id, event.date, event.start_time, event.end_time)
 
         # Update fields if present in request
         event.title = data.get('title', event.title)
@@ -129,8 +182,26 @@ def update_event(event_id):
             event.venue_id = venue
             event.venue = venue.venue_name
 
+        event.start_time, event.end_time = _check_slot(event.date, event.start_time, event.end_time)
+
+        # A moved slot is booked before the old one is let go, so the event
+        # never loses its venue to a concurrent booking
+        token = None
+        if (event.venue_id.id, event.date, event.start_time, event.end_time) != booked:
+            token, clash = book(event.venue_id.id, event.date, event.start_time, event.end_time, event.id)
+            if clash:
+                return _conflict_response(clash)
+
         event.updated_at = datetime.utcnow()
-        event.save()
+        try:
+            event.save()
+        except Exception:
+            if token:
+                cancel(event.venue_id.id, event.date, token)
+            raise
+        if token:
+            release(booked[0], booked[1], event.id, keep=token)
+        response_cache.bump("events")
         return jsonify({"message": "Event updated successfully"}), 200
 
     except Event.DoesNotExist:
@@ -143,10 +214,18 @@ def update_event(event_id):
 # DELETE /api/events/<event_id>
 @event_bp.route('/<event_id>', methods=['DELETE'])
 @cross_origin()
+@require_session("organizer", "admin")
 def delete_event(event_id):
     try:
-        event = Event.objects.get(id=event_id)
+        event = Event.objects.only("organizer_id", "venue_id", "date").no_dereference().get(id=event_id)
+        if not acts_for(event.organizer_id.id):
+            return forbidden()
         event.delete()
+        release(event.venue_id.id, event.date, event.id)
+        bury(Event, [(event.id, event.organizer_id.id)])
+        # Its registrations are removed in the background (jobs.py)
+        enqueue("delete_event", event_id=event.id)
+        response_cache.bump("events")
         return jsonify({"message": "Event deleted successfully"}), 200
     except Event.DoesNotExist:
         return jsonify({"error": "Event not found"}), 404
@@ -158,24 +237,24 @@ def delete_event(event_id):
 @cross_origin()
 def get_event(event_id):
     try:
-        event = Event.objects.get(id=event_id)
-        event_data = {
-            "id": str(event.id),
-            "title": event.title,
-            "description": event.description,
-            "category": event.category,
-            "venue": event.venue,
-            "venue_id": str(event.venue_id.id),
-            "date": event.date,
-            "start_time": event.start_time,
-            "end_time": event.end_time,
-            "max_participants": event.max_participants,
-            "registrations_count": event.registrations_count,
-            "status": event.status,
-            "image_url": event.image_url,
-            "phone_number": event.phone_number,
-            "mail_id": event.mail_id,
-        }
+        fields = requested_fields(EVENT_FIELDS)
+        event = event_rows(Event.objects, fields=fields).get(id=event_id)
+        event_data = sparse(event_dict(event), fields)
         return jsonify({"success": True, "event": event_data}), 200
     except DoesNotExist:
         return jsonify({"success": False, "error": "Event not found"}), 404
+    except ValueError as e:
+        return jsonify({"success": False, "error": str(e)}), 400
+
+# Registration counts by status, department and year (event_stats.py)
+@event_bp.route('/<event_id>/stats', methods=['GET'])
+@cross_origin()
+def get_event_stats(event_id):
+    if not ObjectId.is_valid(event_id):
+        return jsonify({"success": False, "error": "Event not found"}), 404
+
+    doc = EventStats.objects(id=ObjectId(event_id)).as_pymongo().first()
+    # No stats yet just means no registrations, if the event exists
+    if not doc and not Event.objects(id=event_id).only("id").first():
+        return jsonify({"success": False, "error": "Event not found"}), 404
+    return jsonify({"success": True, "stats": stats_dict(doc or {}, event_id)}), 200
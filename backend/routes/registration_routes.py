@@ -1,8 +1,29 @@
-from flask import Blueprint, request, jsonify
-from models import Participant, EventRegistration, Event
-from mongoengine import DoesNotExist
+from collections import Counter
+from bson import ObjectId
+from flask import Blueprint, request, jsonify, Response, current_app
+from models import Participant, EventRegistration, Event, SEAT_STATUSES, normalize_email, search_keys
+from mongoengine import DoesNotExist, NotUniqueError
 from datetime import datetime
 from flask_cors import cross_origin
+from pagination import page, paged
+from cache import response_cache
+from bulk_registration import normalize_participant, read_rows, import_registrations, accounts_for
+from registration_export import stream_csv, stream_ndjson
+from rush import rush_queue
+from jobs import enqueue
+from event_stats import record, counted_profile, move_participant
+from sync import requested_since, changed, bury, sync_fields
+from ratelimit import rate_limiter
+from auth import require_session
+from indexes import enforces_unique
+import services
+from services import run
+from search import search_terms, search_limit, prefix_query
+from serializers import (
+    PARTICIPANT_FIELDS, PARTICIPANT_KEYS, REGISTRATION_KEYS,
+    participant_rows, registration_rows, participant_dict, registration_dict,
+    project, requested_fields, sparse
+)
 
 reg_bp = Blueprint("reg_bp", __name__, url_prefix="/api/registrations")
 
@@ -11,6 +32,7 @@ reg_bp = Blueprint("reg_bp", __name__, url_prefix="/api/registrations")
 # -------------------------
 @reg_bp.route("/register", methods=["POST"])
 @cross_origin()
+@rate_limiter.limit("register")
 def register_event():
     data = request.get_json() or {}
     event_id = data.get("event_id")
@@ -18,58 +40,114 @@ def register_event():
     if not event_id:
         return jsonify({"success": False, "error": "event_id is required"}), 400
 
-    try:
-        event = Event.objects.get(id=event_id)
-    except DoesNotExist:
-        return jsonify({"success": False, "error": "Event not found"}), 404
+    if current_app.config["RUSH_MODE"]:
+        return _queue_registration(event_id, data)
 
-    name = data.get("name", "").strip()
-    email = data.get("email", "").strip().lower()
-    phone = data.get("phone", "").strip()
-    reg_no = data.get("reg_no", "").strip().upper()
-    department = data.get("department", "").strip()
-    year = data.get("year", "").strip()
+    # Shared with the ASGI handler (services.py). The unique index rejects
+    # duplicates atomically; until sync-indexes has built it, look first
+    body, status = run(services.register(data, check_duplicates=not enforces_unique(EventRegistration)))
+    return jsonify(body), status
 
-    if not name or not email:
-        return jsonify({"success": False, "error": "Name and Email are required"}), 400
 
-    # Check or create participant
-    participant = Participant.objects(email=email).first()
-    
-    if not participant:
-        participant = Participant(
-            name=name,
-            email=email,
-            phone=phone,
-            reg_no=reg_no,
-            department=department,
-            year=year
-        )
-        participant.save()
+def _queue_registration(event_id, data):
+    """RUSH_MODE: accept into the write-behind queue and answer 202."""
+    if not ObjectId.is_valid(event_id):
+        return jsonify({"success": False, "error": "Event not found"}), 404
+
+    fields = normalize_participant(data)
+    if not fields["name"] or not fields["email"]:
+        return jsonify({"success": False, "error": "Name and Email are required"}), 400
 
-    # Check duplicate registration
-    existing = EventRegistration.objects(event_id=event, participant_id=participant).first()
-    if existing:
+    status, reg_id = rush_queue.submit(ObjectId(event_id), fields)
+    if status == "missing":
+        return jsonify({"success": False, "error": "Event not found"}), 404
+    if status == "full":
+        return jsonify({"success": False, "error": "Event is full"}), 409
+    if status == "duplicate":
         return jsonify({"success": False, "error": "You have already registered for this event"}), 409
 
-    # Save registration
-    reg = EventRegistration(
-        event_id=event,
-        participant_id=participant,
-        registration_time=datetime.utcnow(),
-        status="Registered"
-    )
-    reg.save()
+    return jsonify({
+        "success": True,
+        "message": "Registration received",
+        "registration_id": str(reg_id),
+        "status": "queued"
+    }), 202
+
+
+# -------------------------
+# Final status of a (possibly queued) registration
+# -------------------------
+@reg_bp.route("/status/<reg_id>", methods=["GET"])
+@cross_origin()
+def registration_status(reg_id):
+    if not ObjectId.is_valid(reg_id):
+        return jsonify({"success": False, "error": "Registration not found"}), 404
+
+    status = rush_queue.status(ObjectId(reg_id))
+    if not status:
+        return jsonify({"success": False, "error": "Registration not found"}), 404
+    return jsonify({"success": True, "registration_id": reg_id, **status}), 200
+
+
+# -------------------------
+# Bulk import (CSV or NDJSON body) for one event
+# -------------------------
+@reg_bp.route("/import", methods=["POST"])
+@cross_origin()
+@require_session("organizer", "admin")
+def import_event_registrations():
+    event_id = request.args.get("event_id")
+    if not event_id:
+        return jsonify({"success": False, "error": "event_id is required"}), 400
+
+    try:
+        event = Event.objects.only("id").get(id=event_id)
+    except DoesNotExist:
+        return jsonify({"success": False, "error": "Event not found"}), 404
 
-    # Update event registration count
-    event.registrations_count = EventRegistration.objects(event_id=event).count()
-    event.save()
+    ndjson = (request.mimetype in ("application/x-ndjson", "application/jsonl")
+              or request.args.get("format") == "ndjson")
+    rows = list(import_registrations(event.id, read_rows(request.stream, ndjson)))
+    response_cache.bump("events")
 
     return jsonify({
         "success": True,
-        "message": "Registration successful!",
-        "registration_id": str(reg.id)
-    }), 201
+        "summary": Counter(r["status"] for r in rows),
+        "rows": rows
+    }), 200
+
+
+# -------------------------
+# Streaming export (CSV or NDJSON) of one event's participants
+# -------------------------
+@reg_bp.route("/export", methods=["GET"])
+@cross_origin()
+@require_session("organizer", "admin")
+def export_event_registrations():
+    event_id = request.args.get("event_id")
+    if not event_id:
+        return jsonify({"success": False, "error": "event_id is required"}), 400
+
+    try:
+        event = Event.objects.only("id").get(id=event_id)
+    except DoesNotExist:
+        return jsonify({"success": False, "error": "Event not found"}), 404
+
+    if request.args.get("format") == "ndjson":
+        body, mimetype, ext = stream_ndjson(event.id), "application/x-ndjson", "ndjson"
+    else:
+        body, mimetype, ext = stream_csv(event.id), "text/csv", "csv"
+
+    return Response(body, mimetype=mimetype, headers={
+        "Content-Disposition": f"attachment; filename=participants-{event.id}.{ext}"
+    })
+
+
+def _participants_for(regs, fields=None):
+    """Load the participants behind a list of raw registrations in one query."""
+    ids = {r["participant_id"] for r in regs}
+    qs = Participant.objects(id__in=ids).only(*project(fields, PARTICIPANT_FIELDS))
+    return {p["_id"]: p for p in qs.as_pymongo()}
 
 
 # -------------------------
@@ -79,44 +157,81 @@ def register_event():
 @cross_origin()
 def list_participants():
     event_id = request.args.get("event_id")
+    if event_id and set(request.args) == {"event_id"}:
+        body, status = run(services.event_participants(event_id))
+        return jsonify(body), status
     if event_id:
         try:
-            event = Event.objects.get(id=event_id)
-            regs = EventRegistration.objects(event_id=event)
-            out = []
-            for r in regs:
-                p = r.participant_id
-                out.append({
-                    "registration_id": str(r.id),
-                    "participant_id": str(p.id),
-                    "name": p.name,
-                    "email": p.email,
-                    "phone": p.phone,
-                    "reg_no": p.reg_no,
-                    "department": p.department,
-                    "year": p.year,
-                    "registration_time": r.registration_time.isoformat(),
-                    "status": r.status,
-                    "team_name": r.team_name,
-                    "additional_info": r.additional_info
-                })
-            return jsonify({"success": True, "rows": out}), 200
+            fields = requested_fields(REGISTRATION_KEYS)
+            since = requested_since()
+            event = Event.objects.only("id").get(id=event_id)
+            regs = changed(EventRegistration.objects(event_id=event), since)
+            regs, next_cursor = page(registration_rows(regs, fields))
+            regs = list(regs)
+            participants = _participants_for(regs, fields)
+            out = [
+                sparse(registration_dict(r, participants[r["participant_id"]]), fields)
+                for r in regs if r["participant_id"] in participants
+            ]
+            body = {"success": True, "rows": out}
+            if paged():
+                body["next_cursor"] = next_cursor
+            if since:
+                body.update(sync_fields(EventRegistration, since, event.id))
+            return jsonify(body), 200
         except DoesNotExist:
             return jsonify({"success": False, "error": "Event not found"}), 404
+        except ValueError as e:
+            return jsonify({"success": False, "error": str(e)}), 400
 
     # all participants
-    parts = Participant.objects()
-    out = [{
-        "participant_id": str(p.id),
-        "name": p.name,
-        "email": p.email,
-        "phone": p.phone,
-        "reg_no": p.reg_no,
-        "department": p.department,
-        "year": p.year,
-        "created_at": p.created_at.isoformat()
-    } for p in parts]
-    return jsonify({"success": True, "participants": out}), 200
+    if request.args.get("since"):
+        return jsonify({"success": False, "error": "since requires event_id"}), 400
+    try:
+        fields = requested_fields(PARTICIPANT_KEYS)
+        parts, next_cursor = page(participant_rows(Participant.objects(), fields))
+    except ValueError as e:
+        return jsonify({"success": False, "error": str(e)}), 400
+
+    out = [sparse(participant_dict(p), fields) for p in parts]
+    body = {"success": True, "participants": out}
+    if paged():
+        body["next_cursor"] = next_cursor
+    return jsonify(body), 200
+
+
+# -------------------------
+# Prefix search over participants (name words, email, reg_no)
+# -------------------------
+@reg_bp.route("/participants/search", methods=["GET"])
+@cross_origin()
+def search_participants():
+    event_id = request.args.get("event_id")
+    try:
+        fields = requested_fields(REGISTRATION_KEYS if event_id else PARTICIPANT_KEYS)
+        terms, limit = search_terms(), search_limit()
+    except ValueError as e:
+        return jsonify({"success": False, "error": str(e)}), 400
+
+    qs = Participant.objects(__raw__=prefix_query(terms))
+    if not event_id:
+        parts = participant_rows(qs.limit(limit), fields)
+        return jsonify({"success": True, "participants": [sparse(participant_dict(p), fields) for p in parts]}), 200
+
+    # Within one event: match among its participants, answer with registration rows
+    if not ObjectId.is_valid(event_id) or not Event.objects(id=event_id).only("id").first():
+        return jsonify({"success": False, "error": "Event not found"}), 404
+    registered = EventRegistration._get_collection().distinct(
+        "participant_id", {"event_id": ObjectId(event_id)}
+    )
+    parts = list(qs.filter(id__in=registered).limit(limit)
+                 .only(*project(fields, PARTICIPANT_FIELDS)).as_pymongo())
+    regs = registration_rows(EventRegistration.objects(
+        event_id=ObjectId(event_id), participant_id__in=[p["_id"] for p in parts]
+    ), fields)
+    people = {p["_id"]: p for p in parts}
+    out = [sparse(registration_dict(r, people[r["participant_id"]]), fields) for r in regs]
+    return jsonify({"success": True, "rows": out}), 200
 
 
 # -------------------------
@@ -148,23 +263,48 @@ def handle_participant(participant_id):
         data = request.get_json() or {}
         try:
             p = Participant.objects.get(id=participant_id)
+            old = (p.department, p.year)
+            new = (data.get("department", p.department), str(data.get("year", p.year)))
+            name, reg_no = data.get("name", p.name), data.get("reg_no", p.reg_no)
+            email = normalize_email(data["email"]) if "email" in data else p.email
+            if not email:
+                return jsonify({"success": False, "error": "Email is required"}), 400
+
+            link = {}
+            if email != p.email:
+                if Participant.objects(email=email, id__ne=p.id).only("id").first():
+                    return jsonify({"success": False, "error": "Another participant has this email"}), 409
+                # Link to the account with the new email, as sign-ups and imports do
+                user_id = accounts_for([email]).get(email)
+                link = {"set__user_id": user_id} if user_id else {"unset__user_id": True}
+
             p.update(
-                set__name=data.get("name", p.name),
-                set__email=data.get("email", p.email),
+                set__name=name,
+                set__email=email,
                 set__phone=data.get("phone", p.phone),
-                set__reg_no=data.get("reg_no", p.reg_no),
+                set__reg_no=reg_no,
                 set__department=data.get("department", p.department),
-                set__year=str(data.get("year", p.year))
+                set__year=new[1],
+                set__search_keys=search_keys(name, email, reg_no),
+                **link
             )
+            # Department/year buckets of their registrations move with them
+            move_participant(p.id, old, new)
+            # Registration rows show participant details, so they changed too
+            EventRegistration.objects(participant_id=p.id).update(set__updated_at=datetime.utcnow())
             return jsonify({"success": True, "message": "Participant updated"}), 200
         except DoesNotExist:
             return jsonify({"success": False, "error": "Participant not found"}), 404
+        except NotUniqueError:
+            return jsonify({"success": False, "error": "Another participant has this email"}), 409
 
     if request.method == "DELETE":
         try:
-            participant = Participant.objects.get(id=participant_id)
-            EventRegistration.objects(participant_id=participant).delete()
+            participant = Participant.objects.only("department", "year").get(id=participant_id)
             participant.delete()
+            # Registrations (and their seats) are released in the background
+            enqueue("delete_participant", participant_id=participant.id,
+                    department=participant.department, year=participant.year)
             return jsonify({"success": True, "message": "Participant and related registrations deleted"}), 200
         except DoesNotExist:
             return jsonify({"success": False, "error": "Participant not found"}), 404
@@ -176,35 +316,39 @@ def handle_participant(participant_id):
 @reg_bp.route("/", methods=["GET"])
 @cross_origin()
 def list_registrations():
+    try:
+        fields = requested_fields(REGISTRATION_KEYS)
+        since = requested_since()
+    except ValueError as e:
+        return jsonify({"success": False, "error": str(e)}), 400
+
     event_id = request.args.get("event_id")
     qs = EventRegistration.objects
     if event_id:
         try:
-            event = Event.objects.get(id=event_id)
+            event = Event.objects.only("id").get(id=event_id)
             qs = qs(event_id=event)
         except DoesNotExist:
             return jsonify({"success": False, "error": "Event not found"}), 404
     
-    regs = qs.order_by('-registration_time')
-    out = []
-    for r in regs:
-        p = r.participant_id
-        out.append({
-            "registration_id": str(r.id),
-            "event_id": str(r.event_id.id) if r.event_id else None,
-            "participant_id": str(p.id),
-            "name": p.name,
-            "email": p.email,
-            "phone": p.phone,
-            "reg_no": p.reg_no,
-            "department": p.department,
-            "year": p.year,
-            "registration_time": r.registration_time.isoformat(),
-            "status": r.status,
-            "team_name": r.team_name,
-            "additional_info": r.additional_info
-        })
-    return jsonify({"success": True, "registrations": out}), 200
+    try:
+        regs, next_cursor = page(registration_rows(changed(qs, since), fields), time_field="registration_time")
+    except ValueError as e:
+        return jsonify({"success": False, "error": str(e)}), 400
+
+    regs = list(regs)
+    participants = _participants_for(regs, fields)
+    out = [
+        sparse({**registration_dict(r, participants[r["participant_id"]]),
+                "event_id": str(r["event_id"]) if r.get("event_id") else None}, fields)
+        for r in regs if r["participant_id"] in participants
+    ]
+    body = {"success": True, "registrations": out}
+    if paged():
+        body["next_cursor"] = next_cursor
+    if since:
+        body.update(sync_fields(EventRegistration, since, event.id if event_id else None))
+    return jsonify(body), 200
 
 
 @reg_bp.route("/<reg_id>", methods=["GET", "PUT", "DELETE"])
@@ -235,27 +379,52 @@ def handle_registration(reg_id):
     if request.method == "PUT":
         data = request.get_json() or {}
         try:
-            r = EventRegistration.objects.get(id=reg_id)
-            r.update(
-                set__status=data.get("status", r.status),
-                set__team_name=data.get("team_name", r.team_name),
-                set__additional_info=data.get("additional_info", r.additional_info)
-            )
-            return jsonify({"success": True, "message": "Registration updated"}), 200
+            r = EventRegistration.objects.no_dereference().get(id=reg_id)
         except DoesNotExist:
             return jsonify({"success": False, "error": "Registration not found"}), 404
 
+        status = data.get("status", r.status)
+        if status not in EventRegistration.status.choices:
+            return jsonify({"success": False, "error": "Invalid status"}), 400
+
+        # Moving in or out of a seat-holding status adjusts the event counter
+        held = r.status in SEAT_STATUSES
+        holds = status in SEAT_STATUSES
+        if holds and not held and not Event.take_seats(r.event_id.id):
+            return jsonify({"success": False, "error": "Event is full"}), 409
+
+        # Only apply the change if nobody changed the status under us
+        updated = EventRegistration.objects(id=r.id, status=r.status).update_one(
+            set__status=status,
+            set__team_name=data.get("team_name", r.team_name),
+            set__additional_info=data.get("additional_info", r.additional_info),
+            set__updated_at=datetime.utcnow()
+        )
+        if not updated:
+            if holds and not held:
+                Event.release_seats(r.event_id.id)
+            return jsonify({"success": False, "error": "Registration was modified, please retry"}), 409
+
+        if held and not holds:
+            Event.release_seats(r.event_id.id)
+        if held != holds:
+            response_cache.bump("events")
+        if status != r.status:
+            profile = counted_profile(r.to_mongo())
+            record([(r.event_id.id, r.status, *profile, -1), (r.event_id.id, status, *profile, 1)])
+        return jsonify({"success": True, "message": "Registration updated"}), 200
+
     if request.method == "DELETE":
-        try:
-            r = EventRegistration.objects.get(id=reg_id)
-            event = r.event_id
-            r.delete()
-            
-            # Update event registration count
-            if event:
-                event.registrations_count = EventRegistration.objects(event_id=event).count()
-                event.save()
-            
-            return jsonify({"success": True, "message": "Registration deleted"}), 200
-        except DoesNotExist:
-            return jsonify({"success": False, "error": "Registration not found"}), 404
\ No newline at end of file
+        # findAndModify removes and returns the document in one step, so the
+        # seat is released exactly once even if two deletes race
+        r = EventRegistration.objects(id=reg_id).no_dereference().modify(remove=True)
+        if not r:
+            return jsonify({"success": False, "error": "Registration not found"}), 404
+        bury(EventRegistration, [(r.id, r.event_id.id)])
+
+        if r.status in SEAT_STATUSES:
+            Event.release_seats(r.event_id.id)
+            response_cache.bump("events")
+        record([(r.event_id.id, r.status, *counted_profile(r.to_mongo()), -1)])
+
+        return jsonify({"success": True, "message": "Registration deleted"}), 200
@@ -1,8 +1,14 @@
-from flask import Blueprint, request, jsonify
-from models import User, Event, EventRegistration, Participant
-from mongoengine import DoesNotExist
-from datetime import datetime
+from flask import Blueprint, request, jsonify, g
+from models import User, Event, EventRegistration, Participant, search_keys
+from datetime import datetime, timedelta
 from bson import ObjectId
+from pagination import page, paged
+from serializers import EVENT_FIELDS, event_rows, event_dict, event_fields, project, requested_fields, sparse
+from cache import response_cache
+from auth import acts_for, forbidden, require_session
+from sync import requested_since, changed, sync_fields
+import services
+from services import run
 
 student_bp = Blueprint('student_bp', __name__, url_prefix='/api/student')
 
@@ -11,88 +17,139 @@ student_bp = Blueprint('student_bp', __name__, url_prefix='/api/student')
 # Get all registered events for a student
 # ============================================
 @student_bp.route('/registered-events/<student_id>', methods=['GET'])
+@require_session()
 def get_registered_events(student_id):
     """
     Get all events that a student has registered for
     """
-    try:
-        student = User.objects.get(id=student_id)
-    except DoesNotExist:
+    # The session says who is asking; no User lookup
+    if not acts_for(student_id):
+        return forbidden()
+    if not ObjectId.is_valid(student_id):
         return jsonify({"success": False, "error": "Student not found"}), 404
 
     try:
-        # ✅ Step 1: Get participant by email
-        participant = Participant.objects(email=student.email).first()
+        fields = requested_fields(REGISTERED_EVENT_KEYS)
+    except ValueError as e:
+        return jsonify({"success": False, "error": str(e)}), 400
 
-        if not participant:
-            return jsonify({"success": True, "events": []}), 200
+    try:
+        # Participants linked to the account -> registrations -> events, one round trip
+        rows = Participant.objects(user_id=ObjectId(student_id)).aggregate(
+            _registered_events_pipeline(fields)
+        )
+
+        events_list = [sparse({
+            "registration_id": str(row["reg"]["_id"]),
+            "event_id": str(row["event"]["_id"]),
+            **event_fields(row["event"]),
+            "registration_status": row["reg"].get("status"),
+            "registration_time": row["reg"]["registration_time"].isoformat()
+        }, fields) for row in rows]
 
-        # ✅ Step 2: Query registrations by ReferenceField
-        registrations = EventRegistration.objects(participant_id=participant)
-        
-        events_list = []
-        for reg in registrations:
-            event = reg.event_id
-            events_list.append({
-                "registration_id": str(reg.id),
-                "event_id": str(event.id),
-                "title": event.title,
-                "description": event.description,
-                "category": event.category,
-                "venue": event.venue,
-                "date": event.date,
-                "start_time": event.start_time,
-                "end_time": event.end_time,
-                "max_participants": event.max_participants,
-                "registrations_count": event.registrations_count,
-                "status": event.status,
-                "image_url": event.image_url,
-                "phone_number": event.phone_number,
-                "mail_id": event.mail_id,
-                "registration_status": reg.status,
-                "registration_time": reg.registration_time.isoformat()
-            })
-        
         return jsonify({"success": True, "events": events_list}), 200
     
     except Exception as e:
         print(e)
         return jsonify({"success": False, "error": str(e)}), 500
 
-    
-    # ============================================
+
+REGISTERED_EVENT_KEYS = (*EVENT_FIELDS, "registration_status", "registration_time")
+
+
+def _registered_events_pipeline(fields=None):
+    return [
+        {"$project": {"_id": 1}},
+        {"$lookup": {
+            "from": EventRegistration._get_collection_name(),
+            "localField": "_id", "foreignField": "participant_id", "as": "reg"
+        }},
+        {"$unwind": "$reg"},
+        {"$lookup": {
+            "from": Event._get_collection_name(),
+            "localField": "reg.event_id", "foreignField": "_id", "as": "event"
+        }},
+        {"$unwind": "$event"},
+        {"$sort": {"reg._id": 1}},
+        {"$project": {
+            "reg._id": 1, "reg.status": 1, "reg.registration_time": 1,
+            "event._id": 1, **{f"event.{f}": 1 for f in project(fields, EVENT_FIELDS)},
+        }},
+    ]
+
+
+def _filter_events(qs, args):
+    """Apply the catalogue's query-string filters to an Event queryset.
+
+    Supports category, venue_id, status, organizer, date_from/date_to
+    (YYYY-MM-DD, inclusive), upcoming=1 / this_week=1 (range queries on the
+    indexed starts_at) and q, a text search over title and description.
+    Raises ValueError for malformed ids.
+    """
+    for param, field in (("category", "category"), ("status", "status")):
+        if args.get(param):
+            qs = qs.filter(**{field: args[param]})
+
+    for param, field in (("venue_id", "venue_id"), ("organizer", "organizer_id")):
+        if args.get(param):
+            if not ObjectId.is_valid(args[param]):
+                raise ValueError(f"Invalid {param}")
+            qs = qs.filter(**{field: ObjectId(args[param])})
+
+    # Dates are stored as ISO strings, so string comparison is chronological
+    if args.get("date_from"):
+        qs = qs.filter(date__gte=args["date_from"])
+    if args.get("date_to"):
+        qs = qs.filter(date__lte=args["date_to"])
+
+    # starts_at holds naive local times, like the strings it is parsed from
+    now = datetime.now()
+    if args.get("upcoming") in ("1", "true"):
+        qs = qs.filter(starts_at__gte=now)
+    if args.get("this_week") in ("1", "true"):
+        monday = datetime(now.year, now.month, now.day) - timedelta(days=now.weekday())
+        qs = qs.filter(starts_at__gte=monday, starts_at__lt=monday + timedelta(days=7))
+
+    if args.get("q"):
+        qs = qs.search_text(args["q"])
+    return qs
+
+
+# ============================================
 # Get all events (for students to browse)
 # ============================================
 @student_bp.route('/all-events', methods=['GET'])
+@response_cache.cached("events")
 def get_all_events():
     """
-    Get all available events for students to view and register
+    Get all available events for students to view and register.
+    Optional filters: see _filter_events.
     """
+    if not request.args:
+        # The plain catalogue is shared with the ASGI handler (services.py)
+        body, status = run(services.all_events())
+        return jsonify(body), status
+
     try:
-        events = Event.objects()
-        
-        events_list = []
-        for event in events:
-            events_list.append({
-                "id": str(event.id),
-                "title": event.title,
-                "description": event.description,
-                "category": event.category,
-                "venue": event.venue,
-                "venue_id": str(event.venue_id.id),
-                "date": event.date,
-                "start_time": event.start_time,
-                "end_time": event.end_time,
-                "max_participants": event.max_participants,
-                "registrations_count": event.registrations_count,
-                "status": event.status,
-                "image_url": event.image_url,
-                "phone_number": event.phone_number,
-                "mail_id": event.mail_id,
-                "created_at": event.created_at.isoformat()
-            })
+        fields = requested_fields((*EVENT_FIELDS, "created_at"))
+        since = requested_since()
+        events = changed(_filter_events(Event.objects(), request.args), since)
+        events, next_cursor = page(event_rows(events, *project(fields, ("created_at",)), fields=fields))
+    except ValueError as e:
+        return jsonify({"success": False, "error": str(e)}), 400
+
+    try:
+        events_list = [
+            sparse({**event_dict(e), "created_at": e["created_at"].isoformat() if e.get("created_at") else None}, fields)
+            for e in events
+        ]
         
-        return jsonify({"success": True, "events": events_list}), 200
+        body = {"success": True, "events": events_list}
+        if paged():
+            body["next_cursor"] = next_cursor
+        if since:
+            body.update(sync_fields(Event, since))
+        return jsonify(body), 200
     except Exception as e:
         return jsonify({"success": False, "error": str(e)}), 500
 
@@ -101,39 +158,55 @@ def get_all_events():
 # Update student profile (add phone_number field)
 # ============================================
 @student_bp.route('/profile/<user_id>', methods=['PUT'])
+@require_session()
 def update_student_profile(user_id):
     """
     Update student profile information
     """
-    data = request.get_json()
-    
-    try:
-        user = User.objects.get(id=user_id)
-    except DoesNotExist:
-        return jsonify({"success": False, "message": "User not found"}), 404
+    if not acts_for(user_id):
+        return forbidden()
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return jsonify({"success": False, "message": "Request body must be a JSON object"}), 400
+
+    # Update allowed fields
+    updates = {}
+    if "name" in data:
+        updates["set__name"] = data["name"]
+    if "phone_number" in data:
+        updates["set__phone_number"] = data["phone_number"]
+    if "department" in data:
+        updates["set__department"] = data["department"]
+    if "year" in data:
+        # Convert year string to int if needed
+        year_str = data["year"]
+        if isinstance(year_str, str):
+            year_map = {
+                "1st year": 1, "2nd year": 2,
+                "3rd year": 3, "4th year": 4
+            }
+            if year_str in year_map:
+                updates["set__year"] = year_map[year_str]
+        else:
+            updates["set__year"] = year_str
 
     try:
-        # Update allowed fields
-        if "name" in data:
-            user.name = data["name"]
-        if "phone_number" in data:
-            user.phone_number = data["phone_number"]
-        if "department" in data:
-            user.department = data["department"]
-        if "year" in data:
-            # Convert year string to int if needed
-            year_str = data["year"]
-            if isinstance(year_str, str):
-                year_map = {
-                    "1st year": 1, "2nd year": 2,
-                    "3rd year": 3, "4th year": 4
-                }
-                user.year = year_map.get(year_str, user.year)
-            else:
-                user.year = year_str
-        
-        user.save()
-        
+        if "set__name" in updates:
+            # Search keys cover the name and the account's current email/reg_no
+            account = User.objects(id=user_id).only("email", "reg_no").first()
+            if not account:
+                return jsonify({"success": False, "message": "User not found"}), 404
+            updates["set__search_keys"] = search_keys(updates["set__name"], account.email, account.reg_no)
+
+        # One conditional update instead of fetch + save; no match means no user
+        if updates:
+            found = User.objects(id=user_id).update_one(**updates, set__updated_at=datetime.utcnow())
+        else:
+            # A user's own session already proves the account exists
+            found = g.session["uid"] == user_id or User.objects(id=user_id).only("id").first()
+        if not found:
+            return jsonify({"success": False, "message": "User not found"}), 404
+
         return jsonify({"success": True, "message": "Profile updated successfully"}), 200
     except Exception as e:
         return jsonify({"success": False, "message": str(e)}), 500
\ No newline at end of file
@@ -0,0 +1,283 @@
+from flask import Blueprint, request, jsonify, g
+from werkzeug.security import generate_password_hash, check_password_hash
+from bson import ObjectId
+from datetime import datetime
+from models import User, Participant, normalize_email
+from pagination import page, paged
+from serializers import project, requested_fields, sparse
+from auth import acts_for, forbidden, issue_token, require_session, revoke_current, revoke_user
+from jobs import enqueue
+from ratelimit import rate_limiter
+from search import search_terms, search_limit, prefix_query
+from sync import requested_since, changed, bury, sync_fields
+
+user_bp = Blueprint("user_bp", __name__)
+
+USER_FIELDS = ("reg_no", "name", "email", "role", "department", "year", "phone_number", "created_at")
+
+
+def convert_year_to_int(year):
+    if year == '1st year':
+        return 1
+    elif year == '2nd year':
+        return 2
+    elif year == '3rd year':
+        return 3
+    elif year == '4th year':
+        return 4
+    return 1
+
+
+def convert_int_to_year(year):
+    if year == 1:
+        return "1st year"
+    elif year == 2:
+        return "2nd year"
+    elif year == 3:
+        return "3rd year"
+    elif year == 4:
+        return "4th year"
+    return "1st year"
+
+
+def user_dict(user):
+    return {
+        "_id": str(user.id),
+        "reg_no": user.reg_no,
+        "name": user.name,
+        "email": user.email,
+        "role": user.role,
+        "department": user.department,
+        "year": convert_int_to_year(user.year),
+        "phone_number": getattr(user, 'phone_number', ''),
+        "created_at": user.created_at.strftime("%Y-%m-%d %H:%M:%S") if user.created_at else None
+    }
+
+
+# -------------------------
+# Sign Up API
+# -------------------------
+@user_bp.route("/api/signup", methods=["POST"])
+@rate_limiter.limit("auth")
+def signup():
+    data = request.json
+    reg_no = data.get("reg_no")
+    name = data.get("name")
+    email = normalize_email(data.get("email"))
+    password = data.get("password")
+    role = data.get("role")
+    department = data.get("department")
+    year = convert_year_to_int(data.get("year"))
+
+    if not reg_no or not name or not email or not password or not role or not department or not year:
+        return jsonify({"success": False, "message": "All fields are required"})
+
+    if User.objects(email=email).first() or User.objects(reg_no=reg_no).first():
+        return jsonify({"success": False, "message": "User already exists"})
+
+    hashed_password = generate_password_hash(password)
+
+    user = User(
+        reg_no=reg_no,
+        name=name,
+        email=email,
+        password=hashed_password,
+        role=role,
+        department=department,
+        year=year
+    )
+    user.save()
+
+    # Claim event sign-ups made with this email before the account existed
+    Participant.objects(email=email, user_id=None).update(set__user_id=user.id)
+
+    return jsonify({"success": True, "message": "User registered successfully"})
+
+
+# -------------------------
+# Sign In API
+# -------------------------
+@user_bp.route("/api/login", methods=["POST"])
+@rate_limiter.limit("auth")
+def login():
+    data = request.json
+    reg_no = data.get("reg_no")
+    email = normalize_email(data.get("email"))
+    password = data.get("password")
+
+    user = User.objects(email=email).first()
+    if not user:
+        return jsonify({"success": False, "message": "User not found"})
+
+    if check_password_hash(user.password, password):
+        return jsonify({
+            "success": True,
+            "role": user.role,
+            "user_id": str(user.id),
+            "name": user.name,
+            "token": issue_token(user)
+        })
+    else:
+        return jsonify({"success": False, "message": "Invalid password"})
+
+
+@user_bp.route("/api/logout", methods=["POST"])
+def logout():
+    revoke_current()
+    return jsonify({"success": True, "message": "Logged out"})
+
+
+# -------------------------
+# Show all users to admin
+# -------------------------
+@user_bp.route("/api/users", methods=["GET"])
+@require_session("admin")
+def get_users():
+    try:
+        fields = requested_fields(USER_FIELDS)
+        since = requested_since()
+        users, next_cursor = page(changed(User.objects(), since).only(*project(fields, USER_FIELDS)))
+    except ValueError as e:
+        return jsonify({"success": False, "message": str(e)}), 400
+
+    users_data = [sparse(user_dict(user), fields) for user in users]
+
+    # Paged and delta responses need somewhere to put the cursor/tombstones, so they are wrapped
+    if paged() or since:
+        body = {"success": True, "users": users_data}
+        if paged():
+            body["next_cursor"] = next_cursor
+        if since:
+            body.update(sync_fields(User, since))
+        return jsonify(body)
+    return jsonify(users_data)
+
+
+# -------------------------
+# Prefix search over users (name words, email, reg_no), optionally by role
+# -------------------------
+@user_bp.route("/api/users/search", methods=["GET"])
+@require_session("admin")
+def search_users():
+    try:
+        fields = requested_fields(USER_FIELDS)
+        terms, limit = search_terms(), search_limit()
+    except ValueError as e:
+        return jsonify({"success": False, "message": str(e)}), 400
+
+    qs = User.objects(__raw__=prefix_query(terms))
+    if request.args.get("role"):
+        qs = qs.filter(role=request.args["role"])
+    users = qs.only(*project(fields, USER_FIELDS)).limit(limit)
+    return jsonify({"success": True, "users": [sparse(user_dict(user), fields) for user in users]})
+
+
+@user_bp.route("/api/users", methods=["POST"])
+@require_session("admin")
+def add_user():
+    data = request.json
+    reg_no = data.get("reg_no")
+    name = data.get("name")
+    email = normalize_email(data.get("email"))
+    password = data.get("password")
+    role = data.get("role")
+    department = data.get("department")
+    year = convert_year_to_int(data.get("year"))
+
+    if not reg_no or not name or not email or not password or not role or not department or not year:
+        return jsonify({"success": False, "message": "All fields are required"})
+
+    if User.objects(email=email).first() or User.objects(reg_no=reg_no).first():
+        return jsonify({"success": False, "message": "User already exists"})
+
+    user = User(
+        reg_no=reg_no,
+        name=name,
+        email=email,
+        password=generate_password_hash(password),
+        role=role,
+        department=department,
+        year=year
+    )
+    user.save()
+    return jsonify({"success": True, "message": "User added successfully"})
+
+
+@user_bp.route("/api/users/<user_id>", methods=["PUT"])
+@user_bp.route("/api/users/<user_id>/", methods=["PUT"])
+@require_session()
+def edit_user(user_id):
+    # Users edit their own profile; admins edit anyone's
+    if not acts_for(user_id):
+        return forbidden()
+    data = request.json
+    update_data = {
+        "reg_no": data.get("reg_no"),
+        "name": data.get("name"),
+        "email": data.get("email"),
+        "role": data.get("role"),
+        "department": data.get("department"),
+        "year": convert_year_to_int(data.get("year")),
+        "phone_number": data.get("phone_number")
+    }
+
+    if data.get("password"):
+        update_data["password"] = generate_password_hash(data["password"])
+
+    try:
+        user = User.objects.get(id=ObjectId(user_id))
+    except Exception:
+        return jsonify({"success": False, "message": "User not found"})
+
+    # Only admins hand out roles
+    if update_data["role"] is not None and update_data["role"] != user.role and g.session["role"] != "admin":
+        return forbidden()
+
+    # Outstanding tokens carry the old role, and a reset password should end other sessions
+    revoke = bool(data.get("password")) or (update_data["role"] is not None and update_data["role"] != user.role)
+
+    for key, value in update_data.items():
+        if value is not None:
+            setattr(user, key, value)
+
+    user.updated_at = datetime.utcnow()
+    user.save()
+    if revoke:
+        revoke_user(user.id)
+    return jsonify({"success": True, "message": "User updated successfully"})
+
+
+@user_bp.route("/api/users/<user_id>", methods=["DELETE"])
+@user_bp.route("/api/users/<user_id>/", methods=["DELETE"])
+@require_session("admin")
+def delete_user(user_id):
+    try:
+        user = User.objects.only("id").get(id=ObjectId(user_id))
+    except Exception:
+        return jsonify({"success": False, "message": "User not found"})
+
+    user.delete()
+    revoke_user(user.id)
+    bury(User, [(user.id, None)])
+    # Their events and participant links are cleaned up in the background
+    enqueue("delete_user", user_id=user.id)
+    return jsonify({"success": True, "message": "User deleted successfully"})
+
+
+@user_bp.route("/api/users/<user_id>", methods=["GET"])
+@user_bp.route("/api/users/<user_id>/", methods=["GET"])
+@require_session()
+def get_user(user_id):
+    if not acts_for(user_id):
+        return forbidden()
+    try:
+        fields = requested_fields(USER_FIELDS)
+    except ValueError as e:
+        return jsonify({"success": False, "message": str(e)}), 400
+
+    try:
+        user = User.objects.only(*project(fields, USER_FIELDS)).get(id=ObjectId(user_id))
+    except Exception:
+        return jsonify({"success": False, "message": "User not found"}), 404
+
+    return jsonify(sparse(user_dict(user), fields))
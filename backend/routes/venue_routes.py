@@ -1,30 +1,94 @@
 from flask import Blueprint, request, jsonify
 from flask_cors import cross_origin
-from models import Venue
+from datetime import datetime
+from models import Venue, Event
+from pagination import page, paged
+from cache import response_cache
+from auth import require_session
+from serializers import VENUE_FIELDS, venue_rows, venue_dict, requested_fields, sparse
+from sync import requested_since, changed, sync_fields
+import services
+from services import run
 from mongoengine.errors import NotUniqueError, ValidationError
+from bson import ObjectId
+from bookings import day, hhmm, minutes
 
 venue_bp = Blueprint("venue_bp", __name__, url_prefix="/api/venues")
 
 # Get all venues (read-only)
 @venue_bp.route("/", methods=["GET"])
 @cross_origin()  # allow CORS for this route
+@response_cache.cached("venues")
 def get_all_venues():
-    venues = Venue.objects()
-    result = []
-    for v in venues:
-        result.append({
-            "id": str(v.id),
-            "venue_name": v.venue_name,
-            "venue_description": v.venue_description,
-            "image_url": v.image_url,
-            "phone_number": v.phone_number,
-            "mail_id": v.mail_id,
-        })
-    return jsonify({"success": True, "venues": result})
+    if not request.args:
+        # Shared with the ASGI handler (services.py)
+        body, status = run(services.all_venues())
+        return jsonify(body), status
+
+    try:
+        fields = requested_fields(VENUE_FIELDS)
+        since = requested_since()
+        venues, next_cursor = page(venue_rows(changed(Venue.objects(), since), fields))
+    except ValueError as e:
+        return jsonify({"success": False, "message": str(e)}), 400
+
+    result = [sparse(venue_dict(v), fields) for v in venues]
+    body = {"success": True, "venues": result}
+    if paged():
+        body["next_cursor"] = next_cursor
+    if since:
+        body.update(sync_fields(Venue, since))
+    return jsonify(body)
+
+# Free slots of a venue on one day
+@venue_bp.route("/<venue_id>/availability", methods=["GET"])
+@cross_origin()
+def venue_availability(venue_id):
+    date = request.args.get("date")
+    try:
+        datetime.strptime(date or "", "%Y-%m-%d")
+        day_start = minutes(request.args.get("from", "00:00"))
+        day_end = minutes(request.args.get("to", "23:59"))
+    except ValueError:
+        return jsonify({"success": False, "message": "date must be YYYY-MM-DD and from/to HH:MM"}), 400
+
+    try:
+        if not Venue.objects(id=venue_id).only("id").first():
+            return jsonify({"success": False, "message": "Venue not found"}), 404
+    except ValidationError:
+        return jsonify({"success": False, "message": "Venue not found"}), 404
+
+    # The day's bookings (bookings.py) in minutes, earliest first, in one pass
+    booked = day(ObjectId(venue_id), date)
+    free = []
+    cursor = day_start
+    for b in booked:
+        start = min(b["start"], day_end)
+        if start > cursor:
+            free.append({"start_time": hhmm(cursor), "end_time": hhmm(start)})
+        cursor = max(cursor, b["end"])
+    if cursor < day_end:
+        free.append({"start_time": hhmm(cursor), "end_time": hhmm(day_end)})
+
+    titles = {e["_id"]: e.get("title") for e in Event.objects(
+        id__in=[b["event_id"] for b in booked]).only("title").as_pymongo()}
+    return jsonify({
+        "success": True,
+        "venue_id": venue_id,
+        "date": date,
+        "booked": [{
+            "event_id": str(b["event_id"]),
+            "title": titles.get(b["event_id"]),
+            "start_time": hhmm(b["start"]),
+            "end_time": hhmm(b["end"])
+        } for b in booked],
+        "free": free
+    })
 
 # Add new venue (admin only)
 @venue_bp.route("/", methods=["POST", "OPTIONS"])
 @cross_origin()
+@require_session("admin")
 def add_venue():
     # Handle preflight
     if request.method == "OPTIONS":
@@ -40,6 +104,7 @@ def add_venue():
             mail_id=data.get("mail_id"),
         )
         venue.save()
+        response_cache.bump("venues")
         return jsonify({"success": True, "message": "Venue added successfully"}), 201
 
     except NotUniqueError:
@@ -0,0 +1,312 @@
+"""Write-behind registration queue for event openings (RUSH_MODE).
+
+With RUSH_MODE on, POST /api/registrations/register no longer writes to
+MongoDB itself. The request is checked against an in-memory seat pool and a
+per-process duplicate set, given a registration id up front and queued; it
+answers 202 straight away. A background thread drains the queue every
+RUSH_FLUSH_INTERVAL_MS and writes each batch with one participant upsert
+and one unordered insert_many, then records the outcome that
+GET /api/registrations/status/<id> reports.
+
+Seats are leased from Event.registrations_count in blocks of
+RUSH_SEAT_BLOCK with the usual conditional update, so several workers can
+run rush mode side by side without overselling. Seats a worker leased but
+did not hand out go back once its queue has been idle for a second, and
+seats of registrations that fail at flush time (duplicates from another
+worker) go back to the local pool. Until then the event may look a few
+seats fuller than it is. Each batch looks up registrations that already
+exist before inserting, so duplicates are caught whether or not the
+unique index has been built.
+
+Statuses live in process memory unless RUSH_STATUS_DIR (or
+SHARED_STATE_DIR) points at a local directory shared by all workers, so a
+poll can land on any of them. Once a batch is flushed, a status missing
+from the store (another host, or pruned) is answered from the
+registrations collection.
+"""
+import atexit
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+from datetime import datetime
+
+from bson import ObjectId
+from pymongo.errors import BulkWriteError
+
+from background import PerProcess, start_thread
+from bulk_registration import upsert_participants
+from cache import response_cache
+from event_stats import counted_as, record
+from models import Event, EventRegistration
+from stores import pick_store
+
+log = logging.getLogger(__name__)
+
+IDLE_RETURN_SECONDS = 1.0
+MAX_TRACKED = 100_000
+STATUS_TTL = 60 * 60  # seconds a shared status file is kept
+
+
+class MemoryStatuses:
+    shared = False
+
+    def __init__(self):
+        self._statuses = OrderedDict()  # registration id -> status dict
+        self._lock = threading.Lock()
+
+    def set(self, reg_id, status):
+        with self._lock:
+            self._statuses[reg_id] = status
+            self._statuses.move_to_end(reg_id)
+            while len(self._statuses) > MAX_TRACKED:
+                self._statuses.popitem(last=False)
+
+    def get(self, reg_id):
+        with self._lock:
+            return self._statuses.get(reg_id)
+
+
+class FileStatuses:
+    """One small JSON file per registration id, replaced atomically."""
+
+    shared = True
+
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self._last_prune = 0
+
+    def set(self, reg_id, status):
+        path = os.path.join(self.directory, str(reg_id))
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}"
+        with open(tmp, "w") as f:
+            json.dump(status, f, default=str)
+        os.replace(tmp, path)
+        self._prune()
+
+    def get(self, reg_id):
+        try:
+            with open(os.path.join(self.directory, str(reg_id))) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def _prune(self):
+        now = time.time()
+        if now - self._last_prune < 60:
+            return
+        self._last_prune = now
+        for entry in os.scandir(self.directory):
+            try:
+                if entry.stat().st_mtime < now - STATUS_TTL:
+                    os.unlink(entry.path)
+            except FileNotFoundError:
+                pass  # pruned by another worker
+
+
+class SeatPool:
+    """Seats this process leased for one event and has not handed out."""
+
+    def __init__(self):
+        self.available = 0
+        self.emails = set()  # accepted in this process, for early duplicate answers
+        self.lock = threading.Lock()
+
+
+class RushQueue:
+    def __init__(self):
+        self.flush_interval = 0.005
+        self.batch_size = 500
+        self.seat_block = 25
+        self._queue = deque()
+        self._pools = {}
+        self._pools_lock = threading.Lock()
+        self.statuses = pick_store("RUSH_STATUS_DIR", "rush", MemoryStatuses, FileStatuses)
+        self._wakeup = threading.Event()
+        self._flush_lock = threading.Lock()
+        self._worker = PerProcess(self._start)
+
+    def configure(self, config):
+        self.flush_interval = config["RUSH_FLUSH_INTERVAL_MS"] / 1000
+        self.batch_size = config["RUSH_BATCH_SIZE"]
+        self.seat_block = config["RUSH_SEAT_BLOCK"]
+
+    def _start(self):
+        # Whatever a parent process queued is its own to flush
+        self._queue.clear()
+        self._pools.clear()
+        start_thread(self._run, "rush-flush")
+
+    def _pool(self, event_id):
+        with self._pools_lock:
+            pool = self._pools.get(event_id)
+            if pool is None:
+                pool = self._pools[event_id] = SeatPool()
+            return pool
+
+    def _set_status(self, reg_id, **status):
+        self.statuses.set(reg_id, status)
+
+    # -------------------------
+    # Request side
+    # -------------------------
+    def submit(self, event_id, fields):
+        """Queue one registration.
+
+        Returns (status, registration id); status is "queued", "duplicate",
+        "full" or "missing" (no such event), the id is None unless queued.
+        """
+        self._worker.ensure()
+        pool = self._pool(event_id)
+        with pool.lock:
+            if fields["email"] in pool.emails:
+                return "duplicate", None
+            if pool.available == 0:
+                pool.available = Event.take_available_seats(event_id, self.seat_block)
+                if pool.available == 0:
+                    if not Event.objects(id=event_id).only("id").first():
+                        return "missing", None
+                    return "full", None
+            pool.available -= 1
+            pool.emails.add(fields["email"])
+
+        reg_id = ObjectId()
+        self._set_status(reg_id, status="queued", event_id=event_id)
+        self._queue.append((reg_id, event_id, fields, datetime.utcnow()))
+        if len(self._queue) >= self.batch_size:
+            self._wakeup.set()
+        return "queued", reg_id
+
+    def status(self, reg_id):
+        status = self.statuses.get(reg_id)
+        if status:
+            return status
+        reg = EventRegistration.objects(id=reg_id).only("event_id", "status").as_pymongo().first()
+        if reg:
+            return {"status": "registered", "event_id": reg["event_id"]}
+        return None
+
+    # -------------------------
+    # Flush side
+    # -------------------------
+    def _run(self):
+        idle_since = time.monotonic()
+        while True:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            if self._queue:
+                idle_since = time.monotonic()
+                self.flush()
+            elif time.monotonic() - idle_since > IDLE_RETURN_SECONDS:
+                self.return_seats()
+                idle_since = time.monotonic()
+
+    def flush(self):
+        """Write everything queued so far, one batch at a time."""
+        with self._flush_lock:
+            while self._queue:
+                self._flush_batch()
+
+    def _flush_batch(self):
+        batch = []
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self._queue.popleft())
+            except IndexError:
+                break
+        if batch:
+            try:
+                self._write(batch)
+            except Exception:
+                log.exception("Rush flush failed for %d registrations", len(batch))
+                for reg_id, event_id, fields, _ in batch:
+                    self._give_back(event_id, fields["email"])
+                    self._set_status(reg_id, status="failed", event_id=event_id)
+            response_cache.bump("events")
+
+    def _write(self, batch):
+        now = datetime.utcnow()
+        people = {fields["email"]: (None, fields) for _, _, fields, _ in batch}
+        participants = upsert_participants(people, now)
+
+        docs = [{
+            "_id": reg_id,
+            "event_id": event_id,
+            "participant_id": participants[fields["email"]]["_id"],
+            "registration_time": queued_at,
+            "status": "Registered",
+            "counted_as": counted_as(participants[fields["email"]].get("department"),
+                                     participants[fields["email"]].get("year")),
+            "updated_at": now,
+        } for reg_id, event_id, fields, queued_at in batch]
+
+        # Same person already registered (e.g. through another worker); the
+        # unique index only backs this up once sync-indexes has built it
+        collection = EventRegistration._get_collection()
+        pairs = {(doc["event_id"], doc["participant_id"]) for doc in docs}
+        taken = {
+            (r["event_id"], r["participant_id"]) for r in collection.find(
+                {"$or": [{"event_id": e, "participant_id": p} for e, p in pairs]},
+                {"event_id": 1, "participant_id": 1}
+            )
+        }
+        failed, fresh, seen = {}, [], set()
+        for index, doc in enumerate(docs):
+            pair = (doc["event_id"], doc["participant_id"])
+            if pair in taken or pair in seen:
+                failed[index] = {"code": 11000}
+            else:
+                seen.add(pair)
+                fresh.append((index, doc))
+
+        try:
+            if fresh:
+                collection.insert_many([doc for _, doc in fresh], ordered=False)
+        except BulkWriteError as e:
+            for err in e.details["writeErrors"]:
+                failed[fresh[err["index"]][0]] = err
+
+        record(
+            (event_id, "Registered", participants[fields["email"]].get("department"),
+             participants[fields["email"]].get("year"), 1)
+            for index, (_, event_id, fields, _) in enumerate(batch) if index not in failed
+        )
+
+        for index, (reg_id, event_id, fields, _) in enumerate(batch):
+            if index in failed:
+                self._give_back(event_id, fields["email"])
+                status = "duplicate" if failed[index]["code"] == 11000 else "failed"
+                self._set_status(reg_id, status=status, event_id=event_id)
+            else:
+                self._set_status(reg_id, status="registered", event_id=event_id)
+
+    def _give_back(self, event_id, email):
+        pool = self._pool(event_id)
+        with pool.lock:
+            pool.available += 1
+            pool.emails.discard(email)
+
+    def return_seats(self):
+        """Hand unused leased seats back to MongoDB (queue must be drained)."""
+        with self._pools_lock:
+            pools = list(self._pools.items())
+        for event_id, pool in pools:
+            with pool.lock:
+                # Everything accepted is flushed, so the flush-time check sees it
+                pool.emails.clear()
+                if pool.available:
+                    Event.release_seats(event_id, pool.available)
+                    pool.available = 0
+                    response_cache.bump("events")
+
+    def shutdown(self):
+        if self._worker.started:
+            self.flush()
+            self.return_seats()
+
+
+rush_queue = RushQueue()
+atexit.register(rush_queue.shutdown)
@@ -0,0 +1,46 @@
+"""Case-insensitive prefix search over participants and users.
+
+Participant and User keep `search_keys`: the lower-cased, accent-free words
+of the name plus the email and reg_no (models.search_keys). A query is split
+into terms the same way and every term must be a prefix of one of the keys.
+An anchored regex on a plain string is an index range scan, so the multikey
+`search_keys` index answers the first term directly and the top N come back
+without reading the rest of the collection.
+
+Rows written before the field existed are filled in by
+`flask --app app backfill-search-keys`.
+"""
+import re
+
+from flask import request
+
+from models import normalize_search
+
+DEFAULT_LIMIT = 10
+MAX_LIMIT = 50
+MAX_TERMS = 5
+
+
+def search_terms():
+    """Normalized terms of ?q=; raises ValueError when there are none."""
+    terms = normalize_search(request.args.get("q")).split()[:MAX_TERMS]
+    if not terms:
+        raise ValueError("q is required")
+    return terms
+
+
+def search_limit():
+    try:
+        limit = int(request.args.get("limit", DEFAULT_LIMIT))
+    except ValueError:
+        raise ValueError("limit must be a number")
+    if limit < 1:
+        raise ValueError("limit must be positive")
+    return min(limit, MAX_LIMIT)
+
+
+def prefix_query(terms):
+    """Raw filter matching documents with a key starting with each term."""
+    # Longest term first: it gives the index scan the narrowest range
+    terms = sorted(terms, key=len, reverse=True)
+    return {"$and": [{"search_keys": re.compile("^" + re.escape(t))} for t in terms]}
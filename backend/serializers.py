@@ -0,0 +1,196 @@
+"""Shared response shapes and JSON encoding.
+
+List endpoints read raw documents with `only(...).as_pymongo()` instead of
+hydrating mongoengine Documents, then build the response dicts here so every
+route emits the same shape. `install_json(app)` swaps Flask's encoder for
+orjson when it is installed.
+
+List endpoints also take `?fields=title,date,...` (sparse fieldsets): only
+the named fields are read from MongoDB and returned, plus the ids every row
+always carries.
+"""
+from bson import ObjectId
+from flask import request
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # optional: fall back to Flask's stdlib encoder
+    orjson = None
+
+
+# -------------------------
+# Sparse fieldsets
+# -------------------------
+ID_KEYS = ("id", "_id", "registration_id", "participant_id", "event_id")
+
+
+def requested_fields(allowed):
+    """The set of fields named by ?fields=, or None for all of them.
+
+    Raises ValueError for names outside `allowed` (a route's response keys).
+    """
+    raw = request.args.get("fields")
+    if not raw:
+        return None
+    fields = {f.strip() for f in raw.split(",") if f.strip()}
+    unknown = fields - set(allowed) - set(ID_KEYS)
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(sorted(unknown))}")
+    return fields
+
+
+def project(fields, names):
+    """The document fields among `names` that a sparse response needs."""
+    return tuple(n for n in names if fields is None or n in fields)
+
+
+def sparse(row, fields):
+    """Trim a response dict to the requested fields (ids are always kept)."""
+    if fields is None:
+        return row
+    return {k: v for k, v in row.items() if k in fields or k in ID_KEYS}
+
+
+def _iso(value):
+    return value.isoformat() if value else None
+
+
+# -------------------------
+# Events
+# -------------------------
+EVENT_FIELDS = (
+    "title", "description", "category", "venue", "venue_id", "date",
+    "start_time", "end_time", "max_participants", "registrations_count",
+    "status", "image_url", "phone_number", "mail_id",
+)
+
+
+def event_rows(qs, *extra, fields=None):
+    """Project an Event queryset down to what event_dict() reads."""
+    return qs.only("venue_id", *project(fields, EVENT_FIELDS), *extra).as_pymongo()
+
+
+def event_fields(e):
+    return {
+        "title": e.get("title"),
+        "description": e.get("description"),
+        "category": e.get("category"),
+        "venue": e.get("venue"),
+        "date": e.get("date"),
+        "start_time": e.get("start_time"),
+        "end_time": e.get("end_time"),
+        "max_participants": e.get("max_participants"),
+        "registrations_count": e.get("registrations_count", 0),
+        "status": e.get("status"),
+        "image_url": e.get("image_url"),
+        "phone_number": e.get("phone_number"),
+        "mail_id": e.get("mail_id"),
+    }
+
+
+def event_dict(e):
+    return {
+        "id": str(e["_id"]),
+        "venue_id": str(e["venue_id"]),
+        **event_fields(e),
+    }
+
+
+# -------------------------
+# Venues
+# -------------------------
+VENUE_FIELDS = ("venue_name", "venue_description", "image_url", "phone_number", "mail_id")
+
+
+def venue_rows(qs, fields=None):
+    return qs.only(*project(fields, VENUE_FIELDS)).as_pymongo()
+
+
+def venue_dict(v):
+    return {"id": str(v["_id"]), **{key: v.get(key) for key in VENUE_FIELDS}}
+
+
+# -------------------------
+# Participants / registrations
+# -------------------------
+PARTICIPANT_FIELDS = ("name", "email", "phone", "reg_no", "department", "year")
+REGISTRATION_FIELDS = (
+    "event_id", "participant_id", "registration_time", "status",
+    "team_name", "additional_info",
+)
+PARTICIPANT_KEYS = (*PARTICIPANT_FIELDS, "created_at")
+REGISTRATION_KEYS = (*PARTICIPANT_FIELDS, *REGISTRATION_FIELDS)
+
+
+def participant_rows(qs, fields=None):
+    return qs.only(*project(fields, PARTICIPANT_KEYS)).as_pymongo()
+
+
+def registration_rows(qs, fields=None):
+    # The ids join rows to participants/events and registration_time is the
+    # newest-first cursor key, so they are read even when not returned
+    return qs.only(
+        "event_id", "participant_id", "registration_time", *project(fields, REGISTRATION_FIELDS)
+    ).as_pymongo()
+
+
+def participant_fields(p):
+    return {
+        "participant_id": str(p["_id"]),
+        "name": p.get("name"),
+        "email": p.get("email"),
+        "phone": p.get("phone"),
+        "reg_no": p.get("reg_no"),
+        "department": p.get("department"),
+        "year": p.get("year"),
+    }
+
+
+def participant_dict(p):
+    return {**participant_fields(p), "created_at": _iso(p.get("created_at"))}
+
+
+def registration_dict(r, p):
+    """One row of a registration table: the registration joined with its participant."""
+    return {
+        "registration_id": str(r["_id"]),
+        **participant_fields(p),
+        "registration_time": _iso(r.get("registration_time")),
+        "status": r.get("status"),
+        "team_name": r.get("team_name"),
+        "additional_info": r.get("additional_info", {}),
+    }
+
+
+# -------------------------
+# JSON encoding
+# -------------------------
+def _default(obj):
+    if isinstance(obj, ObjectId):
+        return str(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """orjson-backed provider; keeps Flask's sorted-key output."""
+
+    options = 0
+    if orjson:
+        options = orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS
+
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, default=_default, option=self.options).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        body = orjson.dumps(obj, default=_default, option=self.options)
+        return self._app.response_class(body, mimetype=self.mimetype)
+
+
+def install_json(app):
+    if orjson:
+        app.json = FastJSONProvider(app)
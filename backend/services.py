@@ -0,0 +1,205 @@
+"""Request logic shared by the Flask views and the ASGI handlers (asgi.py).
+
+A service is a generator that yields the database calls it needs as `Op`s
+and is sent each result back (or has the driver's exception thrown in at
+that point). It returns the (body, status) to answer with. Other work that
+may block, such as bumping a file-backed cache version, is yielded as an
+`Op` without a collection, so the async driver can run it off the event
+loop. `run` executes
+one on the Flask side's synchronous pymongo database, `run_async` on an
+AsyncMongoClient database, so both entry points answer with the same
+validation, seat rules, account linking, stats and cache invalidation
+without a thread per waiting request on the async side.
+"""
+from datetime import datetime
+from functools import partial
+
+from bson import ObjectId
+from mongoengine.connection import get_db
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+from bulk_registration import new_participant, normalize_participant
+from cache import response_cache
+from event_stats import counted_as, stat_ops
+from models import Event, EventRegistration, EventStats, Participant, User, Venue
+from serializers import (
+    EVENT_FIELDS, PARTICIPANT_FIELDS, REGISTRATION_FIELDS, VENUE_FIELDS,
+    event_dict, registration_dict, venue_dict,
+)
+
+EVENTS = Event._get_collection_name()
+VENUES = Venue._get_collection_name()
+USERS = User._get_collection_name()
+PARTICIPANTS = Participant._get_collection_name()
+REGISTRATIONS = EventRegistration._get_collection_name()
+STATS = EventStats._get_collection_name()
+
+ALREADY_REGISTERED = "You have already registered for this event"
+
+
+class Op:
+    """One collection method call for a driver to make; `find` results come back as a list.
+
+    With `collection` None, `method` is a plain callable to call instead.
+    """
+
+    __slots__ = ("collection", "method", "args", "kwargs")
+
+    def __init__(self, collection, method, *args, **kwargs):
+        self.collection = collection
+        self.method = method
+        self.args = args
+        self.kwargs = kwargs
+
+
+def run(service, db=None):
+    """Drive `service` on a synchronous pymongo database (default: the app's)."""
+    db = db if db is not None else get_db()
+    result, error = None, None
+    while True:
+        try:
+            op = service.throw(error) if error else service.send(result)
+        except StopIteration as stop:
+            return stop.value
+        result, error = None, None
+        try:
+            if op.collection is None:
+                result = op.method(*op.args, **op.kwargs)
+            else:
+                result = getattr(db[op.collection], op.method)(*op.args, **op.kwargs)
+            if op.method == "find":
+                result = list(result)
+        except Exception as e:  # the service gets to clean up, then re-raises
+            error = e
+
+
+async def run_async(service, db):
+    """Drive `service` on a pymongo AsyncMongoClient database."""
+    from anyio import to_thread
+
+    result, error = None, None
+    while True:
+        try:
+            op = service.throw(error) if error else service.send(result)
+        except StopIteration as stop:
+            return stop.value
+        result, error = None, None
+        try:
+            if op.collection is None:
+                result = await to_thread.run_sync(partial(op.method, *op.args, **op.kwargs))
+            else:
+                call = getattr(db[op.collection], op.method)(*op.args, **op.kwargs)
+                result = await (call.to_list(None) if op.method == "find" else call)
+        except Exception as e:
+            error = e
+
+
+def object_id(value):
+    return ObjectId(value) if value and ObjectId.is_valid(value) else None
+
+
+def _projection(fields):
+    return {f: 1 for f in fields}
+
+
+# -------------------------
+# Unfiltered listings
+# -------------------------
+def all_events():
+    """GET /api/student/all-events without filters or paging."""
+    rows = yield Op(EVENTS, "find", {}, _projection((*EVENT_FIELDS, "created_at")), sort=[("_id", 1)])
+    events = [{**event_dict(e), "created_at": e["created_at"].isoformat() if e.get("created_at") else None}
+              for e in rows]
+    return {"success": True, "events": events}, 200
+
+
+def all_venues():
+    """GET /api/venues/ without paging."""
+    rows = yield Op(VENUES, "find", {}, _projection(VENUE_FIELDS), sort=[("_id", 1)])
+    return {"success": True, "venues": [venue_dict(v) for v in rows]}, 200
+
+
+def event_participants(event_id):
+    """GET /api/registrations/participants?event_id= without paging."""
+    event_id = object_id(event_id)
+    if not event_id or not (yield Op(EVENTS, "find_one", {"_id": event_id}, {"_id": 1})):
+        return {"success": False, "error": "Event not found"}, 404
+
+    regs = yield Op(REGISTRATIONS, "find", {"event_id": event_id}, _projection(REGISTRATION_FIELDS),
+                    sort=[("_id", 1)])
+    people = yield Op(PARTICIPANTS, "find", {"_id": {"$in": list({r["participant_id"] for r in regs})}},
+                      _projection(PARTICIPANT_FIELDS))
+    people = {p["_id"]: p for p in people}
+    rows = [registration_dict(r, people[r["participant_id"]]) for r in regs if r["participant_id"] in people]
+    return {"success": True, "rows": rows}, 200
+
+
+# -------------------------
+# Registration
+# -------------------------
+def register(data, check_duplicates=True):
+    """POST /api/registrations/register outside rush mode.
+
+    `check_duplicates` looks for an existing registration first; callers
+    pass False once the unique (event_id, participant_id) index is built.
+    """
+    if not data.get("event_id"):
+        return {"success": False, "error": "event_id is required"}, 400
+    event_id = object_id(data["event_id"])
+    if not event_id or not (yield Op(EVENTS, "find_one", {"_id": event_id}, {"_id": 1})):
+        return {"success": False, "error": "Event not found"}, 404
+
+    fields = normalize_participant(data)
+    if not fields["name"] or not fields["email"]:
+        return {"success": False, "error": "Name and Email are required"}, 400
+
+    projection = {"department": 1, "year": 1}
+    participant = yield Op(PARTICIPANTS, "find_one", {"email": fields["email"]}, projection)
+    if not participant:
+        # Link the sign-up to the account with that email, if there is one
+        account = yield Op(USERS, "find_one", {"email": fields["email"]}, {"_id": 1})
+        participant = yield Op(
+            PARTICIPANTS, "find_one_and_update", {"email": fields["email"]},
+            {"$setOnInsert": new_participant(fields, account and account["_id"], datetime.utcnow())},
+            upsert=True, projection=projection, return_document=ReturnDocument.AFTER
+        )
+
+    if check_duplicates and (yield Op(
+            REGISTRATIONS, "find_one", {"event_id": event_id, "participant_id": participant["_id"]}, {"_id": 1})):
+        return {"success": False, "error": ALREADY_REGISTERED}, 409
+
+    # Take a seat atomically; fails once registrations_count hits max_participants
+    taken = yield Op(EVENTS, "update_one", {"_id": event_id, **Event.has_seats(1)}, Event.move_seats(1))
+    if not taken.modified_count:
+        return {"success": False, "error": "Event is full"}, 409
+
+    department, year = participant.get("department"), participant.get("year")
+    now = datetime.utcnow()
+    give_back = Op(EVENTS, "update_one", {"_id": event_id, **Event.keeps_seats(1)}, Event.move_seats(-1))
+    try:
+        result = yield Op(REGISTRATIONS, "insert_one", {
+            "event_id": event_id,
+            "participant_id": participant["_id"],
+            "registration_time": now,
+            "status": "Registered",
+            "counted_as": counted_as(department, year),
+            "updated_at": now,
+        })
+    except DuplicateKeyError:
+        # Duplicates are rejected by the unique (event_id, participant_id) index
+        yield give_back
+        return {"success": False, "error": ALREADY_REGISTERED}, 409
+    except Exception:
+        yield give_back
+        raise
+
+    # registrations_count is part of the cached event listing
+    yield Op(None, response_cache.bump, "events")
+    yield Op(STATS, "bulk_write", stat_ops([(event_id, "Registered", department, year, 1)]))
+
+    return {
+        "success": True,
+        "message": "Registration successful!",
+        "registration_id": str(result.inserted_id)
+    }, 201
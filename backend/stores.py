@@ -0,0 +1,41 @@
+"""Where small pieces of cross-request state live.
+
+Cache versions (cache.py), revoked sessions (auth.py), rate-limit buckets
+(ratelimit.py) and rush registration statuses (rush.py) each come as a
+memory store, which is only correct while the app runs as a single
+process, and a file store in a local directory (e.g. one on /dev/shm)
+shared by every process on the host.
+
+Each store has its own directory variable (CACHE_VERSION_DIR, ...);
+SHARED_STATE_DIR sets all of them at once, one subdirectory per store.
+"""
+import os
+
+
+def state_dir(env_var, name):
+    """Directory for a store from `env_var`, else SHARED_STATE_DIR/<name>, else None."""
+    directory = os.environ.get(env_var)
+    if directory:
+        return directory
+    shared = os.environ.get("SHARED_STATE_DIR")
+    return os.path.join(shared, name) if shared else None
+
+
+def pick_store(env_var, name, memory, shared):
+    """`shared(directory)` when a directory is configured, else `memory()`."""
+    directory = state_dir(env_var, name)
+    return shared(directory) if directory else memory()
+
+
+def require_shared(**stores):
+    """Raise unless every store (keyword: its directory variable) is shared.
+
+    Called wherever several processes would otherwise each keep their own
+    copy and disagree.
+    """
+    missing = [env_var for env_var, store in stores.items() if not getattr(store, "shared", False)]
+    if missing:
+        raise RuntimeError(
+            "More than one process shares this app's state; set SHARED_STATE_DIR "
+            f"(or {', '.join(missing)}) to a local directory such as /dev/shm/college_event"
+        )
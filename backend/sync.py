@@ -0,0 +1,77 @@
+"""Delta sync for list endpoints (?since=).
+
+Events, venues, registrations and users carry an indexed `updated_at` that
+every write path sets. A list request with `?since=<synced_at>` (the value
+returned by the previous sync) answers with only the rows created or
+changed since then, the ids of rows deleted since then, and a new
+`synced_at`, so a client can keep its own copy and refresh it cheaply.
+
+Deletions leave a Tombstone, kept for TOMBSTONE_DAYS; a `since` older than
+that is rejected and the client should fetch the full list again. Rows
+written shortly before the previous `synced_at` may be sent twice (see
+OVERLAP); clients upsert by id, so that is harmless.
+"""
+from datetime import datetime, timedelta, timezone
+
+from flask import request
+
+from models import Tombstone
+
+TOMBSTONE_DAYS = 30
+
+# A write stamps updated_at before it commits; re-reading this far back
+# catches writes still in flight when the previous sync ran
+OVERLAP = timedelta(seconds=5)
+
+
+def requested_since():
+    """The ?since= timestamp as naive UTC, or None.
+
+    Accepts ISO 8601 (what `synced_at` holds). Raises ValueError for
+    anything unparseable or older than the tombstone retention.
+    """
+    raw = request.args.get("since")
+    if not raw:
+        return None
+    try:
+        since = datetime.fromisoformat(raw.replace("Z", "+00:00"))
+    except ValueError:
+        raise ValueError("since must be an ISO 8601 timestamp")
+    if since.tzinfo:
+        since = since.astimezone(timezone.utc).replace(tzinfo=None)
+    if since < datetime.utcnow() - timedelta(days=TOMBSTONE_DAYS):
+        raise ValueError(f"since is more than {TOMBSTONE_DAYS} days old; fetch the full list instead")
+    return since
+
+
+def changed(qs, since):
+    """Narrow a queryset to rows written since `since` (no-op when None)."""
+    return qs.filter(updated_at__gte=since - OVERLAP) if since else qs
+
+
+def bury(document, rows):
+    """Record deletions of `document` rows, given as (id, scope) pairs."""
+    now = datetime.utcnow()
+    tombstones = [
+        Tombstone(collection=document._get_collection_name(), doc_id=doc_id, scope=scope, deleted_at=now)
+        for doc_id, scope in rows
+    ]
+    if tombstones:
+        Tombstone.objects.insert(tombstones, load_bulk=False)
+
+
+def deleted(document, since, scope=None):
+    """Ids of `document` rows deleted since `since`."""
+    qs = Tombstone.objects(collection=document._get_collection_name(),
+                           deleted_at__gte=since - OVERLAP)
+    if scope:
+        qs = qs.filter(scope=scope)
+    return [str(doc_id) for doc_id in qs.scalar("doc_id")]
+
+
+def sync_fields(document, since, scope=None):
+    """The extra response keys of a ?since= answer."""
+    return {
+        "deleted": deleted(document, since, scope),
+        "synced_at": datetime.utcnow().isoformat() + "Z",
+    }
@@ -0,0 +1,92 @@
+"""Fixtures: a Flask app on a fresh in-memory (mongomock) database.
+
+Indexes are not built unless a test uses `indexed`, the same as a database
+that has never run `flask --app app sync-indexes`.
+"""
+from datetime import datetime
+
+import pytest
+from werkzeug.security import generate_password_hash
+
+from app import create_app
+from auth import issue_token
+from cache import MemoryVersionStore, response_cache
+from database import mongomock_client
+from indexes import sync_indexes, unique_indexes
+from models import Event, User, Venue
+
+TEST_CONFIG = {
+    "TESTING": True,
+    "SECRET_KEY": "test-secret",
+    "MONGO_CLIENT_CLASS": None,  # filled per app, so every test gets an empty database
+    "MONGODB_URI": "mongodb://localhost:27017/test",
+    "MONGODB_DB": "test",
+    "JOB_WORKERS": 0,
+    "RATE_LIMIT_ENABLED": False,
+}
+
+
+@pytest.fixture
+def app():
+    app = create_app({**TEST_CONFIG, "MONGO_CLIENT_CLASS": mongomock_client()})
+    unique_indexes.forget()
+    # A fresh epoch, so no cached body or ETag leaks in from another test
+    response_cache.store = MemoryVersionStore()
+    with app.app_context():
+        yield app
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def indexed(app):
+    assert sync_indexes(log=lambda msg: None)
+
+
+@pytest.fixture
+def make_user(app):
+    def make(email="ana@example.com", reg_no="REG1", role="student", password="pw", **fields):
+        return User(reg_no=reg_no, name=fields.pop("name", "Ana"), email=email,
+                    password=generate_password_hash(password), role=role,
+                    department=fields.pop("department", "CSE"), year=fields.pop("year", 2),
+                    **fields).save()
+    return make
+
+
+@pytest.fixture
+def make_event(app, make_user):
+    venues = {}
+
+    def make(max_participants=10, organizer=None, venue_name="Main Hall", **fields):
+        if organizer is None:
+            organizer = User.objects(email="org@example.com").first() or make_user(
+                email="org@example.com", reg_no="ORG1", role="organizer")
+        venue = venues.get(venue_name) or Venue(venue_name=venue_name).save()
+        venues[venue_name] = venue
+        return Event(
+            organizer_id=organizer, title=fields.pop("title", "Hackathon"), venue_id=venue,
+            venue=venue.venue_name, date=fields.pop("date", "2030-01-01"),
+            start_time=fields.pop("start_time", "10:00"), end_time=fields.pop("end_time", "12:00"),
+            max_participants=max_participants, created_at=datetime.utcnow(), **fields
+        ).save()
+    return make
+
+
+def register(client, event, email="ana@example.com", name="Ana", **fields):
+    return client.post("/api/registrations/register", json={
+        "event_id": str(event.id), "name": name, "email": email, **fields
+    })
+
+
+def bearer(user):
+    """Authorization header carrying a session token for `user`."""
+    return {"Authorization": f"Bearer {issue_token(user)}"}
+
+
+def sign_in(client, user):
+    """Send a session token for `user` on every later request of `client`."""
+    client.environ_base["HTTP_AUTHORIZATION"] = bearer(user)["Authorization"]
+    return client
@@ -0,0 +1,65 @@
+"""create_app opens no connection, and each worker process builds its own pool."""
+import os
+
+import pytest
+
+import database
+from app import create_app
+from database import client_settings
+
+from conftest import TEST_CONFIG
+
+# Nothing listens on port 1, so any attempt to connect fails fast
+UNREACHABLE = {**TEST_CONFIG, "MONGODB_URI": "mongodb://127.0.0.1:1/test",
+               "MONGO_SERVER_SELECTION_TIMEOUT_MS": 200, "MONGO_CONNECT_TIMEOUT_MS": 200}
+
+
+@pytest.fixture
+def offline_app():
+    app = create_app(UNREACHABLE)
+    yield app
+    database.disconnect()
+
+
+def test_settings_come_from_the_config(app):
+    settings = client_settings({**app.config, "MONGO_MAX_POOL_SIZE": 7, "MONGO_WRITE_CONCERN": "1",
+                                "MONGO_JOURNAL": True, "MONGO_READ_PREFERENCE": "secondaryPreferred"})
+    assert settings["maxPoolSize"] == 7
+    assert settings["w"] == 1
+    assert settings["journal"] is True
+    assert settings["readPreference"] == "secondaryPreferred"
+    assert settings["mongo_client_class"] is app.config["MONGO_CLIENT_CLASS"]
+
+    settings = client_settings({**app.config, "MONGO_WRITE_CONCERN": "majority", "MONGO_JOURNAL": False,
+                                "MONGO_CLIENT_CLASS": None})
+    assert settings["w"] == "majority"
+    assert "journal" not in settings and "mongo_client_class" not in settings
+
+
+def test_create_app_does_not_connect(offline_app):
+    client = offline_app.test_client()
+    assert client.get("/api/health/live").status_code == 200
+
+    resp = client.get("/api/health/ready")
+    assert resp.status_code == 503
+    assert resp.get_json()["mongodb"]["max_pool_size"] == offline_app.config["MONGO_MAX_POOL_SIZE"]
+
+
+def test_forked_worker_gets_its_own_client(app, client, monkeypatch):
+    connects = []
+    connect = database._connect
+    monkeypatch.setattr(database, "_connect", lambda: connects.append(1) or connect())
+
+    client.get("/api/health/live")
+    assert connects == []
+
+    # As if this process had been forked after the client was built
+    monkeypatch.setattr(database, "_pid", os.getpid() + 1)
+    client.get("/api/health/live")
+    assert connects == [1]
+    assert database._pid == os.getpid()
+
+
+def test_secret_key_is_required_outside_tests():
+    with pytest.raises(RuntimeError):
+        create_app({**UNREACHABLE, "SECRET_KEY": "", "TESTING": False})
@@ -0,0 +1,153 @@
+"""The ASGI handlers answer like the Flask views they stand in for."""
+import asyncio
+import importlib
+
+import pytest
+from mongoengine.connection import get_db
+from starlette.testclient import TestClient
+
+from cache import FileVersionStore, response_cache
+from config import Config
+from models import EventRegistration, Participant
+
+from conftest import register
+
+
+class AsyncDB:
+    """Just enough of an AsyncMongoClient database over the test's mongomock one."""
+
+    def __init__(self, db):
+        self.db = db
+
+    def __getitem__(self, name):
+        return AsyncCollection(self.db[name])
+
+
+class AsyncCollection:
+    def __init__(self, collection):
+        self.collection = collection
+
+    def __getattr__(self, method):
+        call = getattr(self.collection, method)
+        if method == "find":
+            return lambda *args, **kwargs: AsyncCursor(call(*args, **kwargs))
+
+        async def wrapper(*args, **kwargs):
+            return call(*args, **kwargs)
+        return wrapper
+
+
+class AsyncCursor:
+    def __init__(self, cursor):
+        self.cursor = cursor
+
+    async def to_list(self, length):
+        return list(self.cursor)
+
+
+@pytest.fixture
+def asgi(monkeypatch):
+    # asgi.py builds the default app from Config when first imported
+    monkeypatch.setattr(Config, "SECRET_KEY", "test-secret")
+    return importlib.import_module("asgi")
+
+
+@pytest.fixture
+def native(asgi, app, monkeypatch):
+    # `app` comes after importing asgi, so mongoengine points at its mongomock database
+    monkeypatch.setattr(asgi, "db", AsyncDB(get_db()))
+    return TestClient(asgi.app)
+
+
+def asgi_register(native, event, email="ana@example.com", name="Ana", **fields):
+    return native.post("/api/registrations/register", json={
+        "event_id": str(event.id), "name": name, "email": email, **fields
+    })
+
+
+def test_register_links_the_account(native, make_user, make_event):
+    user = make_user(email="ana@example.com")
+    resp = asgi_register(native, make_event(), email="ANA@Example.com")
+
+    assert resp.status_code == 201
+    assert Participant.objects.get(email="ana@example.com").user_id.id == user.id
+
+
+def test_register_rejects_duplicates_without_unique_index(native, make_event):
+    event = make_event()
+    assert asgi_register(native, event).status_code == 201
+    assert asgi_register(native, event).status_code == 409
+    assert EventRegistration.objects(event_id=event.id).count() == 1
+
+
+def test_register_counts_stats_like_flask(native, client, make_event):
+    event = make_event()
+    asgi_register(native, event, email="a@example.com", department="CSE", year="2")
+    register(client, event, email="b@example.com", department="CSE", year="2")
+
+    stats = client.get(f"/api/events/{event.id}/stats").get_json()["stats"]
+    assert stats["by_department"] == {"CSE": 2}
+
+
+def test_all_events_matches_flask_and_revalidates(native, client, make_event):
+    event = make_event()
+    first = native.get("/api/student/all-events")
+    assert first.json() == client.get("/api/student/all-events").get_json()
+
+    etag = first.headers["etag"]
+    assert native.get("/api/student/all-events", headers={"If-None-Match": etag}).status_code == 304
+
+    asgi_register(native, event)
+    again = native.get("/api/student/all-events", headers={"If-None-Match": etag})
+    assert again.status_code == 200
+    assert again.json()["events"][0]["registrations_count"] == 1
+
+
+def test_invalid_token_is_refused(native):
+    resp = native.get("/api/venues/", headers={"Authorization": "Bearer forged"})
+    assert resp.status_code == 401
+
+
+def test_async_client_uses_the_flask_settings(asgi, app):
+    db = asgi.mongo_database({**app.config, "MONGO_WRITE_CONCERN": "majority", "MONGO_JOURNAL": True,
+                              "MONGO_READ_PREFERENCE": "secondaryPreferred"})
+
+    assert db.name == app.config["MONGODB_DB"]
+    assert db.client.write_concern.document == {"w": "majority", "j": True}
+    assert db.client.read_preference.mongos_mode == "secondaryPreferred"
+    assert db.client.options.pool_options.max_pool_size == app.config["MONGO_MAX_POOL_SIZE"]
+
+
+class LoopCheckingStore(FileVersionStore):
+    """Records whether each call ran on the event loop's thread."""
+
+    def __init__(self, directory):
+        super().__init__(directory)
+        self.on_loop = []
+
+    def _note(self):
+        try:
+            asyncio.get_running_loop()
+            self.on_loop.append(True)
+        except RuntimeError:
+            self.on_loop.append(False)
+
+    def get(self, namespace):
+        self._note()
+        return super().get(namespace)
+
+    def bump(self, namespace):
+        self._note()
+        return super().bump(namespace)
+
+
+def test_file_stores_are_kept_off_the_event_loop(native, make_event, monkeypatch, tmp_path):
+    store = LoopCheckingStore(str(tmp_path))
+    monkeypatch.setattr(response_cache, "store", store)
+    event = make_event()
+
+    assert native.get("/api/student/all-events").status_code == 200
+    assert asgi_register(native, event).status_code == 201
+
+    assert len(store.on_loop) == 2
+    assert not any(store.on_loop)
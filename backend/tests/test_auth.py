@@ -0,0 +1,165 @@
+import time
+
+import pytest
+
+from app import create_app
+from auth import FileRevocations, MemoryRevocations
+from models import Event, User
+
+from conftest import bearer
+
+
+def login(client, email="org@example.com", password="pw"):
+    token = client.post("/api/login", json={"email": email, "password": password}).get_json()["token"]
+    return {"Authorization": f"Bearer {token}"}
+
+
+@pytest.fixture
+def organizer(make_user):
+    return make_user(email="org@example.com", reg_no="ORG1", role="organizer")
+
+
+@pytest.fixture
+def admin(make_user):
+    return bearer(make_user(email="admin@example.com", reg_no="ADM1", role="admin"))
+
+
+def test_logout_revokes_the_token(client, organizer):
+    auth = login(client)
+    assert client.get(f"/api/events/organizer/{organizer.id}", headers=auth).status_code == 200
+
+    client.post("/api/logout", headers=auth)
+
+    assert client.get(f"/api/events/organizer/{organizer.id}", headers=auth).status_code == 401
+
+
+def test_deleting_a_user_revokes_their_tokens(client, organizer, admin, make_event):
+    auth = login(client)
+    event = make_event(organizer=organizer)
+
+    client.delete(f"/api/users/{organizer.id}", headers=admin)
+
+    assert client.get(f"/api/events/organizer/{organizer.id}", headers=auth).status_code == 401
+    resp = client.post("/api/events/", headers=auth, json={
+        "organizer_id": str(organizer.id), "title": "Ghost", "venue_id": str(event.venue_id.id),
+        "date": "2030-02-01", "start_time": "10:00", "end_time": "11:00", "max_participants": 5,
+    })
+    assert resp.status_code == 401
+    assert not Event.objects(title="Ghost").first()
+
+
+def test_role_change_revokes_tokens_issued_before_it(client, organizer, admin):
+    old = login(client)
+
+    client.put(f"/api/users/{organizer.id}", headers=admin, json={"role": "admin"})
+    new = login(client)
+
+    assert client.get(f"/api/events/organizer/{organizer.id}", headers=old).status_code == 401
+    assert client.get(f"/api/events/organizer/{organizer.id}", headers=new).status_code == 200
+
+
+def test_event_contact_defaults_come_from_the_account(client, organizer, make_event):
+    venue_id = str(make_event(organizer=organizer).venue_id.id)
+    auth = login(client)
+    client.put(f"/api/users/{organizer.id}", headers=auth, json={"email": "new@example.com", "reg_no": "ORG2"})
+
+    resp = client.post("/api/events/", headers=auth, json={
+        "organizer_id": str(organizer.id), "title": "Talk", "venue_id": venue_id,
+        "date": "2030-02-01", "start_time": "10:00", "end_time": "11:00", "max_participants": 5,
+        "image_url": "https://example.com/talk.png",
+    })
+
+    assert resp.status_code == 201, resp.get_json()
+    event = Event.objects.get(title="Talk")
+    assert (event.mail_id, event.phone_number) == ("new@example.com", "ORG2")
+
+
+def test_profile_search_keys_use_the_current_email(client, make_user):
+    student = make_user()
+    auth = login(client, "ana@example.com")
+    User.objects(id=student.id).update_one(set__email="ana.new@example.com")
+
+    client.put(f"/api/student/profile/{student.id}", headers=auth, json={"name": "Ana Maria"})
+
+    assert User.objects.get(id=student.id).search_keys == ["ana", "ana.new@example.com", "maria", "reg1"]
+
+
+def test_organizer_routes_need_an_organizer_session(client, organizer, make_user):
+    student = make_user(email="stu@example.com", reg_no="STU1")
+    url = f"/api/events/organizer/{organizer.id}"
+
+    assert client.get(url).status_code == 401
+    assert client.get(url, headers=bearer(student)).status_code == 403
+    assert client.get(url, headers=bearer(organizer)).status_code == 200
+
+
+def test_organizers_only_manage_their_own_events(client, organizer, admin, make_user, make_event):
+    other = bearer(make_user(email="other@example.com", reg_no="ORG2", role="organizer"))
+    event = make_event(organizer=organizer)
+
+    assert client.get(f"/api/events/organizer/{organizer.id}", headers=other).status_code == 403
+    assert client.put(f"/api/events/{event.id}", headers=other, json={"title": "Mine"}).status_code == 403
+    assert client.delete(f"/api/events/{event.id}", headers=other).status_code == 403
+    assert client.put(f"/api/events/{event.id}", headers=admin, json={"title": "Renamed"}).status_code == 200
+    assert Event.objects.get(id=event.id).title == "Renamed"
+
+
+def test_new_event_belongs_to_the_session_user(client, organizer, make_event):
+    venue_id = str(make_event(organizer=organizer).venue_id.id)
+
+    resp = client.post("/api/events/", headers=bearer(organizer), json={
+        "title": "Talk", "venue_id": venue_id, "date": "2030-02-01",
+        "start_time": "10:00", "end_time": "11:00", "max_participants": 5,
+        "image_url": "https://example.com/talk.png",
+    })
+
+    assert resp.status_code == 201, resp.get_json()
+    assert Event.objects.get(title="Talk").organizer_id.id == organizer.id
+
+
+def test_students_only_see_and_edit_their_own_account(client, make_user):
+    ana = make_user()
+    bo = make_user(email="bo@example.com", reg_no="REG2")
+
+    assert client.get(f"/api/student/registered-events/{bo.id}", headers=bearer(ana)).status_code == 403
+    assert client.put(f"/api/student/profile/{bo.id}", headers=bearer(ana), json={"name": "X"}).status_code == 403
+    assert client.get(f"/api/users/{bo.id}", headers=bearer(ana)).status_code == 403
+    assert client.get(f"/api/student/registered-events/{ana.id}", headers=bearer(ana)).status_code == 200
+
+
+def test_only_admins_change_roles_or_list_users(client, make_user, admin):
+    ana = make_user()
+
+    assert client.put(f"/api/users/{ana.id}", headers=bearer(ana), json={"role": "admin"}).status_code == 403
+    assert User.objects.get(id=ana.id).role == "student"
+    assert client.get("/api/users", headers=bearer(ana)).status_code == 403
+    assert client.get("/api/users", headers=admin).status_code == 200
+
+
+@pytest.mark.parametrize("body", ["null", "[]", "not json"])
+def test_profile_update_rejects_a_body_that_is_not_an_object(client, make_user, body):
+    student = make_user()
+    resp = client.put(f"/api/student/profile/{student.id}", headers={
+        **bearer(student), "Content-Type": "application/json"
+    }, data=body)
+
+    assert resp.status_code == 400
+    assert resp.get_json()["success"] is False
+
+
+@pytest.mark.parametrize("store", ["memory", "file"])
+def test_user_revocation_cutoff(store, tmp_path):
+    revoked = MemoryRevocations() if store == "memory" else FileRevocations(str(tmp_path))
+    assert revoked.user_cutoff("u1") == 0
+
+    at = time.time()
+    revoked.revoke_user("u1", at)
+
+    assert revoked.user_cutoff("u1") == pytest.approx(at, abs=1e-3)
+    assert revoked.user_cutoff("u2") == 0
+
+
+def test_secret_key_is_required_outside_debug_and_testing():
+    with pytest.raises(RuntimeError, match="SECRET_KEY"):
+        create_app({"SECRET_KEY": None})
+    assert create_app({"SECRET_KEY": None, "TESTING": True}).secret_key
@@ -0,0 +1,57 @@
+"""The benchmark suite seeds a consistent dataset and drives it without errors."""
+from benchmarks import load, report
+from benchmarks.seed import seed
+from models import Event, EventRegistration, Participant, User
+
+SIZES = {"users": 30, "venues": 3, "events": 8, "participants": 60, "registrations": 120}
+
+
+def test_seed_is_consistent(app):
+    ctx = seed(SIZES)
+
+    assert User.objects.count() == 30 and Participant.objects.count() == 60
+    assert User.objects.get(id=ctx["admin_id"]).role == "admin"
+    assert sum(len(regs) for regs in ctx["rosters"].values()) == EventRegistration.objects.count()
+    for event in Event.objects:
+        seated = EventRegistration.objects(event_id=event.id, status__ne="Cancelled").count()
+        assert event.registrations_count == seated <= event.max_participants
+        assert ctx["event_organizers"][event.id] == event.organizer_id.id
+
+
+def test_mix_runs_every_route_without_errors(app):
+    ctx = seed(SIZES)
+
+    recorder, elapsed = load.run_mix(app, ctx, requests=300, concurrency=2)
+
+    assert sum(len(s) for s in recorder.samples.values()) == 300
+    assert dict(recorder.errors) == {}
+    result = report.summarize(recorder, elapsed)
+    assert set(result["routes"]) <= {label for label, _, _ in load.MIX}
+
+
+def test_bursts_stay_consistent(app):
+    ctx = seed(SIZES)
+
+    burst = load.run_burst(app, ctx, clients=12, capacity=5)
+    assert burst["consistent"]
+    assert burst["statuses"] == {"201": 5, "409": 7}
+
+    doors = load.run_checkin_burst(app, ctx, clients=12)
+    assert doors["consistent"]
+    assert doors["statuses"] == {"200": 12}
+
+
+def test_compare_flags_slower_routes_and_failed_bursts():
+    route = {"count": 100, "errors": 0, "mean": 1.0, "p50": 1.0, "p95": 10.0, "p99": 12.0, "rps": 5.0}
+    burst = {"p95": 5.0, "consistent": True}
+    baseline = {"routes": {"GET /a": route, "GET /b": route}, "burst": burst, "throughput": 10.0}
+    current = {
+        "routes": {"GET /a": {**route, "p95": 10.5}, "GET /b": {**route, "p95": 20.0}},
+        "burst": burst, "checkin_burst": {"p95": 1.0, "consistent": False}, "throughput": 9.0,
+    }
+
+    _, regressions = report.compare(baseline, current, threshold=10.0)
+    assert regressions == ["GET /b"]
+
+    _, regressions = report.compare({**baseline, "checkin_burst": {"p95": 1.0}}, current)
+    assert regressions == ["GET /b", "checkin_burst"]
@@ -0,0 +1,96 @@
+import threading
+
+from bson import ObjectId
+
+from bookings import book
+from models import Event, VenueDay
+
+from conftest import sign_in
+
+IMAGE = "https://example.com/event.png"
+
+
+def create(client, organizer, venue_id, start_time, end_time, date="2030-03-01", title="Talk"):
+    sign_in(client, organizer)
+    return client.post("/api/events/", json={
+        "organizer_id": str(organizer.id), "title": title, "venue_id": str(venue_id),
+        "date": date, "start_time": start_time, "end_time": end_time,
+        "max_participants": 5, "image_url": IMAGE,
+    })
+
+
+def test_overlapping_booking_is_rejected(client, make_event):
+    existing = make_event(date="2030-03-01", start_time="10:00", end_time="12:00")
+    organizer, venue_id = existing.organizer_id, existing.venue_id.id
+
+    resp = create(client, organizer, venue_id, "11:00", "13:00")
+
+    assert resp.status_code == 409
+    assert "Hackathon" in resp.get_json()["error"]
+    assert create(client, organizer, venue_id, "12:00", "13:00").status_code == 201
+
+
+def test_unpadded_times_are_compared_as_times(client, make_event):
+    event = make_event(date="2030-01-01")
+    organizer, venue_id = event.organizer_id, event.venue_id.id
+
+    assert create(client, organizer, venue_id, "9:00", "11:00").status_code == 201
+    assert create(client, organizer, venue_id, "10:00", "12:00").status_code == 409
+
+    stored = Event.objects.get(title="Talk")
+    assert (stored.start_time, stored.end_time) == ("09:00", "11:00")
+
+
+def test_moving_an_event_frees_its_old_slot(client, make_event):
+    event = make_event(date="2030-03-01", start_time="10:00", end_time="12:00")
+    organizer, venue_id = event.organizer_id, event.venue_id.id
+    assert create(client, organizer, venue_id, "14:00", "15:00", title="Other").status_code == 201
+
+    other = Event.objects.get(title="Other")
+    assert client.put(f"/api/events/{other.id}", json={"start_time": "16:00", "end_time": "17:00"}).status_code == 200
+
+    assert create(client, organizer, venue_id, "14:00", "15:00", title="Third").status_code == 201
+    assert create(client, organizer, venue_id, "16:30", "18:00", title="Clash").status_code == 409
+
+
+def test_deleting_an_event_frees_its_slot(client, make_event):
+    event = make_event(date="2030-03-01", start_time="10:00", end_time="12:00")
+    organizer, venue_id = event.organizer_id, event.venue_id.id
+    assert create(client, organizer, venue_id, "13:00", "14:00", title="Gone").status_code == 201
+
+    client.delete(f"/api/events/{Event.objects.get(title='Gone').id}")
+
+    assert create(client, organizer, venue_id, "13:00", "14:00").status_code == 201
+
+
+def test_concurrent_overlapping_bookings_admit_one(indexed, make_event):
+    venue_id = make_event().venue_id.id
+    results, start = [], threading.Barrier(20)
+
+    def attempt(n):
+        start.wait()
+        token, _ = book(venue_id, "2030-04-01", f"10:{n:02d}", "12:00", ObjectId())
+        results.append(token)
+
+    threads = [threading.Thread(target=attempt, args=(n,)) for n in range(20)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert sum(1 for token in results if token) == 1
+    assert len(VenueDay.objects.get(venue_id=venue_id, date="2030-04-01").bookings) == 1
+
+
+def test_availability(client, make_event):
+    event = make_event(date="2030-03-01", start_time="10:00", end_time="12:00")
+    create(client, event.organizer_id, event.venue_id.id, "9:00", "9:30")
+
+    body = client.get(f"/api/venues/{event.venue_id.id}/availability?date=2030-03-01&from=8:00&to=18:00").get_json()
+
+    assert [(b["title"], b["start_time"]) for b in body["booked"]] == [("Talk", "09:00"), ("Hackathon", "10:00")]
+    assert body["free"] == [
+        {"start_time": "08:00", "end_time": "09:00"},
+        {"start_time": "09:30", "end_time": "10:00"},
+        {"start_time": "12:00", "end_time": "18:00"},
+    ]
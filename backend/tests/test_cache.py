@@ -0,0 +1,70 @@
+import pytest
+
+from app import create_app
+from cache import FileVersionStore, MemoryVersionStore, response_cache
+
+ALL_EVENTS = "/api/student/all-events"
+
+
+def test_unchanged_listing_revalidates_with_304(client, make_event):
+    make_event()
+    etag = client.get(ALL_EVENTS).headers["ETag"]
+
+    resp = client.get(ALL_EVENTS, headers={"If-None-Match": etag})
+
+    assert resp.status_code == 304
+
+
+def test_write_changes_the_etag(client, make_event):
+    event = make_event()
+    etag = client.get(ALL_EVENTS).headers["ETag"]
+
+    client.post("/api/registrations/register",
+                json={"event_id": str(event.id), "name": "Ana", "email": "ana@example.com"})
+    resp = client.get(ALL_EVENTS, headers={"If-None-Match": etag})
+
+    assert resp.status_code == 200
+    assert resp.get_json()["events"][0]["registrations_count"] == 1
+
+
+def test_etag_from_before_a_restart_never_matches(client, make_event):
+    make_event()
+    response_cache.bump("events")
+    etag = client.get(ALL_EVENTS).headers["ETag"]
+
+    # Restarted process: the counter starts over and reaches the same value
+    response_cache.store = MemoryVersionStore()
+    make_event(title="Added after the restart", start_time="13:00", end_time="14:00")
+    response_cache.bump("events")
+    resp = client.get(ALL_EVENTS, headers={"If-None-Match": etag})
+
+    assert resp.status_code == 200
+    assert len(resp.get_json()["events"]) == 2
+
+
+def test_file_store_is_shared_between_processes(tmp_path):
+    web, jobs = FileVersionStore(str(tmp_path)), FileVersionStore(str(tmp_path))
+    before = web.get("events")
+
+    jobs.bump("events")
+
+    assert web.get("events") != before
+    assert web.get("events") == jobs.get("events")
+
+
+def test_file_store_starts_a_new_epoch_when_emptied(tmp_path):
+    store = FileVersionStore(str(tmp_path))
+    store.bump("events")
+    before_reboot = store.get("events")
+
+    for f in tmp_path.iterdir():
+        f.unlink()
+    store.bump("events")
+
+    assert store.get("events").endswith(".1")
+    assert store.get("events") != before_reboot
+
+
+def test_several_workers_need_a_shared_store():
+    with pytest.raises(RuntimeError, match="SHARED_STATE_DIR"):
+        create_app({"TESTING": True, "SECRET_KEY": "test-secret", "WEB_CONCURRENCY": 2})
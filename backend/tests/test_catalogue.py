@@ -0,0 +1,62 @@
+"""The event catalogue filters in the database, and rejects malformed filters."""
+from datetime import date, timedelta
+
+import pytest
+
+from models import Event
+from routes.student_routes import _filter_events
+
+
+def titles(client, query):
+    resp = client.get(f"/api/student/all-events?{query}")
+    assert resp.status_code == 200, resp.get_json()
+    return sorted(e["title"] for e in resp.get_json()["events"])
+
+
+@pytest.fixture
+def catalogue(make_event, make_user):
+    other = make_user(email="org2@example.com", reg_no="ORG2", role="organizer")
+    return {
+        "talk": make_event(title="Talk", category="Seminar", date="2030-03-01"),
+        "jam": make_event(title="Jam", category="Cultural", date="2030-03-15", status="Yellow"),
+        "race": make_event(title="Race", category="Sports", date="2030-04-01", venue_name="Track",
+                           organizer=other),
+    }
+
+
+def test_simple_filters(client, catalogue):
+    assert titles(client, "category=Seminar") == ["Talk"]
+    assert titles(client, "status=Yellow") == ["Jam"]
+    assert titles(client, f"venue_id={catalogue['race'].venue_id.id}") == ["Race"]
+    assert titles(client, f"organizer={catalogue['race'].organizer_id.id}") == ["Race"]
+    assert titles(client, "category=Seminar&status=Yellow") == []
+
+
+def test_date_range_is_inclusive(client, catalogue):
+    assert titles(client, "date_from=2030-03-01&date_to=2030-03-15") == ["Jam", "Talk"]
+    assert titles(client, "date_from=2030-03-02") == ["Jam", "Race"]
+
+
+def test_upcoming_and_this_week(client, make_event):
+    today = date.today()
+    monday = today - timedelta(days=today.weekday())
+    make_event(title="Yesterday", date=(today - timedelta(days=1)).isoformat())
+    make_event(title="Tomorrow", date=(today + timedelta(days=1)).isoformat(), start_time="13:00", end_time="14:00")
+    make_event(title="Monday", date=monday.isoformat(), start_time="00:00", end_time="00:30")
+    make_event(title="Next week", date=(monday + timedelta(days=7)).isoformat())
+
+    assert "Yesterday" not in titles(client, "upcoming=1")
+    assert {"Tomorrow", "Next week"} <= set(titles(client, "upcoming=1"))
+    assert "Monday" in titles(client, "this_week=1")
+    assert "Next week" not in titles(client, "this_week=true")
+
+
+def test_text_search_uses_the_text_index(app):
+    assert _filter_events(Event.objects, {"q": "robotics"})._query == {"$text": {"$search": "robotics"}}
+
+
+@pytest.mark.parametrize("query", ["venue_id=nope", "organizer=123"])
+def test_malformed_ids_are_rejected(client, query):
+    resp = client.get(f"/api/student/all-events?{query}")
+    assert resp.status_code == 400
+    assert "Invalid" in resp.get_json()["error"]
@@ -0,0 +1,153 @@
+"""Door check-in answers from the in-memory roster and writes back in one flush."""
+import time
+
+import pytest
+
+import routes.checkin_routes as checkin_routes
+from background import PerProcess
+from checkin import CheckInDesk
+from models import EventRegistration
+
+from conftest import register, sign_in
+
+
+def desk(app, **config):
+    """A desk without its flush thread; tests flush by hand."""
+    d = CheckInDesk()
+    d.configure({**app.config, **config})
+    d._worker = PerProcess(lambda: None)
+    return d
+
+
+@pytest.fixture
+def door(app, client, make_event, monkeypatch):
+    """An event with two registrations, a desk serving the routes, and its organizer signed in."""
+    d = desk(app)
+    monkeypatch.setattr(checkin_routes, "checkin_desk", d)
+    event = make_event()
+    register(client, event, email="ana@example.com", name="Ana", reg_no="r1", department="CSE", year="2")
+    register(client, event, email="bo@example.com", name="Bo", reg_no="R2")
+    sign_in(client, event.organizer_id)
+    return d, event
+
+
+def scan(client, event, code):
+    resp = client.post(f"/api/checkin/{event.id}", json={"code": code})
+    return resp.status_code, resp.get_json()["result"]
+
+
+def registration(email):
+    return next(r for r in EventRegistration.objects if r.participant_id.email == email)
+
+
+def status_of(email):
+    return registration(email).status
+
+
+def test_check_ins_are_written_back_by_the_flush(client, door):
+    d, event = door
+    assert scan(client, event, str(registration("ana@example.com").id)) == (200, "checked_in")
+    assert scan(client, event, " R1 ") == (200, "already_checked_in")
+    assert scan(client, event, "BO@example.com") == (200, "checked_in")
+    assert client.get(f"/api/checkin/{event.id}").get_json()["pending_flush"] == 2
+    assert status_of("ana@example.com") == "Registered"
+
+    assert d.flush() == 2
+
+    assert {status_of("ana@example.com"), status_of("bo@example.com")} == {"Attended"}
+    stats = client.get(f"/api/events/{event.id}/stats").get_json()["stats"]
+    assert stats["by_status"] == {"Attended": 2}
+    summary = client.get(f"/api/checkin/{event.id}").get_json()
+    assert (summary["attended"], summary["pending_flush"]) == (2, 0)
+
+
+def test_cancellation_before_the_flush_wins(client, door):
+    d, event = door
+    scan(client, event, "bo@example.com")
+    client.put(f"/api/registrations/{registration('bo@example.com').id}", json={"status": "Cancelled"})
+
+    assert d.flush() == 0
+
+    assert status_of("bo@example.com") == "Cancelled"
+    assert client.get(f"/api/events/{event.id}/stats").get_json()["stats"]["by_status"] == {
+        "Registered": 1, "Cancelled": 1}
+
+
+def test_cancelled_and_unknown_codes(client, door):
+    d, event = door
+    client.put(f"/api/registrations/{registration('bo@example.com').id}", json={"status": "Cancelled"})
+
+    assert scan(client, event, "bo@example.com") == (409, "not_allowed")
+    assert scan(client, event, "nobody@example.com") == (404, "not_found")
+
+
+def test_late_registrations_are_found_after_the_roster_loaded(client, door):
+    d, event = door
+    client.post(f"/api/checkin/{event.id}/roster")
+    register(client, event, email="cy@example.com", name="Cy")
+
+    assert scan(client, event, "cy@example.com") == (200, "checked_in")
+    assert d.flush() == 1
+
+
+def test_batch_check_in(client, door):
+    d, event = door
+    resp = client.post(f"/api/checkin/{event.id}/batch", json={"checkins": [
+        "ana@example.com", {"code": "R2", "scanned_at": "2030-01-01T09:00:00+02:00"},
+        {"code": "ana@example.com"}, {"code": ""}, 7,
+    ]})
+
+    body = resp.get_json()
+    assert body["summary"] == {"checked_in": 2, "already_checked_in": 1, "invalid": 2}
+    assert body["results"][1]["checked_in_at"] == "2030-01-01T07:00:00"
+    assert d.flush() == 2
+
+
+def test_check_in_needs_an_organizer(client, make_event):
+    event = make_event()
+    assert client.post(f"/api/checkin/{event.id}", json={"code": "x"}).status_code == 401
+    sign_in(client, event.organizer_id)
+    assert client.post("/api/checkin/0123456789abcdef01234567", json={"code": "x"}).status_code == 404
+    assert client.post(f"/api/checkin/{event.id}/batch", json={"checkins": []}).status_code == 400
+
+
+# -------------------------
+# Roster cache
+# -------------------------
+def test_rosters_are_capped_least_recently_scanned_first(app, client, make_event):
+    events = [make_event(title=f"Talk {i}", start_time=f"1{i}:00", end_time=f"1{i}:30") for i in range(3)]
+    for event in events:
+        register(client, event, email=f"{event.title[-1]}@example.com")
+    d = desk(app, CHECKIN_MAX_ROSTERS=2)
+
+    d.roster(events[0].id)
+    d.roster(events[1].id)
+    d.roster(events[0].id)  # scanned again, so events[1] is now the oldest
+    d.roster(events[2].id)
+
+    assert [d.has_roster(e.id) for e in events] == [True, False, True]
+
+
+def test_expired_rosters_are_dropped(app, client, make_event):
+    old, new = make_event(title="Old"), make_event(title="New", start_time="13:00", end_time="14:00")
+    d = desk(app, CHECKIN_ROSTER_TTL=60)
+
+    d.roster(old.id)
+    d._rosters[old.id].loaded_at = time.monotonic() - 61
+    d.roster(new.id)
+
+    assert not d.has_roster(old.id)
+    assert d.has_roster(new.id)
+
+
+def test_evicted_rosters_keep_their_pending_check_ins(app, client, make_event):
+    first, second = make_event(title="First"), make_event(title="Second", start_time="13:00", end_time="14:00")
+    register(client, first, email="ana@example.com")
+    d = desk(app, CHECKIN_MAX_ROSTERS=1)
+
+    assert d.check_in(first.id, "ana@example.com")[0] == "checked_in"
+    d.roster(second.id)
+
+    assert not d.has_roster(first.id)
+    assert d.flush() == 1
+    assert d.check_in(first.id, "ana@example.com")[0] == "already_checked_in"
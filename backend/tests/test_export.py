@@ -0,0 +1,60 @@
+"""Exports stream every registration of one event, oldest first, as CSV or NDJSON."""
+import csv
+import io
+import json
+from datetime import datetime
+
+import registration_export
+from models import EventRegistration, Participant
+
+from conftest import register, sign_in
+
+
+def fill(client, event, n):
+    for i in range(n):
+        register(client, event, email=f"p{i}@example.com", name=f"Person {i}", department="CSE")
+    # Registered in reverse order, so the export order is not just insertion order
+    for i, reg in enumerate(EventRegistration.objects(event_id=event.id).order_by("id")):
+        reg.update(set__registration_time=datetime(2030, 1, 1, 9, 59 - i))
+
+
+def test_csv_export(client, make_event):
+    event = make_event()
+    other = make_event(title="Other", start_time="13:00", end_time="14:00")
+    fill(client, event, 3)
+    register(client, other, email="elsewhere@example.com")
+    sign_in(client, event.organizer_id)
+
+    resp = client.get(f"/api/registrations/export?event_id={event.id}")
+
+    assert resp.mimetype == "text/csv"
+    assert resp.is_streamed
+    assert f"participants-{event.id}.csv" in resp.headers["Content-Disposition"]
+    rows = list(csv.DictReader(io.StringIO(resp.get_data(as_text=True))))
+    assert [r["email"] for r in rows] == ["p2@example.com", "p1@example.com", "p0@example.com"]
+    assert rows[0]["registration_time"] == "2030-01-01T09:57:00"
+    assert rows[0]["phone"] == ""
+
+
+def test_ndjson_export_in_chunks(client, make_event, monkeypatch):
+    monkeypatch.setattr(registration_export, "CHUNK_SIZE", 2)
+    event = make_event()
+    fill(client, event, 5)
+    # A participant removed before its registrations were cleaned up is skipped
+    Participant._get_collection().delete_one({"email": "p4@example.com"})
+    sign_in(client, event.organizer_id)
+
+    resp = client.get(f"/api/registrations/export?event_id={event.id}&format=ndjson")
+
+    assert resp.mimetype == "application/x-ndjson"
+    rows = [json.loads(line) for line in resp.get_data(as_text=True).splitlines()]
+    assert [r["name"] for r in rows] == ["Person 3", "Person 2", "Person 1", "Person 0"]
+    assert set(rows[0]) == set(registration_export.EXPORT_COLUMNS)
+
+
+def test_export_needs_an_organizer(client, make_event):
+    event = make_event()
+    assert client.get(f"/api/registrations/export?event_id={event.id}").status_code == 401
+    sign_in(client, event.organizer_id)
+    assert client.get("/api/registrations/export").status_code == 400
+    assert client.get("/api/registrations/export?event_id=0123456789abcdef01234567").status_code == 404
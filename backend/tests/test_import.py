@@ -0,0 +1,82 @@
+"""Bulk imports report every row and never sell more seats than the event has."""
+import bulk_registration
+from models import Event, EventRegistration, Participant
+
+from conftest import register, sign_in
+
+CSV = (
+    "name,email,department,year\n"
+    "Ana,ana@example.com,CSE,2\n"
+    "Bo,BO@example.com,ECE,3\n"
+    ",nameless@example.com,CSE,1\n"
+    "Bo again,bo@example.com,ECE,3\n"
+    "Cy,cy@example.com,CSE,4\n"
+)
+
+
+def import_rows(client, event, body, **kwargs):
+    return client.post(f"/api/registrations/import?event_id={event.id}", data=body.encode(), **kwargs)
+
+
+def test_csv_rows_are_registered_and_reported(client, make_event):
+    event = make_event(max_participants=10)
+    sign_in(client, event.organizer_id)
+
+    body = import_rows(client, event, CSV, content_type="text/csv").get_json()
+
+    assert body["summary"] == {"registered": 3, "invalid": 1, "duplicate": 1}
+    assert [r["status"] for r in body["rows"]] == ["registered", "registered", "invalid", "duplicate", "registered"]
+    assert body["rows"][1]["email"] == "bo@example.com"
+    assert Event.objects.get(id=event.id).registrations_count == 3
+    assert EventRegistration.objects(event_id=event.id).count() == 3
+
+
+def test_capacity_is_shared_across_batches(client, make_event, monkeypatch):
+    monkeypatch.setattr(bulk_registration, "BATCH_SIZE", 2)
+    event = make_event(max_participants=3)
+    sign_in(client, event.organizer_id)
+    csv = "name,email\n" + "".join(f"P{i},p{i}@example.com\n" for i in range(5))
+
+    rows = import_rows(client, event, csv).get_json()["rows"]
+
+    assert [r["status"] for r in rows] == ["registered"] * 3 + ["full"] * 2
+    assert Event.objects.get(id=event.id).registrations_count == 3
+
+
+def test_already_registered_participants_are_duplicates(client, make_event):
+    event = make_event()
+    register(client, event, email="ana@example.com", name="Ana", department="MECH")
+    sign_in(client, event.organizer_id)
+
+    rows = import_rows(client, event, "name,email,department\nAna,Ana@Example.com,CSE\n").get_json()["rows"]
+
+    assert rows[0]["status"] == "duplicate"
+    # An existing participant is matched, never overwritten
+    assert Participant.objects.get(email="ana@example.com").department == "MECH"
+
+
+def test_ndjson_reports_malformed_lines(client, make_event, make_user):
+    event = make_event()
+    user = make_user(email="ana@example.com")
+    sign_in(client, event.organizer_id)
+    body = '{"name": "Ana", "email": "ana@example.com"}\nnot json\n\n["a list"]\n'
+
+    rows = import_rows(client, event, body, content_type="application/x-ndjson").get_json()["rows"]
+
+    assert [r["status"] for r in rows] == ["registered", "invalid", "invalid"]
+    assert Participant.objects.get(email="ana@example.com").user_id.id == user.id
+
+
+def test_import_needs_an_organizer(client, make_event, make_user):
+    event = make_event()
+    assert import_rows(client, event, CSV).status_code == 401
+    sign_in(client, make_user(email="stu@example.com", reg_no="STU1"))
+    assert import_rows(client, event, CSV).status_code == 403
+    assert EventRegistration.objects.count() == 0
+
+
+def test_import_into_a_missing_event(client, make_event):
+    event = make_event()
+    sign_in(client, event.organizer_id)
+    assert client.post("/api/registrations/import").status_code == 400
+    assert client.post("/api/registrations/import?event_id=0123456789abcdef01234567").status_code == 404
@@ -0,0 +1,74 @@
+from datetime import datetime
+
+from bson import ObjectId
+
+from conftest import register
+from indexes import sync_indexes
+from jobs import enqueue
+from models import Event, EventRegistration, Job, Participant
+
+
+def test_duplicate_registration_rejected_without_unique_index(client, make_event):
+    event = make_event()
+
+    assert register(client, event).status_code == 201
+    resp = register(client, event)
+
+    assert resp.status_code == 409
+    assert EventRegistration.objects(event_id=event.id).count() == 1
+    assert Event.objects.get(id=event.id).registrations_count == 1
+
+
+def test_duplicate_registration_rejected_by_unique_index(client, indexed, make_event):
+    event = make_event()
+
+    assert register(client, event).status_code == 201
+    assert register(client, event).status_code == 409
+    assert Event.objects.get(id=event.id).registrations_count == 1
+
+
+def test_ready_until_unique_indexes_exist(client):
+    resp = client.get("/api/health/ready")
+    assert resp.status_code == 503
+    assert "event_registrations: [('event_id', 1), ('participant_id', 1)]" in \
+        resp.get_json()["mongodb"]["missing_unique_indexes"]
+
+    assert sync_indexes(log=lambda msg: None)
+    assert client.get("/api/health/ready").status_code == 200
+
+
+def test_sync_indexes_removes_duplicate_registrations(app, make_event):
+    event = make_event()
+    participant = Participant(name="Ana", email="ana@example.com").save()
+    ids = [ObjectId() for _ in range(3)]
+    EventRegistration._get_collection().insert_many([
+        {"_id": ids[0], "event_id": event.id, "participant_id": participant.id,
+         "status": "Cancelled", "registration_time": datetime(2030, 1, 1)},
+        {"_id": ids[1], "event_id": event.id, "participant_id": participant.id,
+         "status": "Registered", "registration_time": datetime(2030, 1, 2)},
+        {"_id": ids[2], "event_id": event.id, "participant_id": participant.id,
+         "status": "Registered", "registration_time": datetime(2030, 1, 3)},
+    ])
+    event.update(set__registrations_count=2)
+
+    assert sync_indexes(log=lambda msg: None)
+
+    assert list(EventRegistration.objects.scalar("id")) == [ids[1]]
+    assert Event.objects.get(id=event.id).registrations_count == 1
+
+
+def test_enqueue_dedupes_without_index(app):
+    assert enqueue("reconcile_counts", dedupe_key="reconcile_counts")
+    assert enqueue("reconcile_counts", dedupe_key="reconcile_counts") is None
+    assert Job.objects(dedupe_key="reconcile_counts").count() == 1
+
+
+def test_sync_indexes_removes_duplicate_pending_jobs(app):
+    Job._get_collection().insert_many([
+        {"kind": "reconcile_counts", "dedupe_key": "reconcile_counts", "status": "queued",
+         "run_after": datetime(2030, 1, day)} for day in (1, 2, 3)
+    ])
+
+    assert sync_indexes(log=lambda msg: None)
+
+    assert [j.run_after.day for j in Job.objects(dedupe_key="reconcile_counts")] == [1]
@@ -0,0 +1,80 @@
+"""Job runner: leases, retries with backoff, and the cascades it runs."""
+from datetime import datetime, timedelta
+
+import jobs
+from jobs import MAX_ATTEMPTS, claim, enqueue, reconcile_counts, run_one
+from models import Event, EventRegistration, Job, Tombstone
+
+from conftest import register, sign_in
+
+
+def test_claimed_job_is_leased(app):
+    enqueue("noop")
+
+    job = claim()
+    assert job.status == "running" and job.attempts == 1
+    assert job.locked_until > datetime.utcnow()
+    assert claim() is None
+
+
+def test_expired_lease_is_claimed_again(app):
+    enqueue("noop")
+    job = claim()
+    # Its worker died; the lease runs out
+    job.update(set__locked_until=datetime.utcnow() - timedelta(seconds=1))
+
+    again = claim()
+    assert again.id == job.id
+    assert again.attempts == 2
+
+
+def test_failed_job_is_retried_then_given_up(app, monkeypatch):
+    def boom():
+        raise RuntimeError("boom")
+    monkeypatch.setitem(jobs.HANDLERS, "boom", boom)
+    job = enqueue("boom")
+
+    assert run_one()
+    job.reload()
+    assert job.status == "queued" and job.run_after > datetime.utcnow()
+
+    job.update(set__attempts=MAX_ATTEMPTS - 1, set__run_after=datetime.utcnow())
+    run_one()
+    job.reload()
+    assert job.status == "failed" and job.error == "boom"
+
+
+def test_claiming_frees_the_dedupe_key(app):
+    assert enqueue("noop", dedupe_key="once")
+    assert enqueue("noop", dedupe_key="once") is None
+
+    claim()
+    assert enqueue("noop", dedupe_key="once")
+
+
+def test_delete_event_cascade_removes_registrations(client, make_event):
+    event = make_event()
+    register(client, event, email="a@example.com")
+    register(client, event, email="b@example.com")
+
+    sign_in(client, event.organizer_id)
+    client.delete(f"/api/events/{event.id}")
+    while run_one():
+        pass
+
+    assert EventRegistration.objects(event_id=event.id).count() == 0
+    assert Tombstone.objects(collection="event_registrations", scope=event.id).count() == 2
+    assert Job.objects(kind="delete_event", status="done").count() == 1
+
+
+def test_reconcile_fixes_a_counter_only_when_it_stays_wrong(client, make_event):
+    event = make_event()
+    register(client, event)
+    Event.objects(id=event.id).update(set__registrations_count=4)
+
+    reconcile_counts()
+    assert Event.objects.get(id=event.id).registrations_count == 4
+
+    suspects = Job.objects.get(kind="reconcile_counts").params["suspects"]
+    reconcile_counts(suspects)
+    assert Event.objects.get(id=event.id).registrations_count == 1
@@ -0,0 +1,98 @@
+"""Sign-ups are linked to the account with the same email, whatever its case."""
+from bulk_registration import accounts_for
+from migrations import normalize_user_emails
+from models import Participant, User
+
+from conftest import register, sign_in
+
+
+def test_mixed_case_account_links_registration(client, make_user, make_event):
+    user = make_user(email="Ana.Silva@Example.COM")
+    assert User.objects.get(id=user.id).email == "ana.silva@example.com"
+
+    assert register(client, make_event(), email="ANA.SILVA@example.com").status_code == 201
+    assert Participant.objects.get(email="ana.silva@example.com").user_id.id == user.id
+
+
+def test_accounts_for_normalizes_the_lookup(make_user):
+    user = make_user(email="ana@example.com")
+    assert accounts_for([" Ana@Example.com "]) == {"ana@example.com": user.id}
+
+
+def test_login_ignores_email_case(client, make_user):
+    make_user(email="ana@example.com", password="pw")
+    resp = client.post("/api/login", json={"email": "ANA@Example.com", "password": "pw"})
+    assert resp.get_json()["success"]
+
+
+def test_signup_claims_earlier_sign_ups(client, make_event):
+    register(client, make_event(), email="bo@example.com", name="Bo")
+    client.post("/api/signup", json={
+        "reg_no": "REG2", "name": "Bo", "email": "Bo@Example.com", "password": "pw",
+        "role": "student", "department": "CSE", "year": 2,
+    })
+    user = User.objects.get(email="bo@example.com")
+    assert Participant.objects.get(email="bo@example.com").user_id.id == user.id
+
+
+def test_edited_email_is_normalized_and_relinked(client, make_user, make_event):
+    register(client, make_event(), email="old@example.com", name="Eve")
+    participant = Participant.objects.get(email="old@example.com")
+    user = make_user(email="eve@example.com")
+
+    resp = client.put(f"/api/registrations/participants/{participant.id}",
+                      json={"email": " Eve@Example.COM "})
+
+    assert resp.status_code == 200
+    participant.reload()
+    assert participant.email == "eve@example.com"
+    assert participant.user_id.id == user.id
+    sign_in(client, user)
+    assert len(client.get(f"/api/student/registered-events/{user.id}").get_json()["events"]) == 1
+
+
+def test_edited_email_unlinks_the_old_account(client, make_user, make_event):
+    user = make_user(email="fay@example.com")
+    register(client, make_event(), email="fay@example.com", name="Fay")
+    participant = Participant.objects.get(email="fay@example.com")
+
+    client.put(f"/api/registrations/participants/{participant.id}", json={"email": "fay@other.org"})
+
+    assert Participant.objects.get(id=participant.id).user_id is None
+
+
+def test_edited_email_must_stay_unique(client, make_event):
+    event = make_event()
+    register(client, event, email="gus@example.com", name="Gus")
+    register(client, event, email="hal@example.com", name="Hal")
+    hal = Participant.objects.get(email="hal@example.com")
+
+    resp = client.put(f"/api/registrations/participants/{hal.id}", json={"email": "GUS@example.com"})
+
+    assert resp.status_code == 409
+    assert Participant.objects.get(id=hal.id).email == "hal@example.com"
+
+
+def test_normalize_user_emails_fixes_older_accounts(client, make_user, make_event):
+    user = make_user(email="cy@example.com")
+    # Saved before User.clean() lower-cased emails
+    User._get_collection().update_one({"_id": user.id}, {"$set": {"email": "Cy@Example.com"}})
+    register(client, make_event(), email="cy@example.com", name="Cy")
+    assert Participant.objects.get(email="cy@example.com").user_id is None
+
+    updated, _ = normalize_user_emails(log=lambda msg: None)
+
+    assert updated == 1
+    assert User.objects.get(id=user.id).email == "cy@example.com"
+    assert Participant.objects.get(email="cy@example.com").user_id.id == user.id
+
+
+def test_normalize_user_emails_skips_collisions(make_user):
+    make_user(email="dee@example.com", reg_no="REG3")
+    other = make_user(email="dee2@example.com", reg_no="REG4")
+    User._get_collection().update_one({"_id": other.id}, {"$set": {"email": "DEE@example.com"}})
+
+    updated, _ = normalize_user_emails(log=lambda msg: None)
+
+    assert updated == 0
+    assert User._get_collection().find_one({"_id": other.id})["email"] == "DEE@example.com"
@@ -0,0 +1,69 @@
+"""Listings load the participants behind their registrations in one query, not one per row."""
+import mongomock
+import pytest
+
+from models import Participant
+
+from conftest import register
+
+
+@pytest.fixture
+def finds(monkeypatch):
+    """Count find() calls per collection."""
+    calls = []
+    find = mongomock.collection.Collection.find
+
+    def counted(self, *args, **kwargs):
+        calls.append(self.name)
+        return find(self, *args, **kwargs)
+
+    monkeypatch.setattr(mongomock.collection.Collection, "find", counted)
+    return calls
+
+
+def fill(client, event, n):
+    for i in range(n):
+        register(client, event, email=f"p{i}@example.com", name=f"Person {i}", department="CSE")
+
+
+@pytest.mark.parametrize("url", [
+    "/api/registrations/participants?event_id={id}",
+    "/api/registrations/participants?event_id={id}&limit=50",
+    "/api/registrations/?event_id={id}",
+])
+def test_participant_queries_do_not_grow_with_the_list(client, make_event, finds, url):
+    small, large = make_event(title="Small"), make_event(title="Large", start_time="13:00", end_time="14:00")
+    fill(client, small, 2)
+    fill(client, large, 8)
+
+    counts = []
+    for event in (small, large):
+        finds.clear()
+        assert client.get(url.format(id=event.id)).status_code == 200
+        counts.append(finds.count(Participant._get_collection_name()))
+    assert counts == [1, 1]
+
+
+def test_rows_carry_their_participant(client, make_event):
+    event = make_event()
+    fill(client, event, 3)
+
+    rows = client.get(f"/api/registrations/participants?event_id={event.id}").get_json()["rows"]
+
+    assert sorted((r["name"], r["email"]) for r in rows) == [
+        (f"Person {i}", f"p{i}@example.com") for i in range(3)
+    ]
+    regs = client.get(f"/api/registrations/?event_id={event.id}").get_json()["registrations"]
+    assert {r["event_id"] for r in regs} == {str(event.id)}
+    assert sorted(r["name"] for r in regs) == [f"Person {i}" for i in range(3)]
+
+
+def test_rows_of_deleted_participants_are_skipped(client, make_event):
+    event = make_event()
+    fill(client, event, 2)
+    # Removed behind the registrations' back; the background job has not run yet
+    Participant._get_collection().delete_one({"email": "p0@example.com"})
+
+    rows = client.get(f"/api/registrations/participants?event_id={event.id}&limit=10").get_json()["rows"]
+
+    assert [r["email"] for r in rows] == ["p1@example.com"]
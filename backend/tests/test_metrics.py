@@ -0,0 +1,70 @@
+"""Requests and the MongoDB commands they issue are counted per endpoint and served at /metrics."""
+import logging
+from types import SimpleNamespace
+
+import pytest
+
+import metrics
+from metrics import Histogram, QueryListener, Registry
+
+
+@pytest.fixture
+def registry(monkeypatch):
+    fresh = Registry()
+    monkeypatch.setattr(metrics, "registry", fresh)
+    return fresh
+
+
+def command(name, micros=2000):
+    return SimpleNamespace(command_name=name, duration_micros=micros)
+
+
+def test_histogram_buckets_are_cumulative():
+    h = Histogram((1, 5, 10))
+    for value in (1, 3, 7, 50):
+        h.observe(value)
+    assert h.counts == [1, 2, 3]
+    assert (h.total, h.sum) == (4, 61)
+
+
+def test_requests_are_served_at_metrics(client, registry):
+    client.get("/api/venues/")
+    client.get("/api/events/0123456789abcdef01234567")
+
+    body = client.get("/metrics").get_data(as_text=True)
+
+    assert 'http_requests_total{endpoint="venue_bp.get_all_venues",method="GET",status="200"} 1' in body
+    assert 'http_requests_total{endpoint="event_bp.get_event",method="GET",status="404"} 1' in body
+    assert 'http_request_duration_seconds_count{endpoint="venue_bp.get_all_venues"} 1' in body
+
+
+def test_commands_are_charged_to_the_request(app, registry):
+    listener = QueryListener()
+    with app.test_request_context("/api/venues/"):
+        app.preprocess_request()
+        listener.succeeded(command("find"))
+        listener.failed(command("insert", 1000))
+        app.process_response(app.response_class())
+
+    listener.succeeded(command("update"))  # outside any request
+
+    assert registry.commands == {("venue_bp.get_all_venues", "find"): 1,
+                                 ("venue_bp.get_all_venues", "insert"): 1,
+                                 ("background", "update"): 1}
+    assert registry.command_failures == {("venue_bp.get_all_venues", "insert"): 1}
+    assert registry.queries["venue_bp.get_all_venues"].sum == 2
+    assert registry.command_seconds["venue_bp.get_all_venues"] == pytest.approx(0.003)
+
+
+def test_requests_over_the_query_budget_are_logged(app, registry, caplog):
+    app.config["QUERY_BUDGET"] = 2
+    listener = QueryListener()
+    with caplog.at_level(logging.WARNING), app.test_request_context("/api/venues/"):
+        app.preprocess_request()
+        for _ in range(3):
+            listener.succeeded(command("find"))
+        app.process_response(app.response_class())
+
+    assert registry.budget_exceeded == {"venue_bp.get_all_venues": 1}
+    assert "Possible N+1: GET /api/venues/ issued 3 MongoDB commands" in caplog.text
+    assert 'mongo_query_budget_exceeded_total{endpoint="venue_bp.get_all_venues"} 1' in registry.render()
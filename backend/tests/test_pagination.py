@@ -0,0 +1,69 @@
+"""Keyset pages walk a list exactly once, and the unpaged shapes stay as they were."""
+from datetime import datetime
+
+import pytest
+
+from models import EventRegistration, Venue
+
+from conftest import bearer, register
+
+
+def walk(client, url, key, **kwargs):
+    """Follow next_cursor to the end; returns the pages."""
+    pages, cursor = [], None
+    while True:
+        sep = "&" if "?" in url else "?"
+        body = client.get(url + (f"{sep}cursor={cursor}" if cursor else ""), **kwargs).get_json()
+        pages.append(body[key])
+        cursor = body["next_cursor"]
+        if not cursor:
+            return pages
+
+
+def test_venue_pages_follow_id_order(client):
+    ids = [str(Venue(venue_name=f"Hall {i}").save().id) for i in range(5)]
+
+    pages = walk(client, "/api/venues/?limit=2", "venues")
+
+    assert [len(p) for p in pages] == [2, 2, 1]
+    assert [v["id"] for p in pages for v in p] == ids
+
+
+def test_registration_pages_are_newest_first_with_ties_broken_by_id(client, make_event):
+    event = make_event()
+    for i in range(5):
+        register(client, event, email=f"p{i}@example.com")
+    regs = list(EventRegistration.objects.order_by("id"))
+    # Three share a timestamp, so the cursor must fall back to _id
+    times = [datetime(2030, 1, 1, 9), datetime(2030, 1, 1, 10), datetime(2030, 1, 1, 10),
+             datetime(2030, 1, 1, 10), datetime(2030, 1, 1, 11)]
+    for reg, when in zip(regs, times):
+        reg.update(set__registration_time=when)
+
+    pages = walk(client, f"/api/registrations/?event_id={event.id}&limit=2", "registrations")
+
+    expected = [regs[4], regs[3], regs[2], regs[1], regs[0]]
+    assert [r["registration_id"] for p in pages for r in p] == [str(r.id) for r in expected]
+
+
+def test_users_are_wrapped_only_when_paged(client, make_user):
+    admin = bearer(make_user(email="root@example.com", reg_no="ROOT", role="admin"))
+    make_user(email="bo@example.com", reg_no="REG2")
+
+    assert isinstance(client.get("/api/users", headers=admin).get_json(), list)
+    pages = walk(client, "/api/users?limit=1", "users", headers=admin)
+    assert sorted(u["email"] for p in pages for u in p) == ["bo@example.com", "root@example.com"]
+
+
+def test_unpaged_catalogue_has_no_cursor(client, make_event):
+    make_event()
+    body = client.get("/api/student/all-events?category=").get_json()
+    assert "next_cursor" not in body
+    assert len(body["events"]) == 1
+
+
+@pytest.mark.parametrize("query", ["limit=0", "limit=abc", "cursor=not-a-cursor", "cursor=WzFd"])
+def test_bad_paging_parameters_are_rejected(client, query):
+    resp = client.get(f"/api/venues/?{query}")
+    assert resp.status_code == 400
+    assert not resp.get_json()["success"]
@@ -0,0 +1,69 @@
+"""Admission control: per-client and per-client-and-email buckets, and the concurrency cap."""
+import pytest
+
+from app import create_app
+from database import mongomock_client
+from ratelimit import FileSlots, MemoryBucketStore, RateLimiter, rate_limiter
+
+from conftest import TEST_CONFIG
+
+LIMITS = {
+    "RATE_LIMIT_ENABLED": True,
+    "AUTH_CLIENT_RATE_PER_MINUTE": 1, "AUTH_CLIENT_BURST": 3,
+    "AUTH_RATE_PER_MINUTE": 1, "AUTH_BURST": 2,
+}
+
+
+@pytest.fixture
+def limited(monkeypatch):
+    monkeypatch.setattr(rate_limiter, "store", MemoryBucketStore())
+    app = create_app({**TEST_CONFIG, **LIMITS, "MONGO_CLIENT_CLASS": mongomock_client()})
+    return app.test_client()
+
+
+def login(client, email, addr="10.0.0.1"):
+    return client.post("/api/login", json={"email": email, "password": "pw"},
+                       environ_base={"REMOTE_ADDR": addr})
+
+
+def test_changing_the_email_does_not_reset_the_client_bucket(limited):
+    codes = [login(limited, f"user{i}@example.com").status_code for i in range(5)]
+    assert codes == [200, 200, 200, 429, 429]
+
+
+def test_one_client_is_limited_per_email(limited):
+    codes = [login(limited, "ana@example.com").status_code for _ in range(4)]
+    assert codes == [200, 200, 429, 429]
+
+
+def test_others_cannot_lock_an_email_out(limited):
+    # Someone who knows the address burns through its attempts
+    for i in range(4):
+        login(limited, "ana@example.com", addr="10.6.6.6")
+
+    assert login(limited, "ana@example.com", addr="10.0.0.1").status_code == 200
+
+
+def test_retry_after_is_set(limited):
+    for _ in range(2):
+        login(limited, "ana@example.com")
+    resp = login(limited, "ana@example.com")
+    assert resp.status_code == 429
+    assert int(resp.headers["Retry-After"]) >= 1
+
+
+def test_file_slots_cap_every_process_on_the_host(tmp_path):
+    # Two limiters stand in for two workers sharing RATE_LIMIT_DIR
+    a = RateLimiter(slots=FileSlots(str(tmp_path)))
+    b = RateLimiter(slots=FileSlots(str(tmp_path)))
+    a.concurrency = b.concurrency = 2
+
+    first, second = a.acquire(), b.acquire()
+    assert first is not None and second is not None
+    assert a.acquire() is None and b.acquire() is None
+
+    a.release(first)
+    third = b.acquire()
+    assert third is not None
+    b.release(second)
+    b.release(third)
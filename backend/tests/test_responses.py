@@ -0,0 +1,94 @@
+"""?fields= trims list responses, and large JSON bodies are compressed when the client accepts it."""
+import gzip
+import json
+
+import pytest
+
+import compression
+
+from conftest import register, sign_in
+
+ALL_EVENTS = "/api/student/all-events"
+
+
+def test_sparse_events_keep_their_ids(client, make_event):
+    event = make_event()
+
+    row = client.get(f"{ALL_EVENTS}?fields=title,date").get_json()["events"][0]
+    assert row == {"id": str(event.id), "title": "Hackathon", "date": "2030-01-01"}
+
+    row = client.get(f"/api/events/{event.id}?fields=venue_id").get_json()["event"]
+    assert row == {"id": str(event.id), "venue_id": str(event.venue_id.id)}
+
+
+def test_sparse_registration_rows(client, make_event):
+    event = make_event()
+    register(client, event, email="ana@example.com", department="CSE")
+
+    row = client.get(f"/api/registrations/participants?event_id={event.id}&fields=email,status").get_json()["rows"][0]
+
+    assert set(row) == {"registration_id", "participant_id", "email", "status"}
+    assert (row["email"], row["status"]) == ("ana@example.com", "Registered")
+
+
+def test_sparse_users(client, make_user):
+    admin = make_user(email="root@example.com", reg_no="ROOT", role="admin")
+    sign_in(client, admin)
+
+    assert client.get("/api/users?fields=email").get_json() == [{"_id": str(admin.id), "email": "root@example.com"}]
+
+
+def test_unknown_fields_are_rejected(client):
+    resp = client.get(f"{ALL_EVENTS}?fields=title,password")
+    assert resp.status_code == 400
+    assert resp.get_json()["error"] == "Unknown fields: password"
+
+
+@pytest.fixture
+def many_events(make_event):
+    for i in range(20):
+        make_event(title=f"Event {i}", description="A long description. " * 5)
+
+
+def test_large_json_is_gzipped(client, many_events, monkeypatch):
+    monkeypatch.setattr(compression, "brotli", None)
+    plain = client.get(ALL_EVENTS)
+    resp = client.get(ALL_EVENTS, headers={"Accept-Encoding": "gzip"})
+
+    assert resp.headers["Content-Encoding"] == "gzip"
+    assert "Accept-Encoding" in resp.headers["Vary"]
+    assert len(resp.data) < len(plain.data)
+    assert json.loads(gzip.decompress(resp.data)) == plain.get_json()
+    assert "Content-Encoding" not in plain.headers
+
+
+def test_brotli_is_preferred_when_installed(client, many_events):
+    brotli = pytest.importorskip("brotli")
+    resp = client.get(ALL_EVENTS, headers={"Accept-Encoding": "gzip, br"})
+    assert resp.headers["Content-Encoding"] == "br"
+    assert json.loads(brotli.decompress(resp.data))["success"]
+
+
+def test_small_bodies_are_sent_as_they_are(client):
+    resp = client.get("/api/health/live", headers={"Accept-Encoding": "gzip"})
+    assert "Content-Encoding" not in resp.headers
+
+
+def test_compressed_etag_still_revalidates(client, many_events):
+    resp = client.get(ALL_EVENTS, headers={"Accept-Encoding": "gzip"})
+    etag, weak = resp.get_etag()
+    assert weak
+
+    again = client.get(ALL_EVENTS, headers={"Accept-Encoding": "gzip", "If-None-Match": f'W/"{etag}"'})
+    assert again.status_code == 304
+
+
+def test_streamed_exports_are_not_compressed(client, make_event):
+    event = make_event()
+    register(client, event)
+    sign_in(client, event.organizer_id)
+
+    resp = client.get(f"/api/registrations/export?event_id={event.id}", headers={"Accept-Encoding": "gzip"})
+
+    assert "Content-Encoding" not in resp.headers
+    assert resp.get_data(as_text=True).startswith("name,email")
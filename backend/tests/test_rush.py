@@ -0,0 +1,60 @@
+"""Write-behind registrations: statuses across workers and duplicates without indexes."""
+from background import PerProcess
+from models import Event, EventRegistration
+from rush import FileStatuses, RushQueue
+
+
+def worker(statuses=None):
+    """A RushQueue standing in for one worker process, flushed by hand."""
+    queue = RushQueue()
+    queue._worker = PerProcess(lambda: None)
+    if statuses is not None:
+        queue.statuses = statuses
+    return queue
+
+
+def fields(email="ana@example.com"):
+    return {"name": "Ana", "email": email, "phone": "", "reg_no": "", "department": "CSE", "year": "2"}
+
+
+def test_status_is_visible_from_another_worker(make_event, tmp_path):
+    event = make_event()
+    a, b = worker(FileStatuses(str(tmp_path))), worker(FileStatuses(str(tmp_path)))
+
+    status, reg_id = a.submit(event.id, fields())
+    assert status == "queued"
+    assert b.status(reg_id)["status"] == "queued"
+
+    a.flush()
+    assert b.status(reg_id)["status"] == "registered"
+
+
+def test_duplicate_across_workers_without_unique_index(make_event):
+    event = make_event(max_participants=5)
+    a, b = worker(), worker()
+    a.seat_block = b.seat_block = 2
+
+    _, first = a.submit(event.id, fields())
+    _, second = b.submit(event.id, fields())
+    a.flush()
+    b.flush()
+    a.return_seats()
+    b.return_seats()
+
+    assert a.status(first)["status"] == "registered"
+    assert b.status(second)["status"] == "duplicate"
+    assert EventRegistration.objects(event_id=event.id).count() == 1
+    assert Event.objects.get(id=event.id).registrations_count == 1
+
+
+def test_leased_seats_never_oversell(make_event):
+    event = make_event(max_participants=3)
+    a, b = worker(), worker()
+    a.seat_block = b.seat_block = 2
+
+    answers = [q.submit(event.id, fields(f"p{i}@example.com"))[0] for i, q in enumerate([a, b, a, b, a])]
+    a.flush()
+    b.flush()
+
+    assert answers.count("queued") == 3
+    assert EventRegistration.objects(event_id=event.id).count() == 3
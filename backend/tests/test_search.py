@@ -0,0 +1,88 @@
+"""Prefix search matches the start of any name word, the email or the reg_no, ignoring case and accents."""
+import pytest
+
+from migrations import backfill_search_keys
+from models import Participant, User
+from search import MAX_LIMIT
+
+from conftest import register, sign_in
+
+SEARCH = "/api/registrations/participants/search"
+
+
+def names(client, query):
+    resp = client.get(f"{SEARCH}?{query}")
+    assert resp.status_code == 200, resp.get_json()
+    body = resp.get_json()
+    return sorted(r["name"] for r in body["rows" if "event_id" in query else "participants"])
+
+
+@pytest.fixture
+def people(client, make_event):
+    event = make_event()
+    register(client, event, email="jose@example.com", name="José Álvarez", reg_no="cs101")
+    register(client, event, email="joan@example.com", name="Joan Baez", reg_no="EE202")
+    register(client, make_event(title="Other", start_time="13:00", end_time="14:00"),
+             email="alvaro@example.org", name="Álvaro Jones", reg_no="ME303")
+    return event
+
+
+def test_prefixes_ignore_case_and_accents(client, people):
+    assert names(client, "q=JOSE") == ["José Álvarez"]
+    assert names(client, "q=alv") == ["José Álvarez", "Álvaro Jones"]
+    assert names(client, "q=jo") == ["Joan Baez", "José Álvarez", "Álvaro Jones"]
+
+
+def test_every_term_must_match(client, people):
+    assert names(client, "q=jo%20alv") == ["José Álvarez", "Álvaro Jones"]
+    assert names(client, "q=jo%20baez") == ["Joan Baez"]
+
+
+def test_email_and_reg_no_prefixes(client, people):
+    assert names(client, "q=alvaro@example") == ["Álvaro Jones"]
+    assert names(client, "q=CS1") == ["José Álvarez"]
+
+
+def test_terms_are_not_patterns(client, people):
+    assert names(client, "q=j.s") == []
+    assert names(client, "q=.*") == []
+
+
+def test_search_within_one_event(client, people):
+    assert names(client, f"q=jo&event_id={people.id}") == ["Joan Baez", "José Álvarez"]
+    assert client.get(f"{SEARCH}?q=jo&event_id=0123456789abcdef01234567").status_code == 404
+
+
+def test_limit_and_missing_query(client, people):
+    assert len(names(client, "q=jo&limit=2")) == 2
+    assert client.get(f"{SEARCH}?q=jo&limit={MAX_LIMIT + 1}").status_code == 200
+    assert client.get(f"{SEARCH}?q=%20").status_code == 400
+    assert client.get(f"{SEARCH}?q=jo&limit=0").status_code == 400
+
+
+def test_edits_keep_the_keys_in_step(client, people):
+    joan = Participant.objects.get(email="joan@example.com")
+    client.put(f"/api/registrations/participants/{joan.id}", json={"name": "Joanna Smith"})
+
+    assert names(client, "q=smi") == ["Joanna Smith"]
+    assert names(client, "q=baez") == []
+
+
+def test_user_search_is_admin_only_and_filters_by_role(client, make_user):
+    make_user(email="olga@example.com", reg_no="REG2", name="Olga Ortiz", role="organizer")
+    make_user(email="oscar@example.com", reg_no="REG3", name="Oscar Ortiz")
+    assert client.get("/api/users/search?q=ortiz").status_code == 401
+
+    sign_in(client, make_user(email="root@example.com", reg_no="ROOT", role="admin"))
+    users = client.get("/api/users/search?q=ortiz").get_json()["users"]
+    assert sorted(u["name"] for u in users) == ["Olga Ortiz", "Oscar Ortiz"]
+    users = client.get("/api/users/search?q=ortiz&role=organizer").get_json()["users"]
+    assert [u["name"] for u in users] == ["Olga Ortiz"]
+
+
+def test_backfill_fills_older_rows(client, make_user):
+    user = make_user(name="Priya Rao")
+    User._get_collection().update_one({"_id": user.id}, {"$unset": {"search_keys": 1}})
+
+    assert backfill_search_keys(log=lambda msg: None) == (1, 0)
+    assert User.objects.get(id=user.id).search_keys == ["ana@example.com", "priya", "rao", "reg1"]
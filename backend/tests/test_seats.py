@@ -0,0 +1,76 @@
+"""Seat counters: taken and given back atomically, never past capacity or below zero."""
+import threading
+
+from models import Event
+
+from conftest import register
+
+
+def seats(event):
+    return Event.objects.get(id=event.id).registrations_count
+
+
+def test_take_seats_stops_at_capacity(make_event):
+    event = make_event(max_participants=3)
+
+    assert Event.take_seats(event.id, 2)
+    assert not Event.take_seats(event.id, 2)
+    assert Event.take_seats(event.id)
+    assert seats(event) == 3
+
+
+def test_release_seats_never_goes_negative(make_event):
+    event = make_event()
+    Event.take_seats(event.id)
+
+    assert not Event.release_seats(event.id, 2)
+    assert Event.release_seats(event.id)
+    assert not Event.release_seats(event.id)
+    assert seats(event) == 0
+
+
+def test_take_available_seats_grants_what_is_left(make_event):
+    event = make_event(max_participants=5)
+    Event.take_seats(event.id, 3)
+
+    assert Event.take_available_seats(event.id, 4) == 2
+    assert Event.take_available_seats(event.id, 1) == 0
+
+
+def test_concurrent_seat_taking_never_oversells(indexed, make_event):
+    event = make_event(max_participants=5)
+    results, start = [], threading.Barrier(20)
+
+    def attempt():
+        start.wait()
+        results.append(Event.take_seats(event.id))
+
+    threads = [threading.Thread(target=attempt) for _ in range(20)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert results.count(True) == 5
+    assert seats(event) == 5
+
+
+def test_full_event_refuses_registration(client, make_event):
+    event = make_event(max_participants=1)
+    assert register(client, event, email="a@example.com").status_code == 201
+
+    resp = register(client, event, email="b@example.com")
+    assert resp.status_code == 409
+    assert resp.get_json()["error"] == "Event is full"
+    assert seats(event) == 1
+
+
+def test_deleting_a_registration_gives_the_seat_back(client, make_event):
+    event = make_event(max_participants=1)
+    reg_id = register(client, event).get_json()["registration_id"]
+
+    client.delete(f"/api/registrations/{reg_id}")
+    client.delete(f"/api/registrations/{reg_id}")
+
+    assert seats(event) == 0
+    assert register(client, event, email="b@example.com").status_code == 201
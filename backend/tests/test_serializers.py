@@ -0,0 +1,68 @@
+"""Raw projections serialize to the same shapes the Document-based routes used to return."""
+from datetime import datetime
+
+import pytest
+from bson import ObjectId
+from flask import jsonify
+
+from models import EventRegistration, Participant
+from serializers import EVENT_FIELDS, FastJSONProvider, participant_dict, registration_dict
+
+from conftest import register
+
+
+def test_registration_row_joins_its_participant():
+    pid, rid = ObjectId(), ObjectId()
+    row = registration_dict(
+        {"_id": rid, "participant_id": pid, "registration_time": datetime(2030, 1, 1, 9, 30),
+         "status": "Registered"},
+        {"_id": pid, "name": "Ana", "email": "ana@example.com", "year": "2"},
+    )
+
+    assert row == {
+        "registration_id": str(rid), "participant_id": str(pid), "name": "Ana",
+        "email": "ana@example.com", "phone": None, "reg_no": None, "department": None, "year": "2",
+        "registration_time": "2030-01-01T09:30:00", "status": "Registered",
+        "team_name": None, "additional_info": {},
+    }
+
+
+def test_participant_without_created_at():
+    assert participant_dict({"_id": ObjectId(), "name": "Ana"})["created_at"] is None
+
+
+def test_list_and_detail_share_the_event_shape(client, make_event):
+    event = make_event(category="Workshop")
+
+    listed = client.get("/api/student/all-events").get_json()["events"][0]
+    detail = client.get(f"/api/events/{event.id}").get_json()["event"]
+
+    assert set(EVENT_FIELDS) <= set(detail)
+    assert {k: listed[k] for k in detail} == detail
+    assert detail["venue_id"] == str(event.venue_id.id)
+    assert detail["registrations_count"] == 0
+
+
+def test_registration_listing_matches_the_stored_documents(client, make_event):
+    event = make_event()
+    register(client, event, email="ana@example.com", department="CSE")
+    reg, person = EventRegistration.objects.get(), Participant.objects.get()
+    client.put(f"/api/registrations/{reg.id}", json={"team_name": "Owls"})
+
+    row = client.get(f"/api/registrations/?event_id={event.id}").get_json()["registrations"][0]
+
+    assert row["registration_id"] == str(reg.id)
+    assert row["participant_id"] == str(person.id)
+    assert row["registration_time"] == reg.registration_time.isoformat()
+    assert (row["department"], row["team_name"]) == ("CSE", "Owls")
+
+
+def test_fast_json_encodes_object_ids_with_sorted_keys(app):
+    pytest.importorskip("orjson")
+    assert isinstance(app.json, FastJSONProvider)
+
+    oid = ObjectId()
+    body = jsonify({"b": oid, "a": [1, None]}).get_data(as_text=True)
+
+    assert body == f'{{"a":[1,null],"b":"{oid}"}}'
+    assert app.json.loads(body) == {"a": [1, None], "b": str(oid)}
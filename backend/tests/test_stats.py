@@ -0,0 +1,73 @@
+"""Event stats leave the buckets a registration was counted in, and never go negative."""
+from event_stats import rebuild_stats, record
+from migrations import backfill_counted_as
+from models import EventRegistration, EventStats, Participant
+
+from conftest import register
+
+
+def stats(client, event):
+    return client.get(f"/api/events/{event.id}/stats").get_json()["stats"]
+
+
+def raw_stats(event):
+    return EventStats.objects(id=event.id).as_pymongo().first()
+
+
+def test_unknown_bucket_is_left_when_participant_gains_a_department(client, make_event):
+    event = make_event()
+    reg_id = register(client, event, email="bo@example.com", name="Bo").get_json()["registration_id"]
+    assert stats(client, event)["by_department"] == {"Unknown": 1}
+
+    # Edited behind the stats' back, e.g. by an older deployment
+    Participant.objects(email="bo@example.com").update(set__department="ECE", set__year="3")
+    client.delete(f"/api/registrations/{reg_id}")
+
+    doc = raw_stats(event)
+    assert doc["department"] == {"Unknown": 0}
+    assert doc["year"] == {"Unknown": 0}
+    assert stats(client, event)["by_department"] == {}
+
+
+def test_participant_edit_moves_the_stored_buckets(client, make_event):
+    event = make_event()
+    register(client, event, email="bo@example.com", name="Bo", department="CSE", year="2")
+    participant = Participant.objects.get(email="bo@example.com")
+
+    client.put(f"/api/registrations/participants/{participant.id}", json={"department": "ECE"})
+
+    assert stats(client, event)["by_department"] == {"ECE": 1}
+    reg = EventRegistration.objects.get(participant_id=participant.id)
+    assert reg.counted_as == {"department": "ECE", "year": "2"}
+
+
+def test_counters_are_clamped_at_zero(make_event):
+    event = make_event()
+    # A decrement for a registration that was never counted (e.g. legacy data)
+    record([(event.id, "Registered", "MECH", "4", -1)])
+
+    doc = raw_stats(event)
+    assert doc["total"] == 0
+    assert doc["status"]["Registered"] == 0
+    assert doc["department"]["MECH"] == 0
+
+
+def test_rebuild_uses_counted_buckets(client, make_event):
+    event = make_event()
+    register(client, event, email="bo@example.com", name="Bo", department="CSE", year="2")
+    Participant.objects(email="bo@example.com").update(set__department="ECE")
+
+    rebuild_stats(log=lambda msg: None)
+
+    assert raw_stats(event)["department"] == {"CSE": 1}
+
+
+def test_backfill_counted_as_fills_older_registrations(client, make_event):
+    event = make_event()
+    register(client, event, email="bo@example.com", name="Bo", department="CSE", year="2")
+    EventRegistration._get_collection().update_many({}, {"$unset": {"counted_as": ""}})
+
+    updated, _ = backfill_counted_as(log=lambda msg: None)
+
+    assert updated == 1
+    assert EventRegistration.objects.get().counted_as == {"department": "CSE", "year": "2"}
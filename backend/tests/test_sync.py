@@ -0,0 +1,48 @@
+"""Delta sync (?since=): changed rows, tombstones for deleted ones, and retention."""
+from datetime import datetime, timedelta
+
+from models import EventRegistration
+from sync import TOMBSTONE_DAYS
+
+from conftest import register
+
+
+def participants(client, event, **args):
+    return client.get("/api/registrations/participants", query_string={"event_id": str(event.id), **args})
+
+
+def test_since_returns_changes_and_deletions(client, make_event):
+    event = make_event()
+    register(client, event, email="a@example.com")
+    gone = register(client, event, email="b@example.com").get_json()["registration_id"]
+    # Both written well before the previous sync
+    EventRegistration.objects(event_id=event.id).update(set__updated_at=datetime.utcnow() - timedelta(hours=1))
+    since = datetime.utcnow().isoformat() + "Z"
+
+    fresh = register(client, event, email="c@example.com").get_json()["registration_id"]
+    client.delete(f"/api/registrations/{gone}")
+    body = participants(client, event, since=since).get_json()
+
+    assert [row["registration_id"] for row in body["rows"]] == [fresh]
+    assert body["deleted"] == [gone]
+    assert body["synced_at"].endswith("Z")
+
+
+def test_tombstones_are_scoped_to_the_event(client, make_event):
+    first, second = make_event(title="One"), make_event(title="Two")
+    reg_id = register(client, first).get_json()["registration_id"]
+    since = datetime.utcnow().isoformat() + "Z"
+
+    client.delete(f"/api/registrations/{reg_id}")
+
+    assert participants(client, first, since=since).get_json()["deleted"] == [reg_id]
+    assert participants(client, second, since=since).get_json()["deleted"] == []
+
+
+def test_since_older_than_tombstones_is_rejected(client, make_event):
+    event = make_event()
+    since = (datetime.utcnow() - timedelta(days=TOMBSTONE_DAYS + 1)).isoformat()
+
+    resp = participants(client, event, since=since)
+    assert resp.status_code == 400
+    assert participants(client, event, since="yesterday").status_code == 400
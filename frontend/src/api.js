@@ -0,0 +1,15 @@
+// Every backend call goes through apiFetch so it carries the session token
+// from sign-in; the server authorizes from the token alone.
+export async function apiFetch(url, options = {}) {
+  const token = localStorage.getItem("token");
+  const headers = { ...(options.headers || {}) };
+  if (token) headers.Authorization = `Bearer ${token}`;
+
+  const res = await fetch(url, { ...options, headers });
+  if (res.status === 401 && token) {
+    // Expired or revoked session: sign in again
+    localStorage.clear();
+    window.location.assign("/signin");
+  }
+  return res;
+}
@@ -1,5 +1,6 @@
 import { useState, useEffect } from "react";
 import { useParams, useNavigate } from "react-router-dom";
+import { apiFetch } from "../api";
 
 const AddUser = () => {
   const { id } = useParams();           // get user id from URL for edit
@@ -19,7 +20,7 @@ const AddUser = () => {
   useEffect(() => {
     if (!id) return;
     setLoading(true);
-    fetch(`http://localhost:5000/api/users/${id}`)
+    apiFetch(`http://localhost:5000/api/users/${id}`)
       .then(res => res.json())
       .then(data => {
         setFormData({
@@ -49,7 +50,7 @@ const AddUser = () => {
       : `http://localhost:5000/api/users`;
 
     try {
-      const res = await fetch(url, {
+      const res = await apiFetch(url, {
         method,
         headers: { "Content-Type": "application/json" },
         body: JSON.stringify(payload),
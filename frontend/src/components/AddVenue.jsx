@@ -1,5 +1,6 @@
 import React, { useState, useEffect } from "react";
 import "./AddVenue.css";
+import { apiFetch } from "../api";
 
 function AddVenue() {
   const [formData, setFormData] = useState({
@@ -19,7 +20,7 @@ function AddVenue() {
   const handleSubmit = async (e) => {
     e.preventDefault();
     try {
-      const res = await fetch("http://localhost:5000/api/venues/", {
+      const res = await apiFetch("http://localhost:5000/api/venues/", {
         method: "POST",
         headers: { "Content-Type": "application/json" },
         body: JSON.stringify(formData),
@@ -2,6 +2,7 @@
 import React, { useState, useEffect } from "react";
 import { useParams, useNavigate } from "react-router-dom";
 import "./AddEvents.css"; // ensure this file exists
+import { apiFetch } from "../../api";
 
 const AddEvents = () => {
   const { eventId } = useParams(); // for editing an existing event
@@ -31,7 +32,7 @@ const AddEvents = () => {
   useEffect(() => {
     const fetchVenues = async () => {
       try {
-        const res = await fetch("http://localhost:5000/api/venues");
+        const res = await apiFetch("http://localhost:5000/api/venues");
         const data = await res.json();
         if (data.success) {
           setVenues(data.venues);
@@ -53,7 +54,7 @@ const AddEvents = () => {
 
     const fetchEvent = async () => {
       try {
-        const res = await fetch(`http://localhost:5000/api/events/${eventId}`);
+        const res = await apiFetch(`http://localhost:5000/api/events/${eventId}`);
         const data = await res.json();
         if (data.success && data.event) {
           const e = data.event;
@@ -124,7 +125,7 @@ const AddEvents = () => {
     const method = eventId ? "PUT" : "POST";
 
     try {
-      const res = await fetch(url, {
+      const res = await apiFetch(url, {
         method,
         headers: { "Content-Type": "application/json" },
         body: JSON.stringify(body),
@@ -2,6 +2,7 @@ import { useState, useEffect } from "react";
 import { useNavigate } from "react-router-dom";
 import Loading from "../Loading";
 import "./EditProfile.css";
+import { apiFetch } from "../../api";
 
 const EditProfile = () => {
   const navigate = useNavigate();
@@ -24,7 +25,7 @@ const EditProfile = () => {
   const fetchUserProfile = async () => {
     setLoading(true);
     try {
-      const res = await fetch(`http://localhost:5000/api/users/${userId}`);
+      const res = await apiFetch(`http://localhost:5000/api/users/${userId}`);
       const data = await res.json();
       if (data) {
         setFormData({
@@ -56,7 +57,7 @@ const EditProfile = () => {
     setLoading(true);
 
     try {
-      const res = await fetch(`http://localhost:5000/api/users/${userId}`, {
+      const res = await apiFetch(`http://localhost:5000/api/users/${userId}`, {
         method: "PUT",
         headers: { "Content-Type": "application/json" },
         body: JSON.stringify(formData),
@@ -3,6 +3,7 @@ import { useNavigate } from "react-router-dom";
 import Loading from "../Loading";
 import RegisterParticipantModal from "./RegisterParticipantModal";
 import "./MyEvents.css";
+import { apiFetch } from "../../api";
 
 const MyEvents = () => {
   const [events, setEvents] = useState([]);
@@ -18,7 +19,7 @@ const MyEvents = () => {
   const fetchEvents = async () => {
     setLoading(true);
     try {
-      const res = await fetch(`http://localhost:5000/api/events/organizer/${organizerId}`);
+      const res = await apiFetch(`http://localhost:5000/api/events/organizer/${organizerId}`);
       const data = await res.json();
       setEvents(data);
     } catch (err) {
@@ -31,7 +32,7 @@ const MyEvents = () => {
   const handleDelete = async (eventId) => {
     if (!window.confirm("Are you sure you want to delete this event?")) return;
     try {
-      const res = await fetch(`http://localhost:5000/api/events/${eventId}`, { 
+      const res = await apiFetch(`http://localhost:5000/api/events/${eventId}`, { 
         method: "DELETE" 
       });
       if (res.ok) {
@@ -63,7 +64,7 @@ const MyEvents = () => {
   const handleRegisterParticipant = async (eventId, formData) => {
     console.log("Submitting registration for event:", eventId, formData);
     try {
-      const res = await fetch("http://localhost:5000/api/registrations/register", {
+      const res = await apiFetch("http://localhost:5000/api/registrations/register", {
         method: "POST",
         headers: { "Content-Type": "application/json" },
         body: JSON.stringify({ 
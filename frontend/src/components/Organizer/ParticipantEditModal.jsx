@@ -1,5 +1,6 @@
 import React, { useState } from "react";
 import "./ParticipantEditModal.css";
+import { apiFetch } from "../../api";
 
 const ParticipantEditModal = ({ participant, onClose }) => {
   const [form, setForm] = useState({
@@ -18,7 +19,7 @@ const ParticipantEditModal = ({ participant, onClose }) => {
   const handleSave = async () => {
     setSaving(true);
     try {
-      const res = await fetch(`http://localhost:5000/api/registrations/participants/${form.participant_id}`, {
+      const res = await apiFetch(`http://localhost:5000/api/registrations/participants/${form.participant_id}`, {
         method: "PUT",
         headers: { "Content-Type": "application/json" },
         body: JSON.stringify(form)
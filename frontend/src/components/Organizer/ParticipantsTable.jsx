@@ -3,6 +3,7 @@ import ParticipantEditModal from "./ParticipantEditModal";
 import { useParams } from "react-router-dom";
 import "./ParticipantTables.css";
 import Loading from "../Loading";
+import { apiFetch } from "../../api";
 
 const ParticipantsTable = () => {
   const { eventId } = useParams();
@@ -14,7 +15,7 @@ const ParticipantsTable = () => {
   const fetchRows = async () => {
     setLoading(true);
     try {
-      const res = await fetch(
+      const res = await apiFetch(
         `http://localhost:5000/api/registrations/participants?event_id=${eventId}`
       );
       const data = await res.json();
@@ -42,7 +43,7 @@ const ParticipantsTable = () => {
 
     setLoading(true);
     try {
-      const res = await fetch(
+      const res = await apiFetch(
         `http://localhost:5000/api/registrations/participants/${participantId}`,
         { method: "DELETE" }
       );
@@ -2,6 +2,7 @@ import { useState, useEffect } from "react";
 import { useNavigate } from "react-router-dom";
 import Loading from "./Loading";
 import "./ShowUsers.css";
+import { apiFetch } from "../api";
 
 const ShowUsers = () => {
   const [users, setUsers] = useState([]);
@@ -22,7 +23,7 @@ const ShowUsers = () => {
   const fetchUsers = async () => {
     setLoading(true);
     try {
-      const res = await fetch("http://localhost:5000/api/users");
+      const res = await apiFetch("http://localhost:5000/api/users");
       const data = await res.json();
       setUsers(data);
     } catch (err) {
@@ -57,7 +58,7 @@ const ShowUsers = () => {
     if (!window.confirm("Are you sure you want to delete this user?")) return;
 
     try {
-      const res = await fetch(`http://localhost:5000/api/users/${id}`, {
+      const res = await apiFetch(`http://localhost:5000/api/users/${id}`, {
         method: "DELETE",
       });
       const result = await res.json();
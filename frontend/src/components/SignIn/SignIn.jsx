@@ -26,6 +26,7 @@ function SignIn({ setRole }) {
         localStorage.setItem("userId", data.user_id);
         localStorage.setItem("role", data.role);
         localStorage.setItem("name", data.name);
+        localStorage.setItem("token", data.token);
         setRole(data.role);
         navigate(`/${data.role}-dashboard`);
         enqueueSnackbar("Logged In successfully!", { 
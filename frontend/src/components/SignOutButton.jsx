@@ -5,6 +5,14 @@ const SignOutButton = () => {
   const navigate = useNavigate();
 
   const handleSignOut = () => {
+    const token = localStorage.getItem("token");
+    if (token) {
+      // revoke the session token server-side; sign out locally regardless
+      fetch("http://localhost:5000/api/logout", {
+        method: "POST",
+        headers: { Authorization: `Bearer ${token}` },
+      }).catch(() => {});
+    }
     localStorage.clear(); // remove all stored data
     navigate("/");   // redirect to login page
   };
@@ -2,6 +2,7 @@ import { useEffect, useState } from "react";
 import Loading from "../Loading";
 import "./Modal.css";
 import "./EventCards.css";
+import { apiFetch } from "../../api";
 
 const AllEvents = () => {
   const [events, setEvents] = useState([]);
@@ -24,7 +25,7 @@ const AllEvents = () => {
   const fetchAllEvents = async () => {
     setLoading(true);
     try {
-      const res = await fetch("http://localhost:5000/api/student/all-events");
+      const res = await apiFetch("http://localhost:5000/api/student/all-events");
       const data = await res.json();
       if (data.success) setEvents(data.events);
     } catch (err) {
@@ -71,7 +72,7 @@ const AllEvents = () => {
     setSubmitting(true);
 
     try {
-      const res = await fetch("http://localhost:5000/api/registrations/register", {
+      const res = await apiFetch("http://localhost:5000/api/registrations/register", {
         method: "POST",
         headers: { "Content-Type": "application/json" },
         body: JSON.stringify({
@@ -1,6 +1,7 @@
 import { useEffect, useState } from "react";
 import Loading from "../Loading";
 import "./EventCards.css";
+import { apiFetch } from "../../api";
 
 const MyRegisteredEvents = () => {
   const [events, setEvents] = useState([]);
@@ -14,7 +15,7 @@ const MyRegisteredEvents = () => {
   const fetchRegisteredEvents = async () => {
     setLoading(true);
     try {
-      const res = await fetch(
+      const res = await apiFetch(
         `http://localhost:5000/api/student/registered-events/${studentId}`
       );
       const data = await res.json();
@@ -31,7 +32,7 @@ const MyRegisteredEvents = () => {
   const handleUnregister = async (registrationId, eventId) => {
     if (!window.confirm("Are you sure you want to unregister from this event?")) return;
     try {
-      const res = await fetch(
+      const res = await apiFetch(
         `http://localhost:5000/api/registrations/${registrationId}`,
         { method: "DELETE" }
       );
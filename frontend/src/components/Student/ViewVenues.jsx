@@ -1,6 +1,7 @@
 import { useEffect, useState } from "react";
 import Loading from "../Loading";
 import "./VenuesView.css";
+import { apiFetch } from "../../api";
 
 const ViewVenues = () => {
   const [venues, setVenues] = useState([]);
@@ -13,7 +14,7 @@ const ViewVenues = () => {
   const fetchVenues = async () => {
     setLoading(true);
     try {
-      const res = await fetch("http://localhost:5000/api/venues");
+      const res = await apiFetch("http://localhost:5000/api/venues");
       const data = await res.json();
       if (data.success) {
         setVenues(data.venues);